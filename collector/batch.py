@@ -0,0 +1,410 @@
+import argparse
+import os
+import time
+from typing import Dict, Iterable, List
+
+import orjson
+
+from collector.config import (
+    BATCH_DIR,
+    BATCH_MAX_ROUNDS,
+    BATCH_POLL_SECONDS,
+    BATCH_STATE_PATH,
+    CATEGORY_ROOT,
+    MAX_TITLES_PER_REQUEST,
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    RULES_FAST_PATH,
+)
+from collector.categories import iter_category_tree
+from collector.chunks import chunk_messages, extract_chunked, oversized, split_sections
+from collector.dedupe import DUPLICATES
+from collector.extractor_openai import (
+    build_request_body,
+    build_user_message,
+    completion_cache_key,
+    extract_record,
+    get_openai_client,
+    trim_prompt,
+)
+from collector.imagecache import IMAGE_INFO_CACHE
+from collector.llmcache import LLM_CACHE
+from collector.main import (
+    apply_aliases,
+    category_titles,
+    fetch_stage,
+    has_record,
+    log_failure,
+    output_path_for_title,
+    page_url_for_title,
+    plan_stage,
+    validate_stage,
+    print_duplicates,
+    window_titles,
+    write_stage,
+)
+from collector.pipeline import Stage, run_pipeline
+from collector.rawstore import load_manifest, read_raw, record_revision, save_manifest
+from collector.rules import extract_rule_based
+from collector.schema import save_schema_snapshot
+from collector.state import STATE
+from collector.utils import write_json_atomic
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def load_state(path: str = BATCH_STATE_PATH) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as handle:
+        return orjson.loads(handle.read())
+
+
+def save_state(state: Dict, path: str = BATCH_STATE_PATH) -> None:
+    write_json_atomic(path, state)
+
+
+def sync_pages(
+    titles: Iterable[str], force: bool = False, explicit: bool = False, revisions: Dict | None = None
+) -> List[str]:
+    """Fetch every title whose revision moved into the raw store; return those fetched.
+
+    The crawl state is only told about the new revision by ``record_fetch``.
+    """
+    manifest = load_manifest()
+    STATE.seed(manifest, output_path_for_title)
+    save_schema_snapshot()
+    stages = [
+        Stage("plan", plan_stage({} if revisions is None else revisions, force, explicit), stream=True, maxsize=MAX_TITLES_PER_REQUEST),
+        Stage("fetch", fetch_stage, stream=True, maxsize=MAX_TITLES_PER_REQUEST),
+    ]
+    fetched = []
+    for item in run_pipeline(({"title": title} for title in titles), stages):
+        raw = item.get("raw") or {}
+        if item.get("error"):
+            log_failure(item["title"], item["error"], item.get("stage"))
+        elif raw.get("missing"):
+            log_failure(item["title"], LookupError("page not found on wiki"), "fetch")
+        elif raw.get("pageid"):
+            record_revision(manifest, item["title"], raw)
+            fetched.append(item["title"])
+    save_manifest(manifest)
+    return fetched
+
+
+def record_fetch(title: str, manifest: Dict) -> None:
+    """Enter the fetched revision in the crawl state once ``title`` is written or aliased.
+
+    Until then the state keeps the revision of the stored record, so a page
+    whose batch request fails is planned again by the next run.
+    """
+    entry = manifest.get(title) or {}
+    STATE.record_fetch(title, entry.get("revid"), entry.get("hash"))
+
+
+def user_contents_for(title: str, manifest: Dict) -> List[str]:
+    """The extraction messages for ``title``: one, or one per chunk of an oversized page."""
+    wikitext = read_raw(title, manifest)
+    if wikitext is None:
+        raise LookupError("no stored wikitext for page")
+    url = page_url_for_title(title)
+    if oversized(wikitext):
+        return chunk_messages(title, url, split_sections(trim_prompt(wikitext)[0]))
+    return [build_user_message(title, url, trim_prompt(wikitext)[0])]
+
+
+def finish_title(title: str, manifest: Dict) -> None:
+    """Normalize, validate and write ``title`` from its cached ``OPENAI_MODEL`` completions.
+
+    Oversized pages are merged from their cached chunk completions. Records
+    that fail validation are repaired with small synchronous requests (cached
+    like any other); the page extraction itself is always served from the
+    cache. Titles the rule-based fast path handles are written by ``prepare``.
+    """
+    wikitext = read_raw(title, manifest)
+    if wikitext is None:
+        raise LookupError("no stored wikitext for page")
+    extract = extract_chunked if oversized(wikitext) else extract_record
+    record = extract(
+        title, page_url_for_title(title), wikitext, cache_only=True, model=OPENAI_MODEL, repair_cache_only=False
+    )
+    write_stage(validate_stage({"title": title, "record": record}))
+    record_fetch(title, manifest)
+
+
+def prepare(
+    titles: Iterable[str], force: bool = False, explicit: bool = False, revisions: Dict | None = None
+) -> Dict:
+    """Plan a batch run: duplicates of another title's content become aliases,
+    titles the rule-based fast path handles or that are already in the LLM
+    cache are written immediately, and the rest become ``requests`` keyed by
+    their cache key (the batch ``custom_id``). An oversized page is requested
+    as one request per section chunk, as ``extract_chunked`` would send it."""
+    fetched = sync_pages(titles, force, explicit, revisions)
+    manifest = load_manifest()
+    DUPLICATES.seed(manifest, has_record)
+    requests: Dict[str, str] = {}
+    cached = ruled = aliased = 0
+    for title in fetched:
+        if DUPLICATES.assign(title, (manifest.get(title) or {}).get("hash")):
+            record_fetch(title, manifest)
+            aliased += 1
+            continue
+        try:
+            wikitext = read_raw(title, manifest)
+            record = None
+            if RULES_FAST_PATH:
+                record = extract_rule_based(title, page_url_for_title(title), wikitext)
+            if record is not None:
+                write_stage(validate_stage({"title": title, "record": record}))
+                record_fetch(title, manifest)
+                ruled += 1
+                continue
+            keys = [completion_cache_key(content) for content in user_contents_for(title, manifest)]
+            missing = [key for key in keys if LLM_CACHE.get(key) is None]
+            if missing:
+                requests.update((key, title) for key in missing)
+                continue
+            finish_title(title, manifest)
+            cached += 1
+        except Exception as exc:  # noqa: BLE001
+            log_failure(title, exc)
+    print(
+        f"Batch plan: fetched={len(fetched)} aliases={aliased} rules={ruled} "
+        f"cached={cached} queued={len(requests)} titles={len(set(requests.values()))}"
+    )
+    return {"round": 0, "requests": requests, "batch_id": None, "errors": {}}
+
+
+def write_requests(path: str, requests: Dict[str, str], manifest: Dict) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, "wb") as handle:
+        for title in dict.fromkeys(requests.values()):
+            try:
+                user_contents = user_contents_for(title, manifest)
+            except LookupError as exc:
+                log_failure(title, exc)
+                continue
+            for user_content in user_contents:
+                custom_id = completion_cache_key(user_content)
+                if custom_id not in requests:
+                    continue
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": build_request_body(user_content),
+                }
+                handle.write(orjson.dumps(line) + b"\n")
+                written += 1
+    return written
+
+
+def submit(state: Dict) -> Dict:
+    path = os.path.join(BATCH_DIR, f"requests-{state['round']}.jsonl")
+    count = write_requests(path, state["requests"], load_manifest())
+    client = get_openai_client()
+    with open(path, "rb") as handle:
+        upload = client.files.create(file=handle, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=upload.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    state.update({"batch_id": batch.id, "input_file_id": upload.id, "status": batch.status})
+    save_state(state)
+    print(f"Submitted batch {batch.id} (round {state['round']}, {count} requests)")
+    return state
+
+
+def poll(state: Dict, interval: float = BATCH_POLL_SECONDS):
+    last = None
+    while True:
+        batch = get_openai_client().batches.retrieve(state["batch_id"])
+        counts = batch.request_counts
+        progress = (batch.status, counts.completed if counts else 0, counts.failed if counts else 0)
+        if progress != last:
+            print(f"Batch {batch.id}: status={progress[0]} completed={progress[1]} failed={progress[2]}")
+            last = progress
+        if batch.status != state.get("status"):
+            state["status"] = batch.status
+            save_state(state)
+        if batch.status in FINAL_STATUSES:
+            return batch
+        time.sleep(interval)
+
+
+def iter_result_lines(file_id: str | None):
+    if not file_id:
+        return
+    for line in get_openai_client().files.content(file_id).text.splitlines():
+        if line.strip():
+            yield orjson.loads(line)
+
+
+def collect(state: Dict, batch) -> Dict[str, str]:
+    """Cache and write every successful result; return ``{custom_id: error}`` for the rest.
+
+    A chunked page is written once all of its chunk requests have a cached
+    result; a failed chunk is resubmitted on its own.
+    """
+    manifest = load_manifest()
+    requests = state["requests"]
+    failures: Dict[str, str] = {}
+    seen = set()
+    answered: Dict[str, None] = {}
+    written = 0
+    for entry in [*iter_result_lines(batch.output_file_id), *iter_result_lines(batch.error_file_id)]:
+        custom_id = entry.get("custom_id")
+        title = requests.get(custom_id)
+        if title is None:
+            continue
+        seen.add(custom_id)
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            error = entry.get("error") or (response.get("body") or {}).get("error") or {}
+            failures[custom_id] = f"HTTP {response.get('status_code')}: {error.get('message', error)}"
+            continue
+        body = response["body"]
+        LLM_CACHE.put(
+            custom_id,
+            {
+                "model": OPENAI_MODEL,
+                "content": body["choices"][0]["message"]["content"],
+                "usage": body.get("usage"),
+            },
+        )
+        answered[title] = None
+    for custom_id in requests:
+        if custom_id not in seen:
+            failures[custom_id] = f"no result (batch {batch.status})"
+    pending = {requests[custom_id] for custom_id in failures}
+    for title in answered:
+        if title in pending:
+            continue
+        try:
+            finish_title(title, manifest)
+            written += 1
+        except Exception as exc:  # noqa: BLE001
+            for custom_id, requested in requests.items():
+                if requested == title:
+                    failures[custom_id] = f"{type(exc).__name__}: {exc}"
+    print(f"Batch {batch.id}: written={written} failed={len(failures)}")
+    return failures
+
+
+def run(state: Dict, interval: float = BATCH_POLL_SECONDS, max_rounds: int = BATCH_MAX_ROUNDS) -> Dict:
+    """Drive ``state`` to completion, resubmitting only failed custom_ids.
+
+    The state is checkpointed after every transition, so an interrupted run
+    resumes polling the batch it had submitted instead of starting over.
+    """
+    while state["requests"]:
+        if not state.get("batch_id"):
+            submit(state)
+        batch = poll(state, interval)
+        failures = collect(state, batch)
+        state["round"] += 1
+        state["errors"] = failures
+        state["requests"] = {custom_id: state["requests"][custom_id] for custom_id in failures}
+        state["batch_id"] = None
+        if state["requests"] and state["round"] >= max_rounds:
+            last_errors = {title: failures[custom_id] for custom_id, title in state["requests"].items()}
+            for title, error in last_errors.items():
+                log_failure(title, RuntimeError(error))
+            state["requests"] = {}
+        save_state(state)
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-extract pages through the OpenAI Batch API"
+    )
+    parser.add_argument(
+        "--category",
+        default=CATEGORY_ROOT,
+        help="MediaWiki category to crawl (default: Items)",
+    )
+    parser.add_argument("--recursive", action="store_true", help="Also crawl subcategories")
+    parser.add_argument(
+        "--title",
+        dest="titles",
+        action="append",
+        help="Specific page title to process (can be repeated)",
+    )
+    parser.add_argument("--limit", type=int, default=0, help="Max pages to queue (0 = no limit)")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Queue pages even if their revision has not changed",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=BATCH_POLL_SECONDS,
+        help="Seconds between batch status checks",
+    )
+    parser.add_argument(
+        "--max-rounds",
+        type=int,
+        default=BATCH_MAX_ROUNDS,
+        help="Batches to submit before giving up on failed requests",
+    )
+    parser.add_argument(
+        "--status", action="store_true", help="Print the checkpointed batch state and exit"
+    )
+    parser.add_argument(
+        "--cancel",
+        action="store_true",
+        help="Cancel the in-progress batch and discard the checkpoint",
+    )
+    args = parser.parse_args()
+
+    state = load_state()
+    if args.status:
+        pending = len(state.get("requests") or {})
+        print(
+            f"round={state.get('round', 0)} batch={state.get('batch_id')} "
+            f"status={state.get('status')} pending={pending}"
+        )
+        return
+    if not OPENAI_API_KEY:
+        raise SystemExit("Missing OPENAI_API_KEY in environment")
+    if args.cancel:
+        if state.get("batch_id"):
+            get_openai_client().batches.cancel(state["batch_id"])
+        if os.path.exists(BATCH_STATE_PATH):
+            os.remove(BATCH_STATE_PATH)
+        return
+
+    if state.get("requests"):
+        print(f"Resuming batch run (round {state['round']}, {len(state['requests'])} requests)")
+    else:
+        revisions: Dict = {}
+        if args.titles:
+            titles: Iterable[str] = args.titles
+        elif args.recursive:
+            titles = iter_category_tree(args.category)
+        else:
+            titles = category_titles(args.category, revisions)
+        state = prepare(
+            window_titles(titles, "", 0, args.limit),
+            force=args.force,
+            explicit=bool(args.titles),
+            revisions=revisions,
+        )
+        save_state(state)
+    run(state, args.poll_interval, args.max_rounds)
+    apply_aliases()
+    IMAGE_INFO_CACHE.save()
+    print_duplicates()
+    if os.path.exists(BATCH_STATE_PATH):
+        os.remove(BATCH_STATE_PATH)
+    print(f"Batch run complete after {state['round']} round(s)")
+
+
+if __name__ == "__main__":
+    main()
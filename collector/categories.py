@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+
+from collector.config import (
+    CATEGORY_CACHE_DIR,
+    CATEGORY_CACHE_TTL_SECONDS,
+    CATEGORY_WORKERS,
+)
+from collector.mediawiki import fetch_category_info, iter_category_batches
+from collector.utils import sanitize_title_for_fs, write_json_atomic
+
+CATEGORY_PREFIX = "Category:"
+
+
+def listing_path(category: str) -> str:
+    return os.path.join(CATEGORY_CACHE_DIR, f"{sanitize_title_for_fs(category)}.json")
+
+
+def load_listing(category: str) -> Optional[Dict]:
+    path = listing_path(category)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as handle:
+        return orjson.loads(handle.read())
+
+
+def save_listing(category: str, listing: Dict) -> None:
+    write_json_atomic(listing_path(category), listing)
+
+
+def listing_is_fresh(listing: Optional[Dict], info: Dict, ttl: float = CATEGORY_CACHE_TTL_SECONDS) -> bool:
+    """A complete cached listing is reused while the category's member counts are unchanged."""
+    if not listing or not listing.get("complete"):
+        return False
+    if time.time() - listing.get("fetched_at", 0) >= ttl:
+        return False
+    return bool(info) and listing.get("info") == info
+
+
+def fetch_listing(category: str, info: Dict) -> Dict:
+    """List a category's articles and subcategories, persisting progress per batch.
+
+    An incomplete cached listing resumes from its saved ``cmcontinue`` token.
+    """
+    listing = load_listing(category)
+    if not listing or listing.get("complete"):
+        listing = {"pages": [], "subcats": [], "continue": None, "complete": False}
+    for members, continuation in iter_category_batches(
+        category, cmcontinue=listing.get("continue"), cmtype="page|subcat"
+    ):
+        for entry in members:
+            title = entry["title"]
+            if entry.get("ns") == 0:
+                listing["pages"].append(title)
+            elif entry.get("ns") == 14 and title.startswith(CATEGORY_PREFIX):
+                listing["subcats"].append(title[len(CATEGORY_PREFIX):])
+        listing["continue"] = continuation
+        if not continuation:
+            listing["complete"] = True
+            listing["info"] = info
+            listing["fetched_at"] = time.time()
+        save_listing(category, listing)
+    return listing
+
+
+def iter_category_tree(
+    root: str,
+    max_depth: int = -1,
+    workers: int = CATEGORY_WORKERS,
+    use_cache: bool = True,
+    stats: Optional[Dict] = None,
+) -> Iterator[str]:
+    """Walk ``root`` and its subcategories breadth-first, yielding new titles as they are listed.
+
+    Each level of the graph is listed concurrently. Categories already visited
+    are skipped, so cycles terminate, and every title is yielded once even if
+    it sits in several categories. ``max_depth`` of -1 means unlimited. When
+    given, ``stats`` is filled with ``cached``/``listed`` counts and the
+    per-category ``categories`` listing.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"cached": 0, "listed": 0, "categories": {}})
+    visited = {root}
+    seen_titles: set = set()
+    frontier = [root]
+    depth = 0
+    lock = threading.Lock()
+
+    def list_one(category: str, info: Dict) -> Dict:
+        cached = load_listing(category) if use_cache else None
+        if listing_is_fresh(cached, info):
+            with lock:
+                stats["cached"] += 1
+            return cached
+        with lock:
+            stats["listed"] += 1
+        return fetch_listing(category, info)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while frontier:
+            infos = fetch_category_info(frontier)
+            listings = pool.map(lambda name: list_one(name, infos.get(name, {})), frontier)
+            next_frontier: List[str] = []
+            for category, listing in zip(frontier, listings):
+                stats["categories"][category] = listing["pages"]
+                for title in listing["pages"]:
+                    if title not in seen_titles:
+                        seen_titles.add(title)
+                        yield title
+                if max_depth >= 0 and depth >= max_depth:
+                    continue
+                for subcat in listing["subcats"]:
+                    if subcat not in visited:
+                        visited.add(subcat)
+                        next_frontier.append(subcat)
+            frontier = next_frontier
+            depth += 1
+
+
+def crawl_category_tree(
+    root: str,
+    max_depth: int = -1,
+    workers: int = CATEGORY_WORKERS,
+    use_cache: bool = True,
+) -> Dict:
+    """Return ``{"titles", "categories", "cached", "listed"}`` for a full category walk."""
+    stats: Dict = {}
+    titles = list(iter_category_tree(root, max_depth, workers, use_cache, stats))
+    return {"titles": titles, **stats}
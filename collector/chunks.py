@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from collector.config import CHUNK_LOG_PATH, CHUNK_MAX, CHUNK_THRESHOLD_TOKENS, OPENAI_MODEL, TRIM_WIKITEXT
+from collector.extractor_openai import build_user_message, cached_completion, extraction_text, finish_record
+from collector.llmlimit import estimate_tokens
+from collector.telemetry import TELEMETRY
+from collector.wikitext import parse
+
+# Lists of objects merged by key rather than concatenated; anything else
+# (tags, aliases, outcomes, modifiers, ...) is concatenated and deduped.
+KEYED_LISTS = {"effects": ("name", "trigger"), "images": ("src",)}
+
+
+def oversized(page_text: str, threshold: int = CHUNK_THRESHOLD_TOKENS) -> bool:
+    return threshold > 0 and estimate_tokens(page_text) > threshold
+
+
+def split_sections(page_text: str, max_chunks: int = CHUNK_MAX) -> List[str]:
+    """Split ``page_text`` at its top-level headings into at most ``max_chunks`` parts.
+
+    Sections are packed in page order into parts of roughly equal size;
+    subsections stay with their parent and the intro (with the infobox)
+    always starts the first part. A page without headings is one part.
+    """
+    doc = parse(page_text)
+    levels = [section.level for section in doc.sections[1:]]
+    if not levels or max_chunks < 2:
+        return [page_text]
+    top = min(levels)
+    blocks = ["\n".join(doc.sections[0].lines)]
+    for section in doc.sections[1:]:
+        marks = "=" * section.level
+        text = "\n".join([f"{marks} {section.title} {marks}", *section.lines])
+        if section.level == top:
+            blocks.append(text)
+        else:
+            blocks[-1] += "\n" + text
+    target = sum(len(block) for block in blocks) / max_chunks
+    chunks: List[str] = []
+    for block in blocks:
+        if chunks and len(chunks[-1]) < target:
+            chunks[-1] += "\n" + block
+        elif len(chunks) < max_chunks:
+            chunks.append(block)
+        else:
+            chunks[-1] += "\n" + block
+    return [chunk for chunk in chunks if chunk.strip()] or [page_text]
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _key(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+
+
+def merge_values(path: str, kept: Any, new: Any, conflicts: List[Dict[str, Any]]) -> Any:
+    """Merge ``new`` into ``kept``; earlier chunks win and disagreements are recorded."""
+    if _empty(new):
+        return kept
+    if _empty(kept):
+        return new
+    if isinstance(kept, dict) and isinstance(new, dict):
+        merged = dict(kept)
+        for key, value in new.items():
+            merged[key] = merge_values(f"{path}.{key}", merged.get(key), value, conflicts)
+        return merged
+    if isinstance(kept, list) and isinstance(new, list):
+        fields = KEYED_LISTS.get(path.rsplit(".", 1)[-1])
+        merged = list(kept)
+        seen = {_key(item) for item in merged}
+        positions = {}
+        if fields:
+            for index, item in enumerate(merged):
+                if isinstance(item, dict) and any(item.get(field) for field in fields):
+                    positions.setdefault(tuple(item.get(field) for field in fields), index)
+        for item in new:
+            if _key(item) in seen:
+                continue
+            identity = tuple(item.get(field) for field in fields) if fields and isinstance(item, dict) else None
+            if identity is not None and not any(identity):
+                identity = None
+            if identity is not None and identity in positions:
+                index = positions[identity]
+                merged[index] = merge_values(f"{path}[{identity[0]}]", merged[index], item, conflicts)
+                continue
+            if identity is not None:
+                positions[identity] = len(merged)
+            seen.add(_key(item))
+            merged.append(item)
+        return merged
+    if path == "provenance.confidence" and all(isinstance(v, (int, float)) for v in (kept, new)):
+        return min(kept, new)
+    if kept != new:
+        conflicts.append({"path": path, "kept": kept, "dropped": new})
+    return kept
+
+
+def merge_payloads(payloads: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Merge per-chunk model payloads in chunk order; return the payload and its conflicts."""
+    conflicts: List[Dict[str, Any]] = []
+    merged: Dict[str, Any] = {}
+    for payload in payloads:
+        for key, value in payload.items():
+            merged[key] = merge_values(key, merged.get(key), value, conflicts)
+    return merged, conflicts
+
+
+class ChunkStats:
+    """Chunked pages, parts and merge conflicts; each chunked page is logged to ``log_path``."""
+
+    def __init__(self, log_path: str = CHUNK_LOG_PATH) -> None:
+        self.log_path = log_path
+        self.pages = 0
+        self.chunks = 0
+        self.conflicts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, title: str, chunks: List[str], conflicts: List[Dict[str, Any]]) -> None:
+        entry = {"title": title, "chunks": [len(chunk) for chunk in chunks], "conflicts": conflicts}
+        with self._lock:
+            self.pages += 1
+            self.chunks += len(chunks)
+            for conflict in conflicts:
+                field = conflict["path"].split(".", 1)[0].split("[", 1)[0]
+                self.conflicts[field] = self.conflicts.get(field, 0) + 1
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "ab") as handle:
+                handle.write(orjson.dumps(entry) + b"\n")
+
+    def summary(self) -> str:
+        fields = ",".join(f"{key}:{value}" for key, value in sorted(self.conflicts.items()))
+        return (
+            f"pages={self.pages} chunks={self.chunks} "
+            f"conflicts={sum(self.conflicts.values())} ({fields or '-'})"
+        )
+
+
+CHUNK_STATS = ChunkStats()
+
+
+def chunk_messages(page_title: str, page_url: str, chunks: List[str]) -> List[str]:
+    """The user message for each chunk, labelled with its part number when there are several."""
+    total = len(chunks)
+    if total > 1:
+        chunks = [f"<!-- part {index + 1} of {total} of this page -->\n{chunk}" for index, chunk in enumerate(chunks)]
+    return [build_user_message(page_title, page_url, chunk) for chunk in chunks]
+
+
+def extract_chunked(
+    page_title: str,
+    page_url: str,
+    page_text: str,
+    cache_only: bool = False,
+    trim: bool = TRIM_WIKITEXT,
+    model: str = OPENAI_MODEL,
+    max_chunks: int = CHUNK_MAX,
+    repair_cache_only: bool | None = None,
+) -> Dict[str, Any]:
+    """Extract an oversized page as section chunks requested concurrently.
+
+    Each chunk is a separate (cached) completion; the payloads are merged in
+    chunk order by ``merge_payloads`` and then normalized and validated
+    against the whole page like any other record. ``repair_cache_only``
+    overrides ``cache_only`` for repair requests, as in ``extract_record``.
+    """
+    chunks = split_sections(extraction_text(page_title, page_text, trim), max_chunks)
+
+    def complete(message: str) -> Dict[str, Any]:
+        with TELEMETRY.bind(page_title):
+            completion = cached_completion(message, cache_only, model=model)
+        return json.loads(completion["content"])
+
+    with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="chunk") as pool:
+        payloads = list(pool.map(complete, chunk_messages(page_title, page_url, chunks)))
+    payload, conflicts = merge_payloads(payloads)
+    CHUNK_STATS.record(page_title, chunks, conflicts)
+    if repair_cache_only is None:
+        repair_cache_only = cache_only
+    return finish_record(payload, page_title, page_url, page_text, repair_cache_only, model)
@@ -10,13 +10,76 @@ if os.getenv("OPENAI_BASE_URL", "").strip() == "":
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", None) or None
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-thinking")
+# Tiered extraction: try this cheaper model first and escalate to OPENAI_MODEL
+# when its record is invalid, unsure or disagrees with the wikitext parsers.
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "")
+TIER_MIN_CONFIDENCE = float(os.getenv("TIER_MIN_CONFIDENCE", "0.8"))
+# USD per million input/output tokens for cost estimates, e.g. "gpt-4o-mini=0.15/0.6".
+LLM_PRICES = os.getenv("LLM_PRICES", "")
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "4"))
+LLM_INITIAL_IN_FLIGHT = int(os.getenv("LLM_INITIAL_IN_FLIGHT", "2"))
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))
+LLM_TPM = int(os.getenv("LLM_TPM", "0"))
+LLM_TARGET_LATENCY_SECONDS = float(os.getenv("LLM_TARGET_LATENCY_SECONDS", "90"))
+LLM_MAX_ATTEMPTS = 6
+TRIM_WIKITEXT = os.getenv("TRIM_WIKITEXT", "1") != "0"
+RULES_FAST_PATH = os.getenv("RULES_FAST_PATH", "1") != "0"
+# Pages whose wikitext exceeds this many (estimated) tokens are split by
+# section into at most CHUNK_MAX parts that are extracted concurrently.
+CHUNK_THRESHOLD_TOKENS = int(os.getenv("CHUNK_THRESHOLD_TOKENS", "12000"))
+CHUNK_MAX = int(os.getenv("CHUNK_MAX", "4"))
+# Failed titles are retried after RETRY_BASE_SECONDS (transient errors) or
+# RETRY_DETERMINISTIC_SECONDS (errors that need a page, prompt or code change),
+# doubling per attempt up to RETRY_MAX_SECONDS; after RETRY_MAX_ATTEMPTS
+# consecutive failures a title is left alone until it is listed explicitly.
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "600"))
+RETRY_DETERMINISTIC_SECONDS = float(os.getenv("RETRY_DETERMINISTIC_SECONDS", "86400"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", "604800"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
 
-WIKI_API = "https://dungeon-crawler-carl.fandom.com/api.php"
+WIKI_API = os.getenv("WIKI_API", "") or "https://dungeon-crawler-carl.fandom.com/api.php"
 CRAWLER_CONTACT_EMAIL = os.getenv("CRAWLER_CONTACT_EMAIL", "you@example.com")
 USER_AGENT = f"dcc-dnd-collector/1.0 ({CRAWLER_CONTACT_EMAIL})"
 
 DATA_DIR = os.path.join("data", "v1", "items")
+RETIRED_DIR = os.path.join("data", "v1", "retired")
 RAW_DIR = os.path.join("data", "v1", "raw")
+REVISION_MANIFEST_PATH = os.path.join(RAW_DIR, "revisions.json")
+RAW_OBJECTS_DIR = os.path.join(RAW_DIR, "objects")
+RAW_HISTORY_PATH = os.path.join(RAW_DIR, "history.jsonl")
+WATCH_STATE_PATH = os.path.join(RAW_DIR, "recentchanges.json")
+ALIASES_PATH = os.path.join(RAW_DIR, "aliases.json")
+STATE_DB_PATH = os.path.join(RAW_DIR, "state.sqlite")
+# Every schema a stored record was extracted with, by fingerprint, for diffing.
+SCHEMA_SNAPSHOT_DIR = os.path.join(RAW_DIR, "schemas")
+TRIM_LOG_PATH = os.path.join("data", "v1", "tmp", "trim.jsonl")
+TIER_LOG_PATH = os.path.join("data", "v1", "tmp", "tiers.jsonl")
+CHUNK_LOG_PATH = os.path.join("data", "v1", "tmp", "chunks.jsonl")
+FAILURE_LOG_PATH = os.path.join("data", "v1", "tmp", "failures.jsonl")
+TELEMETRY_PATH = os.path.join("data", "v1", "tmp", "telemetry.jsonl")
+SHARDS_DIR = os.path.join("data", "v1", "shards")
+SHARD_REPORT_PATH = os.path.join(SHARDS_DIR, "report.json")
+BATCH_DIR = os.path.join("data", "v1", "batch")
+BATCH_STATE_PATH = os.path.join(BATCH_DIR, "state.json")
+BATCH_POLL_SECONDS = 60
+BATCH_MAX_ROUNDS = 3
+CACHE_DIR = os.path.join("data", "v1", "cache")
+IMAGE_INFO_CACHE_PATH = os.path.join(CACHE_DIR, "imageinfo.json")
+IMAGE_INFO_TTL_SECONDS = 7 * 24 * 3600
+# Expired entries are kept this long for their sha1, so a refresh can revalidate them cheaply.
+IMAGE_INFO_KEEP_SECONDS = 8 * IMAGE_INFO_TTL_SECONDS
+CATEGORY_CACHE_DIR = os.path.join(CACHE_DIR, "categories")
+CATEGORY_CACHE_TTL_SECONDS = 24 * 3600
+CATEGORY_WORKERS = 4
+LLM_CACHE_DIR = os.path.join(CACHE_DIR, "llm")
+LLM_CACHE_MAX_AGE_SECONDS = 180 * 24 * 3600
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024
 SCHEMA_PATH = os.path.join("schemas", "dcc-record.schema.json")
 CATEGORY_ROOT = "Items"
 RATE_LIMIT_SECONDS = 0.7
+# Ask the wiki to refuse requests while replicas lag more than this (seconds).
+MAXLAG_SECONDS = 5
+HTTP_MAX_ATTEMPTS = 5
+HTTP_POOL_SIZE = 8
+# MediaWiki caps multi-title queries at 50 titles for regular (non-bot) clients.
+MAX_TITLES_PER_REQUEST = 50
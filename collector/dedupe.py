@@ -0,0 +1,90 @@
+import os
+import threading
+from typing import Callable, Dict, List
+
+import orjson
+
+from collector.config import ALIASES_PATH
+from collector.utils import write_json_atomic
+
+
+class DuplicateGroups:
+    """Titles whose fetched wikitext is identical, grouped by content hash.
+
+    Redirects are already resolved at fetch time, so a redirect, an alias
+    page and its target all hash alike. The first title seen with a body
+    (in this run, or with a record on disk from an earlier run) is the
+    canonical one and is extracted; the others are recorded as its aliases.
+    The ``{alias: canonical}`` index persists in ``ALIASES_PATH``.
+    """
+
+    def __init__(self, path: str = ALIASES_PATH) -> None:
+        self.path = path
+        self._index: Dict[str, str] | None = None
+        self.groups: Dict[str, List[str]] = {}
+        self.departed: Dict[str, str] = {}
+        self._known: Dict[str, str] = {}
+        self._has_record: Callable[[str], bool] = lambda title: False
+        self._lock = threading.Lock()
+
+    def use(self, path: str) -> None:
+        """Keep the alias index at ``path`` from now on (sharded runs stage their own)."""
+        with self._lock:
+            self.path = path
+            self._index = None
+
+    @property
+    def index(self) -> Dict[str, str]:
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as handle:
+                    self._index = orjson.loads(handle.read())
+        return self._index
+
+    def canonical(self, title: str) -> str:
+        return self.index.get(title, title)
+
+    def seed(self, manifest: Dict[str, Dict], has_record: Callable[[str], bool]) -> None:
+        """Start a run: bodies already extracted under a stored title claim their duplicates."""
+        with self._lock:
+            self.groups = {}
+            self.departed = {}
+            self._has_record = has_record
+            self._known = {
+                entry["hash"]: title
+                for title, entry in manifest.items()
+                if entry.get("hash") and title not in self.index
+            }
+
+    def assign(self, title: str, digest: str | None) -> str | None:
+        """Claim ``digest`` for ``title``, or return the canonical title that already has it."""
+        if not digest:
+            return None
+        with self._lock:
+            group = self.groups.get(digest)
+            if group is None:
+                known = self._known.get(digest)
+                if known and known != title and self._has_record(known):
+                    group = self.groups[digest] = [known]
+            if group is None:
+                self.groups[digest] = [title]
+                previous = self.index.pop(title, None)
+                if previous:
+                    self.departed[title] = previous
+                return None
+            if title == group[0]:
+                return None
+            if title not in group:
+                group.append(title)
+            return group[0]
+
+    def aliases(self) -> Dict[str, List[str]]:
+        """``{canonical: [aliases]}`` for every group found in this run."""
+        return {group[0]: group[1:] for group in self.groups.values() if len(group) > 1}
+
+    def save(self) -> None:
+        write_json_atomic(self.path, self.index)
+
+
+DUPLICATES = DuplicateGroups()
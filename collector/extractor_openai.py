@@ -1,43 +1,78 @@
 import datetime
 import json
 import re
-from typing import Any, Dict
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 from urllib.parse import quote, unquote
 
-from jsonschema import Draft202012Validator, ValidationError
-from openai import OpenAI
-
 from collector.config import (
+    LLM_MAX_ATTEMPTS,
     OPENAI_API_KEY,
     OPENAI_BASE_URL,
     OPENAI_MODEL,
-    SCHEMA_PATH,
+    TRIM_WIKITEXT,
 )
-from collector.mediawiki import fetch_image_info
+from collector.imagecache import IMAGE_INFO_CACHE
+from collector.llmcache import LLM_CACHE, CacheMiss, fingerprint
+from collector.llmlimit import COMPLETION_TOKEN_ESTIMATE, LLM_LIMITER, estimate_tokens
+from collector.repair import REPAIR_STATS, describe_errors, schema_fix
+from collector.schema import load_schema, schema_fingerprint, schema_validator
+from collector.trim import TRIM_STATS, TRIM_VERSION, trim_wikitext
+from collector.telemetry import TELEMETRY, completion_cost
+from collector.wikitext import parse, strip_wikitext
 
-if not OPENAI_API_KEY:
-    raise SystemExit("Missing OPENAI_API_KEY in environment")
+if TYPE_CHECKING:
+    from openai import APIStatusError, OpenAI
 
-client = (
-    OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    if OPENAI_BASE_URL
-    else OpenAI(api_key=OPENAI_API_KEY)
-)
-with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
-    SCHEMA = json.load(schema_file)
-VALIDATOR = Draft202012Validator(SCHEMA)
-TOP_LEVEL_KEYS = set(SCHEMA.get("properties", {}).keys())
-IMAGE_INFO_CACHE: Dict[str, Dict[str, Any]] = {}
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504, 529}
+_client: "OpenAI | None" = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client() -> "OpenAI":
+    """The shared OpenAI client, created on first use.
+
+    ``openai`` is imported here rather than at module load because it
+    dominates the import time of every command that never calls the API.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            if not OPENAI_API_KEY:
+                raise RuntimeError("Missing OPENAI_API_KEY in environment")
+            from openai import OpenAI
+
+            # Retries are handled in request_completion so the limiter sees every 429.
+            _client = (
+                OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0)
+                if OPENAI_BASE_URL
+                else OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+            )
+        return _client
 
 
 def normalize_kind_label(value: str) -> str:
     return re.sub(r"[^a-z0-9]+", "", value.lower())
 
 
-ALLOWED_KINDS = {
-    normalize_kind_label(value): value
-    for value in SCHEMA.get("properties", {}).get("kind", {}).get("enum", [])
-}
+@lru_cache(maxsize=None)
+def schema_tokens() -> int:
+    return estimate_tokens(json.dumps(load_schema()))
+
+
+@lru_cache(maxsize=None)
+def top_level_keys() -> frozenset[str]:
+    return frozenset(load_schema().get("properties", {}))
+
+
+@lru_cache(maxsize=None)
+def allowed_kinds() -> Dict[str, str]:
+    return {
+        normalize_kind_label(value): value
+        for value in load_schema().get("properties", {}).get("kind", {}).get("enum", [])
+    }
 KIND_ALIASES = {
     "item": "Item",
     "consumable": "Consumable",
@@ -135,6 +170,36 @@ Rules:
 - Set provenance.source_type='wiki'; extraction_method='llm'.
 - Fill metadata timestamps in ISO 8601 UTC; version='1.0.0'; license='TBD'."""
 
+REPAIR_SYSTEM = """You correct JSON records that failed schema validation.
+Rules:
+- Return the complete corrected record as JSON only.
+- Change only what is needed to fix the listed errors; keep every other value.
+- Do not invent facts; use null or empty arrays/objects when a value is unknown."""
+REPAIR_ATTEMPTS = 2
+# Bump when normalize_payload (or the rule-based path) would turn the same
+# model output into a different record, so stored records get renormalized.
+NORMALIZER_VERSION = "1"
+# Schema the cached completions of a renormalization were requested with
+# (see ``use_cache_schema``); ``None`` means the current schema.
+_cache_schema: Dict[str, Any] | None = None
+
+
+def canonical_kind(labels: list[str]) -> str | None:
+    """Map the first recognizable type label to a schema ``kind``."""
+    for label in labels:
+        norm = normalize_kind_label(label)
+        if not norm:
+            continue
+        kinds = allowed_kinds()
+        if norm in kinds:
+            return kinds[norm]
+        if norm in KIND_ALIASES:
+            alias_kind = KIND_ALIASES[norm]
+            kind = kinds.get(normalize_kind_label(alias_kind), alias_kind)
+            if kind:
+                return kind
+    return None
+
 
 def iso_now() -> str:
     return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
@@ -146,32 +211,19 @@ def slugify(value: str) -> str:
     return value[:120] or "item"
 
 
-def strip_wikitext(text: str) -> str:
-    cleaned = re.sub(r"<!--.*?-->", " ", text, flags=re.S)
-    cleaned = re.sub(r"<ref[^>]*>.*?</ref>", " ", cleaned, flags=re.S)
-    cleaned = re.sub(r"<[^>]+>", " ", cleaned)
-    cleaned = re.sub(r"\{\{[^{}]*\}\}", " ", cleaned)
-    cleaned = re.sub(r"\[\[(?:[^|\]]*\|)?([^\]]+)\]\]", r"\1", cleaned)
-    cleaned = re.sub(r"'{2,}", "", cleaned)
-    cleaned = re.sub(r"&nbsp;", " ", cleaned)
-    cleaned = re.sub(r"\s+", " ", cleaned)
-    return cleaned.strip()
-
-
 def extract_intro_description(wikitext: str) -> str | None:
-    lines = wikitext.splitlines()
+    doc = parse(wikitext)
     buffer: list[str] = []
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
+    for index in range(len(doc.sections[0].lines)):
+        if not doc.lines[index].strip():
             if buffer:
                 break
             continue
+        # Prose is the line without template calls, so infobox params never leak in.
+        stripped = doc.prose[index].strip()
         if stripped.startswith("=="):
             break
-        if stripped.startswith("{{"):
-            continue
-        if stripped.startswith("[[Category"):
+        if not stripped or stripped.startswith("[[Category"):
             continue
         buffer.append(stripped)
     if not buffer:
@@ -182,20 +234,17 @@ def extract_intro_description(wikitext: str) -> str | None:
 
 
 def extract_ai_description(wikitext: str) -> str | None:
-    match = re.search(r"==\s*AI Description\s*==(?P<body>.*?)(?:\n==|$)", wikitext, re.S | re.I)
-    if not match:
+    section = parse(wikitext).section("AI Description")
+    if section is None:
         return None
-    body = match.group("body")
-    body = re.sub(r"</?blockquote>", " ", body, flags=re.I)
-    result = strip_wikitext(body)
+    result = strip_wikitext("\n".join(section.lines))
     return result or None
 
 
 def extract_type_tokens(wikitext: str) -> list[str]:
-    match = re.search(r"^\|\s*type\s*=\s*(?P<value>.+)$", wikitext, re.M | re.I)
-    if not match:
+    raw_value = (parse(wikitext).param("type") or "").split("\n", 1)[0]
+    if not raw_value:
         return []
-    raw_value = match.group("value")
     parts = re.split(r"[,/]", raw_value)
     tokens = []
     for part in parts:
@@ -221,15 +270,29 @@ def ensure_image_url(src: str) -> str:
     return f"https://dungeon-crawler-carl.fandom.com/wiki/File:{safe_filename}"
 
 
-def resolve_image_entry(src: str, fallback_files: list[str] | None = None) -> Dict[str, Any]:
-    if not src:
-        return {"src": src}
-    candidate = src.strip()
+def _image_entry(info: Dict[str, Any], candidate: str) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"src": info.get("url") or candidate}
+    if info.get("mime"):
+        result.setdefault("mime", info.get("mime"))
+    if info.get("width"):
+        result.setdefault("width", info.get("width"))
+    if info.get("height"):
+        result.setdefault("height", info.get("height"))
+    if info.get("sha1"):
+        result.setdefault("hash_sha1", info.get("sha1"))
+    return result
+
+
+def image_file_name(src: str) -> str | None:
+    """Return the wiki file name an image ``src`` refers to, if it still needs resolving."""
+    candidate = (src or "").strip()
+    if not candidate:
+        return None
     file_fragment = None
     if candidate.startswith("http"):
         if "static.wikia" in candidate:
             if "/revision/" in candidate:
-                return {"src": candidate}
+                return None
             file_fragment = candidate.split("/")[-1].split("?", 1)[0]
         else:
             parts = candidate.split("/File:", 1)
@@ -237,56 +300,52 @@ def resolve_image_entry(src: str, fallback_files: list[str] | None = None) -> Di
                 file_fragment = parts[1]
     else:
         file_fragment = candidate
+    if not file_fragment:
+        return None
+    return unquote(file_fragment).split("?", 1)[0]
+
+
+def resolve_image_entry(src: str, fallback_files: list[str] | None = None) -> Dict[str, Any]:
+    if not src:
+        return {"src": src}
+    candidate = src.strip()
+    if "static.wikia" in candidate and "/revision/" in candidate:
+        return {"src": candidate}
+    file_fragment = image_file_name(candidate)
     if not file_fragment and fallback_files:
+        infos = IMAGE_INFO_CACHE.lookup(fallback_files)
         for item in fallback_files:
-            info = resolve_image_entry(f"File:{item}", None)
-            if info.get("src") and info["src"].startswith("http"):
-                return info
+            info = infos.get(item) or {}
+            if isinstance(info.get("url"), str) and info["url"].startswith("http"):
+                return _image_entry(info, f"File:{item}")
         return {"src": candidate}
     if not file_fragment:
         return {"src": candidate}
-    file_fragment = unquote(file_fragment)
-    file_fragment = file_fragment.split("?", 1)[0]
-    key = file_fragment.lower()
-    info = IMAGE_INFO_CACHE.get(key)
-    if info is None:
-        info = fetch_image_info(file_fragment)
-        IMAGE_INFO_CACHE[key] = info or {}
+    info = IMAGE_INFO_CACHE.get(file_fragment)
     if not info:
         return {"src": candidate}
-    result: Dict[str, Any] = {"src": info.get("url") or candidate}
-    if info.get("mime"):
-        result.setdefault("mime", info.get("mime"))
-    if info.get("width"):
-        result.setdefault("width", info.get("width"))
-    if info.get("height"):
-        result.setdefault("height", info.get("height"))
-    if info.get("sha1"):
-        result.setdefault("hash_sha1", info.get("sha1"))
-    return result
+    return _image_entry(info, candidate)
 
 
 def extract_file_titles(wikitext: str) -> list[str]:
     if not wikitext:
         return []
-    matches = re.findall(r'\[\[File:([^|\]]+)', wikitext, flags=re.I)
-    matches += re.findall(r'\|image\d*\s*=\s*([^|\n]+)', wikitext, flags=re.I)
-    return [match.strip() for match in matches if match.strip()]
+    return list(parse(wikitext).files)
 
 
 def normalize_effect_name(value: str) -> str:
     return strip_wikitext(value or "").strip().lower()
 
 
+def extract_infobox_effects(wikitext: str) -> str | None:
+    """Return the raw value of the infobox ``effects`` field, if present."""
+    return parse(wikitext).param("effects")
+
+
 def extract_stat_bonuses_from_wikitext(wikitext: str) -> dict[str, float | int]:
-    match = re.search(
-        r"\|\s*effects\s*=\s*(?P<body>.*?)(?:\n\|\s*\w+\s*=|\n\}\}|$)",
-        wikitext,
-        re.S | re.I,
-    )
-    if not match:
+    body = extract_infobox_effects(wikitext)
+    if body is None:
         return {}
-    body = match.group("body")
     body = body.split("'''UPGRADED'''")[0]
     bonuses: dict[str, float | int] = {}
     for line in body.splitlines():
@@ -314,20 +373,7 @@ def extract_stat_bonuses_from_wikitext(wikitext: str) -> dict[str, float | int]:
 
 def extract_effect_details_from_wikitext(wikitext: str) -> dict[str, dict]:
     details: dict[str, dict] = {}
-    for raw_line in wikitext.splitlines():
-        line = raw_line.strip()
-        match = re.match(r"'''([^:]+):'''(.*)", line)
-        if not match:
-            if not line.startswith("*"):
-                continue
-            bullet = strip_wikitext(line.lstrip("* ").strip())
-            if not bullet:
-                continue
-            name = bullet
-            body = bullet
-        else:
-            name = strip_wikitext(match.group(1)).strip()
-            body = strip_wikitext(match.group(2)).strip()
+    for name, body in parse(wikitext).entries:
         if not name or not body:
             continue
         key = normalize_effect_name(name)
@@ -385,532 +431,806 @@ def extract_effect_details_from_wikitext(wikitext: str) -> dict[str, dict]:
     return details
 
 
-def extract_record(page_title: str, page_url: str, page_text: str) -> Dict[str, Any]:
-    file_candidates = extract_file_titles(page_text)
-    last_error: ValidationError | None = None
-    for _ in range(3):
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM},
-                {
-                    "role": "user",
-                    "content": (
-                        "Extract the structured record for the following page. "
-                        "Return only JSON that conforms to the agreed schema.\n"
-                        f"TITLE: {page_title}\n"
-                        f"URL: {page_url}\n"
-                        "WIKITEXT:\n"
-                        f"{page_text}"
-                    ),
-                },
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": {"name": "dcc_record", "schema": SCHEMA, "strict": False},
-            },
-        )
-        payload = json.loads(response.choices[0].message.content)
-        if "id" not in payload and isinstance(payload.get("properties"), dict):
-            schema_props = payload.pop("properties")
-            if isinstance(schema_props, dict):
-                for key, value in schema_props.items():
-                    if key in TOP_LEVEL_KEYS and key not in payload:
-                        payload[key] = value
-        payload.pop("type", None)
-        payload = {
-            key: value for key, value in payload.items() if key in TOP_LEVEL_KEYS
-        }
-        now = iso_now()
-        payload.setdefault("series", "Dungeon Crawler Carl")
-        provenance_raw = payload.get("provenance") or {}
-        provenance = {
-            key: provenance_raw.get(key) for key in PROVENANCE_KEYS if key in provenance_raw
+def _quantified_effects(wikitext: str) -> set[str]:
+    return {
+        name
+        for name, detail in extract_effect_details_from_wikitext(wikitext).items()
+        if detail["chance"] is not None or detail["modifiers"]
+    }
+
+
+TRIM_CHECKS = {
+    "intro": extract_intro_description,
+    "ai_description": extract_ai_description,
+    "type": extract_type_tokens,
+    "stat_bonuses": extract_stat_bonuses_from_wikitext,
+    "effect_details": _quantified_effects,
+}
+
+
+def trim_changes(page_text: str, trimmed: str) -> list[str]:
+    """Names of the deterministic parsers whose output differs on the trimmed text."""
+    changed = [name for name, parse in TRIM_CHECKS.items() if parse(page_text) != parse(trimmed)]
+    files = extract_file_titles(page_text)
+    if files and files[0] not in extract_file_titles(trimmed):
+        changed.append("image")
+    return changed
+
+
+def trim_prompt(page_text: str, trim: bool = TRIM_WIKITEXT) -> Tuple[str, bool]:
+    """Wikitext to send to the model, and whether trimming fell back to the full page.
+
+    The page is trimmed unless that would alter a parsed field.
+    """
+    if not trim:
+        return page_text, False
+    trimmed = trim_wikitext(page_text)
+    if trim_changes(page_text, trimmed):
+        return page_text, True
+    return trimmed, False
+
+
+def extraction_text(page_title: str, page_text: str, trim: bool = TRIM_WIKITEXT) -> str:
+    """``trim_prompt`` for a page being extracted, counted once in ``TRIM_STATS``."""
+    text, fallback = trim_prompt(page_text, trim)
+    if trim:
+        TRIM_STATS.record(page_title, page_text, text, fallback)
+    return text
+
+
+def build_user_message(page_title: str, page_url: str, page_text: str) -> str:
+    return (
+        "Extract the structured record for the following page. "
+        "Return only JSON that conforms to the agreed schema.\n"
+        f"TITLE: {page_title}\n"
+        f"URL: {page_url}\n"
+        "WIKITEXT:\n"
+        f"{page_text}"
+    )
+
+
+def build_request_body(
+    user_content: str, model: str = OPENAI_MODEL, system: str = SYSTEM
+) -> Dict[str, Any]:
+    """Chat completion parameters for one page, shared by direct and batch requests."""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user_content},
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "dcc_record", "schema": load_schema(), "strict": False},
+        },
+    }
+
+
+def use_cache_schema(schema: Dict[str, Any] | None) -> None:
+    """Look completions up under an older ``schema`` until reset with ``None``.
+
+    Lets ``--cache-only`` runs renormalize records whose cached model output
+    was requested before an unrelated part of the schema changed.
+    """
+    global _cache_schema
+    _cache_schema = schema
+
+
+def completion_cache_key(
+    user_content: str, model: str = OPENAI_MODEL, system: str = SYSTEM
+) -> str:
+    return LLM_CACHE.key(model, system, _cache_schema or load_schema(), user_content)
+
+
+def prompt_fingerprint() -> str:
+    """Hash of everything besides the page that shapes the model's input.
+
+    Covers the system and repair prompts, the page and repair message
+    templates, and the trimming applied to the wikitext.
+    """
+    return fingerprint(
+        {
+            "system": SYSTEM,
+            "repair_system": REPAIR_SYSTEM,
+            "user": build_user_message("{title}", "{url}", "{wikitext}"),
+            "repair": build_repair_message({}, []),
+            "trim": TRIM_VERSION if TRIM_WIKITEXT else None,
         }
-        provenance.setdefault("source_type", "wiki")
-        provenance.setdefault("source_ref", page_url)
-        provenance.setdefault("extraction_method", "llm")
-        confidence = provenance.get("confidence")
-        if isinstance(confidence, (int, float)):
-            provenance["confidence"] = max(0.0, min(1.0, float(confidence)))
-        else:
-            provenance["confidence"] = 0.7
-        payload["provenance"] = provenance
-
-        metadata_raw = payload.get("metadata") or {}
-        metadata = {key: metadata_raw.get(key) for key in METADATA_KEYS if key in metadata_raw}
-        metadata.setdefault("created_at", now)
-        metadata.setdefault("updated_at", now)
-        metadata.setdefault("version", "1.0.0")
-        metadata.setdefault("license", "TBD")
-        payload["metadata"] = metadata
-
-        payload.pop("$id", None)
-        payload.pop("title", None)
-
-        type_tokens = extract_type_tokens(page_text)
-        if type_tokens:
-            payload["kind_detail"] = type_tokens
-        elif isinstance(payload.get("kind_detail"), list):
-            cleaned_detail = [
-                strip_wikitext(str(item)).strip()
-                for item in payload["kind_detail"]
-                if isinstance(item, str)
-            ]
-            payload["kind_detail"] = [item for item in cleaned_detail if item]
-        else:
-            payload["kind_detail"] = []
-
-        description_value = payload.get("description")
-        if isinstance(description_value, str):
-            description_value = description_value.strip()
-        payload["description"] = description_value or extract_intro_description(page_text)
-
-        ai_value = payload.get("ai_description")
-        if isinstance(ai_value, str):
-            ai_value = ai_value.strip()
-        payload["ai_description"] = ai_value or extract_ai_description(page_text)
-
-        for key in ("aliases", "activation", "enchantments", "images", "effects", "tags", "kind_detail"):
-            if not isinstance(payload.get(key), list):
-                payload[key] = []
-        if payload["kind_detail"]:
-            seen_tokens: set[str] = set()
-            deduped_tokens: list[str] = []
-            for token in payload["kind_detail"]:
-                if not isinstance(token, str):
-                    continue
-                token = token.strip()
-                if not token:
-                    continue
-                if token not in seen_tokens:
-                    seen_tokens.add(token)
-                    deduped_tokens.append(token)
-            payload["kind_detail"] = deduped_tokens
-        if payload.get("rules_text") is not None and not isinstance(payload["rules_text"], str):
-            payload["rules_text"] = None
-
-        name_value = payload.get("name")
-        if not isinstance(name_value, str) or not name_value.strip():
-            name_value = page_title
-        payload["name"] = name_value
-        raw_id = payload.get("id") if isinstance(payload.get("id"), str) else ""
-        payload["id"] = slugify(raw_id or name_value)
-        candidate_labels = []
-        if payload["kind_detail"]:
-            candidate_labels.extend(payload["kind_detail"])
-        if isinstance(payload.get("kind"), str):
-            candidate_labels.append(payload["kind"])
-        candidate_labels.extend(
-            tag for tag in payload.get("tags", []) if isinstance(tag, str)
+    )[:16]
+
+
+def record_fingerprint(model: str = OPENAI_MODEL) -> Dict[str, str]:
+    """What produced a record: model, prompts, schema and normalizer version.
+
+    ``schema`` is the schema the record was validated against and
+    ``prompt_schema`` the one its completion was requested with; they differ
+    only for records renormalized from an older cached completion.
+    """
+    schema = schema_fingerprint()
+    return {
+        "model": model,
+        "prompt": prompt_fingerprint(),
+        "schema": schema,
+        "prompt_schema": schema_fingerprint(_cache_schema) if _cache_schema else schema,
+        "normalizer": NORMALIZER_VERSION,
+    }
+
+
+def stamp_record(record: Dict[str, Any], model: str = OPENAI_MODEL) -> Dict[str, Any]:
+    """Set ``provenance.fingerprint`` on a validated record.
+
+    Done after validation and repair so the fingerprint never enters a
+    repair request, whose cache key must survive a schema or normalizer change.
+    """
+    record["provenance"]["fingerprint"] = record_fingerprint(model)
+    return record
+
+
+def extraction_fingerprint(stamp: Dict[str, str]) -> str:
+    """Short hash of a record's ``provenance.fingerprint``, kept in the crawl state."""
+    return fingerprint(stamp)[:16]
+
+
+def _retry_after(err: "APIStatusError") -> float:
+    try:
+        return float(err.response.headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def request_completion(
+    user_content: str, model: str = OPENAI_MODEL, system: str = SYSTEM
+) -> Dict[str, Any]:
+    """Run one extraction request and return the raw model output plus usage.
+
+    Requests go through ``LLM_LIMITER``. A 429, 5xx or connection failure
+    shrinks the in-flight window and is retried with exponential backoff (or
+    the server's ``Retry-After``) up to ``LLM_MAX_ATTEMPTS`` times.
+    """
+    from openai import APIConnectionError, APIStatusError
+
+    client = get_openai_client()
+    reserved = schema_tokens() + estimate_tokens(system) + estimate_tokens(user_content)
+    reserved += COMPLETION_TOKEN_ESTIMATE
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        waited = time.monotonic()
+        ticket = LLM_LIMITER.acquire(reserved)
+        started = time.monotonic()
+        TELEMETRY.add(llm_wait_seconds=started - waited, llm_retries=1 if attempt else 0)
+        try:
+            response = client.chat.completions.create(
+                **build_request_body(user_content, model, system)
+            )
+        except (APIStatusError, APIConnectionError) as err:
+            status = getattr(err, "status_code", None)
+            if status is not None and status not in OVERLOAD_STATUSES:
+                LLM_LIMITER.release(ticket)
+                raise
+            retry_after = _retry_after(err) if status is not None else 0.0
+            LLM_LIMITER.overloaded(ticket, retry_after)
+            if attempt == LLM_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(max(retry_after, min(60.0, 2.0 ** attempt)))
+            continue
+        except BaseException:
+            LLM_LIMITER.release(ticket)
+            raise
+        latency = time.monotonic() - started
+        usage = response.usage.model_dump() if getattr(response, "usage", None) else None
+        LLM_LIMITER.release(ticket, latency, (usage or {}).get("total_tokens"))
+        break
+    if TELEMETRY.enabled and usage:
+        TELEMETRY.add(
+            llm_calls=1,
+            llm_seconds=latency,
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+            cost_usd=completion_cost(model, usage),
         )
-        canonical_kind = "Other"
-        for label in candidate_labels:
-            norm = normalize_kind_label(label)
-            if not norm:
-                continue
-            if norm in ALLOWED_KINDS:
-                canonical_kind = ALLOWED_KINDS[norm]
-                break
-            if norm in KIND_ALIASES:
-                alias_kind = KIND_ALIASES[norm]
-                alias_norm = normalize_kind_label(alias_kind)
-                canonical_kind = ALLOWED_KINDS.get(alias_norm, alias_kind)
-                if canonical_kind:
-                    break
-        payload["kind"] = canonical_kind
-        series_value = payload.get("series")
-        if not isinstance(series_value, str) or not series_value.strip():
-            series_value = "Dungeon Crawler Carl"
-        payload["series"] = series_value
-
-        form = payload.get("form")
-        if isinstance(form, dict) and "conjured" in form:
-            conjured = form.get("conjured")
-            if isinstance(conjured, str):
-                form["conjured"] = conjured.strip().lower() in {"true", "yes", "1"}
-            elif isinstance(conjured, (int, float)):
-                form["conjured"] = bool(conjured)
-            elif conjured is None:
-                form["conjured"] = False
-
-        allowed_image_types = {"icon", "portrait", "token", "tile", "splash", "other"}
-        cleaned_images = []
-        for raw_image in payload.get("images") or []:
-            if not isinstance(raw_image, dict):
+    return {
+        "model": model,
+        "content": response.choices[0].message.content,
+        "usage": usage,
+        "latency": round(latency, 3),
+    }
+
+
+def normalize_payload(
+    payload: Dict[str, Any],
+    page_title: str,
+    page_url: str,
+    page_text: str,
+    file_candidates: list[str] | None = None,
+) -> Dict[str, Any]:
+    """Coerce raw model output into a record shaped like the schema."""
+    if file_candidates is None:
+        file_candidates = extract_file_titles(page_text)
+    if "id" not in payload and isinstance(payload.get("properties"), dict):
+        schema_props = payload.pop("properties")
+        if isinstance(schema_props, dict):
+            for key, value in schema_props.items():
+                if key in top_level_keys() and key not in payload:
+                    payload[key] = value
+    payload.pop("type", None)
+    payload = {
+        key: value for key, value in payload.items() if key in top_level_keys()
+    }
+    now = iso_now()
+    payload.setdefault("series", "Dungeon Crawler Carl")
+    provenance_raw = payload.get("provenance") or {}
+    provenance = {
+        key: provenance_raw.get(key) for key in PROVENANCE_KEYS if key in provenance_raw
+    }
+    provenance.setdefault("source_type", "wiki")
+    provenance.setdefault("source_ref", page_url)
+    provenance.setdefault("extraction_method", "llm")
+    confidence = provenance.get("confidence")
+    if isinstance(confidence, (int, float)):
+        provenance["confidence"] = max(0.0, min(1.0, float(confidence)))
+    else:
+        provenance["confidence"] = 0.7
+    payload["provenance"] = provenance
+
+    metadata_raw = payload.get("metadata") or {}
+    metadata = {key: metadata_raw.get(key) for key in METADATA_KEYS if key in metadata_raw}
+    metadata.setdefault("created_at", now)
+    metadata.setdefault("updated_at", now)
+    metadata.setdefault("version", "1.0.0")
+    metadata.setdefault("license", "TBD")
+    payload["metadata"] = metadata
+
+    payload.pop("$id", None)
+    payload.pop("title", None)
+
+    type_tokens = extract_type_tokens(page_text)
+    if type_tokens:
+        payload["kind_detail"] = type_tokens
+    elif isinstance(payload.get("kind_detail"), list):
+        cleaned_detail = [
+            strip_wikitext(str(item)).strip()
+            for item in payload["kind_detail"]
+            if isinstance(item, str)
+        ]
+        payload["kind_detail"] = [item for item in cleaned_detail if item]
+    else:
+        payload["kind_detail"] = []
+
+    description_value = payload.get("description")
+    if isinstance(description_value, str):
+        description_value = description_value.strip()
+    payload["description"] = description_value or extract_intro_description(page_text)
+
+    ai_value = payload.get("ai_description")
+    if isinstance(ai_value, str):
+        ai_value = ai_value.strip()
+    payload["ai_description"] = ai_value or extract_ai_description(page_text)
+
+    for key in ("aliases", "activation", "enchantments", "images", "effects", "tags", "kind_detail"):
+        if not isinstance(payload.get(key), list):
+            payload[key] = []
+    if payload["kind_detail"]:
+        seen_tokens: set[str] = set()
+        deduped_tokens: list[str] = []
+        for token in payload["kind_detail"]:
+            if not isinstance(token, str):
                 continue
-            image = {key: raw_image.get(key) for key in IMAGE_KEYS if key in raw_image}
-            if image.get("type") not in allowed_image_types:
-                image["type"] = "other"
-            src_value = image.get("src")
-            if not isinstance(src_value, str) or not src_value.strip():
+            token = token.strip()
+            if not token:
                 continue
-            image["src"] = ensure_image_url(src_value)
-            resolved_info = resolve_image_entry(image["src"], file_candidates)
-            image["src"] = resolved_info.get("src", image["src"])
-            if resolved_info.get("mime") and not image.get("mime"):
-                image["mime"] = resolved_info.get("mime")
-            if resolved_info.get("width") and not image.get("width"):
-                image["width"] = resolved_info.get("width")
-            if resolved_info.get("height") and not image.get("height"):
-                image["height"] = resolved_info.get("height")
-            srcset = []
-            for entry in image.get("srcset") or []:
-                if isinstance(entry, dict):
-                    cleaned_entry = {
-                        key: entry.get(key) for key in SRCSET_KEYS if key in entry
-                    }
-                    if "src" in cleaned_entry and isinstance(cleaned_entry["src"], str):
-                        cleaned_entry["src"] = ensure_image_url(cleaned_entry["src"])
-                        resolved_entry = resolve_image_entry(cleaned_entry["src"], file_candidates)
-                        cleaned_entry["src"] = resolved_entry.get("src", cleaned_entry["src"])
-                    srcset.append(cleaned_entry)
-            image["srcset"] = srcset
-            focal_point = image.get("focal_point")
-            if isinstance(focal_point, dict):
-                focal_point = {
-                    key: focal_point.get(key) for key in FOCAL_KEYS if key in focal_point
-                }
-            else:
-                focal_point = None
-            image["focal_point"] = focal_point or None
-            attribution = image.get("attribution")
-            if isinstance(attribution, dict):
-                attribution = {
-                    key: attribution.get(key) for key in ATTR_KEYS if key in attribution
+            if token not in seen_tokens:
+                seen_tokens.add(token)
+                deduped_tokens.append(token)
+        payload["kind_detail"] = deduped_tokens
+    if payload.get("rules_text") is not None and not isinstance(payload["rules_text"], str):
+        payload["rules_text"] = None
+
+    name_value = payload.get("name")
+    if not isinstance(name_value, str) or not name_value.strip():
+        name_value = page_title
+    payload["name"] = name_value
+    raw_id = payload.get("id") if isinstance(payload.get("id"), str) else ""
+    payload["id"] = slugify(raw_id or name_value)
+    candidate_labels = []
+    if payload["kind_detail"]:
+        candidate_labels.extend(payload["kind_detail"])
+    if isinstance(payload.get("kind"), str):
+        candidate_labels.append(payload["kind"])
+    candidate_labels.extend(
+        tag for tag in payload.get("tags", []) if isinstance(tag, str)
+    )
+    payload["kind"] = canonical_kind(candidate_labels) or "Other"
+    series_value = payload.get("series")
+    if not isinstance(series_value, str) or not series_value.strip():
+        series_value = "Dungeon Crawler Carl"
+    payload["series"] = series_value
+
+    form = payload.get("form")
+    if isinstance(form, dict) and "conjured" in form:
+        conjured = form.get("conjured")
+        if isinstance(conjured, str):
+            form["conjured"] = conjured.strip().lower() in {"true", "yes", "1"}
+        elif isinstance(conjured, (int, float)):
+            form["conjured"] = bool(conjured)
+        elif conjured is None:
+            form["conjured"] = False
+
+    allowed_image_types = {"icon", "portrait", "token", "tile", "splash", "other"}
+    cleaned_images = []
+    for raw_image in payload.get("images") or []:
+        if not isinstance(raw_image, dict):
+            continue
+        image = {key: raw_image.get(key) for key in IMAGE_KEYS if key in raw_image}
+        if image.get("type") not in allowed_image_types:
+            image["type"] = "other"
+        src_value = image.get("src")
+        if not isinstance(src_value, str) or not src_value.strip():
+            continue
+        image["src"] = ensure_image_url(src_value)
+        resolved_info = resolve_image_entry(image["src"], file_candidates)
+        image["src"] = resolved_info.get("src", image["src"])
+        if resolved_info.get("mime") and not image.get("mime"):
+            image["mime"] = resolved_info.get("mime")
+        if resolved_info.get("width") and not image.get("width"):
+            image["width"] = resolved_info.get("width")
+        if resolved_info.get("height") and not image.get("height"):
+            image["height"] = resolved_info.get("height")
+        srcset = []
+        for entry in image.get("srcset") or []:
+            if isinstance(entry, dict):
+                cleaned_entry = {
+                    key: entry.get(key) for key in SRCSET_KEYS if key in entry
                 }
+                if "src" in cleaned_entry and isinstance(cleaned_entry["src"], str):
+                    cleaned_entry["src"] = ensure_image_url(cleaned_entry["src"])
+                    resolved_entry = resolve_image_entry(cleaned_entry["src"], file_candidates)
+                    cleaned_entry["src"] = resolved_entry.get("src", cleaned_entry["src"])
+                srcset.append(cleaned_entry)
+        image["srcset"] = srcset
+        focal_point = image.get("focal_point")
+        if isinstance(focal_point, dict):
+            focal_point = {
+                key: focal_point.get(key) for key in FOCAL_KEYS if key in focal_point
+            }
+        else:
+            focal_point = None
+        image["focal_point"] = focal_point or None
+        attribution = image.get("attribution")
+        if isinstance(attribution, dict):
+            attribution = {
+                key: attribution.get(key) for key in ATTR_KEYS if key in attribution
+            }
+        else:
+            attribution = None
+        image["attribution"] = attribution or None
+        foundry = image.get("foundry")
+        if isinstance(foundry, dict):
+            foundry = {
+                key: foundry.get(key) for key in FOUNDRY_KEYS if key in foundry
+            }
+        else:
+            foundry = None
+        image["foundry"] = foundry or None
+        cleaned_images.append(image)
+    payload["images"] = cleaned_images
+
+    stat_bonus_lookup: dict[str, float | int] = {}
+    for enchantment in payload.get("enchantments") or []:
+        if not isinstance(enchantment, dict):
+            continue
+        enchant_name = enchantment.get("name")
+        if not isinstance(enchant_name, str):
+            continue
+        params = enchantment.get("parameters") or {}
+        if not isinstance(params, dict):
+            continue
+        raw_bonus = None
+        for key in ("bonus", "value", "amount", "modifier"):
+            if key in params:
+                raw_bonus = params[key]
+                break
+        if raw_bonus is None:
+            continue
+        try:
+            if isinstance(raw_bonus, str):
+                match_bonus = re.search(r"-?\d+(?:\.\d+)?", raw_bonus)
+                if not match_bonus:
+                    continue
+                bonus_value = float(match_bonus.group(0))
             else:
-                attribution = None
-            image["attribution"] = attribution or None
-            foundry = image.get("foundry")
-            if isinstance(foundry, dict):
-                foundry = {
-                    key: foundry.get(key) for key in FOUNDRY_KEYS if key in foundry
+                bonus_value = float(raw_bonus)
+        except (TypeError, ValueError):
+            continue
+        stat_key = STAT_ALIASES.get(enchant_name.lower()) or STAT_ALIASES.get(
+            enchant_name.lower().rstrip("s")
+        )
+        if not stat_key or stat_key in stat_bonus_lookup:
+            continue
+        if bonus_value.is_integer():
+            stat_bonus_lookup[stat_key] = int(bonus_value)
+        else:
+            stat_bonus_lookup[stat_key] = bonus_value
+
+    for stat_key, bonus_value in extract_stat_bonuses_from_wikitext(page_text).items():
+        stat_bonus_lookup.setdefault(stat_key, bonus_value)
+
+    effect_detail_lookup = extract_effect_details_from_wikitext(page_text)
+
+    effects = []
+    stats_present: set[str] = set()
+    for raw_effect in payload.get("effects") or []:
+        if not isinstance(raw_effect, dict):
+            continue
+        effect = {
+            key: raw_effect.get(key) for key in EFFECT_KEYS if key in raw_effect
+        }
+        trigger = effect.get("trigger")
+        if not isinstance(trigger, dict):
+            trigger = {}
+        trigger = {
+            key: trigger.get(key) for key in TRIGGER_KEYS if key in trigger
+        }
+        conditions = trigger.get("conditions") or []
+        cleaned_conditions = []
+        for condition in conditions:
+            if isinstance(condition, dict):
+                cleaned = {
+                    key: condition.get(key)
+                    for key in CONDITION_KEYS
+                    if key in condition
                 }
-            else:
-                foundry = None
-            image["foundry"] = foundry or None
-            cleaned_images.append(image)
-        payload["images"] = cleaned_images
-
-        stat_bonus_lookup: dict[str, float | int] = {}
-        for enchantment in payload.get("enchantments") or []:
-            if not isinstance(enchantment, dict):
-                continue
-            enchant_name = enchantment.get("name")
-            if not isinstance(enchant_name, str):
-                continue
-            params = enchantment.get("parameters") or {}
-            if not isinstance(params, dict):
-                continue
-            raw_bonus = None
-            for key in ("bonus", "value", "amount", "modifier"):
-                if key in params:
-                    raw_bonus = params[key]
-                    break
-            if raw_bonus is None:
-                continue
-            try:
-                if isinstance(raw_bonus, str):
-                    match_bonus = re.search(r"-?\d+(?:\.\d+)?", raw_bonus)
-                    if not match_bonus:
-                        continue
-                    bonus_value = float(match_bonus.group(0))
-                else:
-                    bonus_value = float(raw_bonus)
-            except (TypeError, ValueError):
-                continue
-            stat_key = STAT_ALIASES.get(enchant_name.lower()) or STAT_ALIASES.get(
-                enchant_name.lower().rstrip("s")
-            )
-            if not stat_key or stat_key in stat_bonus_lookup:
-                continue
-            if bonus_value.is_integer():
-                stat_bonus_lookup[stat_key] = int(bonus_value)
-            else:
-                stat_bonus_lookup[stat_key] = bonus_value
+                cleaned_conditions.append(cleaned)
+        trigger["conditions"] = cleaned_conditions
+        event = trigger.get("event")
+        if not isinstance(event, str) or not event.strip():
+            trigger["event"] = "unspecified"
+        effect["trigger"] = trigger
 
-        for stat_key, bonus_value in extract_stat_bonuses_from_wikitext(page_text).items():
-            stat_bonus_lookup.setdefault(stat_key, bonus_value)
+        modifiers = []
+        for modifier in raw_effect.get("modifiers") or []:
+            if isinstance(modifier, dict):
+                cleaned_modifier = {
+                    key: modifier.get(key)
+                    for key in MODIFIER_KEYS
+                    if key in modifier
+                }
+                if cleaned_modifier:
+                    stat_label = cleaned_modifier.get("stat")
+                    if isinstance(stat_label, str):
+                        normalized_stat = STAT_ALIASES.get(stat_label.lower()) or STAT_ALIASES.get(
+                            stat_label.lower().rstrip("s")
+                        )
+                        if normalized_stat:
+                            cleaned_modifier["stat"] = normalized_stat
+                    value_label = cleaned_modifier.get("value")
+                    if isinstance(value_label, str):
+                        value_match = re.search(r"-?\d+(?:\.\d+)?", value_label)
+                        if value_match:
+                            numeric_value = float(value_match.group(0))
+                            if numeric_value.is_integer():
+                                cleaned_modifier["value"] = int(numeric_value)
+                            else:
+                                cleaned_modifier["value"] = numeric_value
+                    modifiers.append(cleaned_modifier)
+        effect["modifiers"] = modifiers
 
-        effect_detail_lookup = extract_effect_details_from_wikitext(page_text)
+        targeting = effect.get("targeting")
+        if isinstance(targeting, dict):
+            effect["targeting"] = {
+                key: targeting.get(key) for key in ("requires_los", "max_targets", "target_filter") if key in targeting
+            }
 
-        effects = []
-        stats_present: set[str] = set()
-        for raw_effect in payload.get("effects") or []:
-            if not isinstance(raw_effect, dict):
-                continue
-            effect = {
-                key: raw_effect.get(key) for key in EFFECT_KEYS if key in raw_effect
+        save = effect.get("save")
+        if isinstance(save, dict):
+            effect["save"] = {
+                key: save.get(key) for key in ("ability", "dc", "on_success") if key in save
             }
-            trigger = effect.get("trigger")
-            if not isinstance(trigger, dict):
-                trigger = {}
-            trigger = {
-                key: trigger.get(key) for key in TRIGGER_KEYS if key in trigger
+
+        area = effect.get("area")
+        if isinstance(area, dict):
+            effect["area"] = {
+                key: area.get(key) for key in ("shape", "size", "origin") if key in area
             }
-            conditions = trigger.get("conditions") or []
-            cleaned_conditions = []
-            for condition in conditions:
-                if isinstance(condition, dict):
-                    cleaned = {
-                        key: condition.get(key)
-                        for key in CONDITION_KEYS
-                        if key in condition
-                    }
-                    cleaned_conditions.append(cleaned)
-            trigger["conditions"] = cleaned_conditions
-            event = trigger.get("event")
-            if not isinstance(event, str) or not event.strip():
-                trigger["event"] = "unspecified"
-            effect["trigger"] = trigger
-
-            modifiers = []
-            for modifier in raw_effect.get("modifiers") or []:
-                if isinstance(modifier, dict):
-                    cleaned_modifier = {
-                        key: modifier.get(key)
-                        for key in MODIFIER_KEYS
-                        if key in modifier
-                    }
-                    if cleaned_modifier:
-                        stat_label = cleaned_modifier.get("stat")
-                        if isinstance(stat_label, str):
-                            normalized_stat = STAT_ALIASES.get(stat_label.lower()) or STAT_ALIASES.get(
-                                stat_label.lower().rstrip("s")
-                            )
-                            if normalized_stat:
-                                cleaned_modifier["stat"] = normalized_stat
-                        value_label = cleaned_modifier.get("value")
-                        if isinstance(value_label, str):
-                            value_match = re.search(r"-?\d+(?:\.\d+)?", value_label)
-                            if value_match:
-                                numeric_value = float(value_match.group(0))
-                                if numeric_value.is_integer():
-                                    cleaned_modifier["value"] = int(numeric_value)
-                                else:
-                                    cleaned_modifier["value"] = numeric_value
-                        modifiers.append(cleaned_modifier)
-            effect["modifiers"] = modifiers
-
-            targeting = effect.get("targeting")
-            if isinstance(targeting, dict):
-                effect["targeting"] = {
-                    key: targeting.get(key) for key in ("requires_los", "max_targets", "target_filter") if key in targeting
-                }
 
-            save = effect.get("save")
-            if isinstance(save, dict):
-                effect["save"] = {
-                    key: save.get(key) for key in ("ability", "dc", "on_success") if key in save
-                }
+        chance_value = effect.get("chance")
+        parsed_chance: float | None = None
+        if isinstance(chance_value, (int, float)):
+            parsed_chance = float(chance_value)
+        elif isinstance(chance_value, str):
+            match = re.search(r"(\d+(?:\.\d+)?)", chance_value)
+            if match:
+                parsed_chance = float(match.group(1))
+            if parsed_chance is not None and "%" in chance_value:
+                parsed_chance /= 100.0
+        if parsed_chance is not None:
+            if parsed_chance > 1 and parsed_chance <= 100:
+                parsed_chance /= 100.0
+            effect["chance"] = max(0.0, min(1.0, parsed_chance))
+        else:
+            effect["chance"] = None
 
-            area = effect.get("area")
-            if isinstance(area, dict):
-                effect["area"] = {
-                    key: area.get(key) for key in ("shape", "size", "origin") if key in area
-                }
+        outcomes = []
+        for outcome in raw_effect.get("outcomes") or []:
+            if not isinstance(outcome, dict):
+                continue
+            cleaned_outcome = {
+                key: outcome.get(key)
+                for key in OUTCOME_KEYS
+                if key in outcome
+            }
+            actions = []
+            for action in outcome.get("effects") or []:
+                if isinstance(action, dict):
+                    cleaned_action = {
+                        key: action.get(key)
+                        for key in ACTION_KEYS
+                        if key in action
+                    }
+                    if cleaned_action:
+                        actions.append(cleaned_action)
+            cleaned_outcome["effects"] = actions
+            if "result" in cleaned_outcome and isinstance(cleaned_outcome["result"], str):
+                outcomes.append(cleaned_outcome)
+        effect["outcomes"] = outcomes
 
-            chance_value = effect.get("chance")
-            parsed_chance: float | None = None
-            if isinstance(chance_value, (int, float)):
-                parsed_chance = float(chance_value)
-            elif isinstance(chance_value, str):
-                match = re.search(r"(\d+(?:\.\d+)?)", chance_value)
-                if match:
-                    parsed_chance = float(match.group(1))
-                if parsed_chance is not None and "%" in chance_value:
-                    parsed_chance /= 100.0
-            if parsed_chance is not None:
-                if parsed_chance > 1 and parsed_chance <= 100:
-                    parsed_chance /= 100.0
-                effect["chance"] = max(0.0, min(1.0, parsed_chance))
-            else:
-                effect["chance"] = None
+        notes = effect.get("notes")
+        if notes is not None and not isinstance(notes, str):
+            effect["notes"] = None
 
-            outcomes = []
-            for outcome in raw_effect.get("outcomes") or []:
-                if not isinstance(outcome, dict):
-                    continue
-                cleaned_outcome = {
-                    key: outcome.get(key)
-                    for key in OUTCOME_KEYS
-                    if key in outcome
-                }
-                actions = []
-                for action in outcome.get("effects") or []:
-                    if isinstance(action, dict):
-                        cleaned_action = {
-                            key: action.get(key)
-                            for key in ACTION_KEYS
-                            if key in action
-                        }
-                        if cleaned_action:
-                            actions.append(cleaned_action)
-                cleaned_outcome["effects"] = actions
-                if "result" in cleaned_outcome and isinstance(cleaned_outcome["result"], str):
-                    outcomes.append(cleaned_outcome)
-            effect["outcomes"] = outcomes
-
-            notes = effect.get("notes")
-            if notes is not None and not isinstance(notes, str):
-                effect["notes"] = None
-
-            name_field = effect.get("name")
-            if not effect["modifiers"]:
-                if isinstance(name_field, str):
-                    stat_match = re.match(
-                        r"^\s*([+-]?\d+(?:\.\d+)?)\s*(%?)\s*(?:to\s+)?([A-Za-z]+)",
-                        name_field,
+        name_field = effect.get("name")
+        if not effect["modifiers"]:
+            if isinstance(name_field, str):
+                stat_match = re.match(
+                    r"^\s*([+-]?\d+(?:\.\d+)?)\s*(%?)\s*(?:to\s+)?([A-Za-z]+)",
+                    name_field,
+                )
+                if stat_match:
+                    numeric_value = float(stat_match.group(1))
+                    percent_flag = stat_match.group(2) == "%"
+                    stat_token = stat_match.group(3).lower()
+                    stat_key = STAT_ALIASES.get(stat_token) or STAT_ALIASES.get(
+                        stat_token.rstrip("s")
                     )
-                    if stat_match:
-                        numeric_value = float(stat_match.group(1))
-                        percent_flag = stat_match.group(2) == "%"
-                        stat_token = stat_match.group(3).lower()
-                        stat_key = STAT_ALIASES.get(stat_token) or STAT_ALIASES.get(
-                            stat_token.rstrip("s")
-                        )
-                        if stat_key:
-                            if percent_flag:
-                                effect["modifiers"] = [
-                                    {
-                                        "stat": stat_key,
-                                        "op": "mul",
-                                        "value": 1 + (numeric_value / 100.0),
-                                        "stack_rule": None,
-                                    }
-                                ]
-                            else:
-                                if numeric_value.is_integer():
-                                    value: float | int = int(numeric_value)
-                                else:
-                                    value = numeric_value
-                                effect["modifiers"] = [
-                                    {
-                                        "stat": stat_key,
-                                        "op": "add",
-                                        "value": value,
-                                        "stack_rule": None,
-                                    }
-                                ]
-                if not effect["modifiers"] and isinstance(name_field, str):
-                    lowered_name = name_field.lower()
-                    for alias, stat_key in STAT_ALIAS_PATTERNS:
-                        if re.search(rf"\b{re.escape(alias)}\b", lowered_name):
-                            bonus = stat_bonus_lookup.get(stat_key)
-                            if bonus is None:
-                                continue
-                            if isinstance(bonus, float) and bonus.is_integer():
-                                bonus_value: float | int = int(bonus)
+                    if stat_key:
+                        if percent_flag:
+                            effect["modifiers"] = [
+                                {
+                                    "stat": stat_key,
+                                    "op": "mul",
+                                    "value": 1 + (numeric_value / 100.0),
+                                    "stack_rule": None,
+                                }
+                            ]
+                        else:
+                            if numeric_value.is_integer():
+                                value: float | int = int(numeric_value)
                             else:
-                                bonus_value = bonus
+                                value = numeric_value
                             effect["modifiers"] = [
                                 {
                                     "stat": stat_key,
                                     "op": "add",
-                                    "value": bonus_value,
+                                    "value": value,
                                     "stack_rule": None,
                                 }
                             ]
-                            break
-
-            detail = None
-            if isinstance(name_field, str):
-                normalized_name = normalize_effect_name(name_field)
-                detail = effect_detail_lookup.get(normalized_name)
-                if not detail:
-                    for candidate in effect_detail_lookup.values():
-                        mod_stats = [
-                            mod.get("stat")
-                            for mod in candidate.get("modifiers", [])
-                            if isinstance(mod, dict)
+            if not effect["modifiers"] and isinstance(name_field, str):
+                lowered_name = name_field.lower()
+                for alias, stat_key in STAT_ALIAS_PATTERNS:
+                    if re.search(rf"\b{re.escape(alias)}\b", lowered_name):
+                        bonus = stat_bonus_lookup.get(stat_key)
+                        if bonus is None:
+                            continue
+                        if isinstance(bonus, float) and bonus.is_integer():
+                            bonus_value: float | int = int(bonus)
+                        else:
+                            bonus_value = bonus
+                        effect["modifiers"] = [
+                            {
+                                "stat": stat_key,
+                                "op": "add",
+                                "value": bonus_value,
+                                "stack_rule": None,
+                            }
                         ]
-                        found = False
-                        for stat_label in mod_stats:
-                            if not isinstance(stat_label, str):
-                                continue
-                            stat_lower = STAT_NAMES.get(stat_label, stat_label.lower())
-                            if stat_lower in normalized_name or stat_label.lower() in normalized_name:
-                                detail = candidate
-                                found = True
-                                break
-                        if found:
+                        break
+
+        detail = None
+        if isinstance(name_field, str):
+            normalized_name = normalize_effect_name(name_field)
+            detail = effect_detail_lookup.get(normalized_name)
+            if not detail:
+                for candidate in effect_detail_lookup.values():
+                    mod_stats = [
+                        mod.get("stat")
+                        for mod in candidate.get("modifiers", [])
+                        if isinstance(mod, dict)
+                    ]
+                    found = False
+                    for stat_label in mod_stats:
+                        if not isinstance(stat_label, str):
+                            continue
+                        stat_lower = STAT_NAMES.get(stat_label, stat_label.lower())
+                        if stat_lower in normalized_name or stat_label.lower() in normalized_name:
+                            detail = candidate
+                            found = True
                             break
-            if detail:
-                if detail["modifiers"]:
-                    effect["modifiers"] = [
-                        {
-                            "stat": mod["stat"],
-                            "op": mod["op"],
-                            "value": mod["value"],
-                            "stack_rule": mod.get("stack_rule"),
-                        }
-        for mod in detail["modifiers"]
-    ]
-                if effect.get("chance") is None and detail["chance"] is not None:
-                    effect["chance"] = detail["chance"]
-                if detail["notes"] and not effect.get("notes"):
-                    effect["notes"] = detail["notes"]
-
-            for modifier in effect.get("modifiers", []):
-                stat_label = modifier.get("stat")
-                if isinstance(stat_label, str):
-                    stats_present.add(stat_label)
-
-            effects.append(effect)
-        missing_stats = [stat for stat in stat_bonus_lookup if stat not in stats_present]
-        for stat in missing_stats:
-            value = stat_bonus_lookup[stat]
-            if isinstance(value, float) and value.is_integer():
-                numeric_value: float | int = int(value)
+                    if found:
+                        break
+        if detail:
+            if detail["modifiers"]:
+                effect["modifiers"] = [
+                    {
+                        "stat": mod["stat"],
+                        "op": mod["op"],
+                        "value": mod["value"],
+                        "stack_rule": mod.get("stack_rule"),
+                    }
+    for mod in detail["modifiers"]
+]
+            if effect.get("chance") is None and detail["chance"] is not None:
+                effect["chance"] = detail["chance"]
+            if detail["notes"] and not effect.get("notes"):
+                effect["notes"] = detail["notes"]
+
+        for modifier in effect.get("modifiers", []):
+            stat_label = modifier.get("stat")
+            if isinstance(stat_label, str):
+                stats_present.add(stat_label)
+
+        effects.append(effect)
+    missing_stats = [stat for stat in stat_bonus_lookup if stat not in stats_present]
+    for stat in missing_stats:
+        value = stat_bonus_lookup[stat]
+        if isinstance(value, float) and value.is_integer():
+            numeric_value: float | int = int(value)
+        else:
+            numeric_value = value
+        synthetic_effect = {
+            "name": f"+{numeric_value} {stat}",
+            "trigger": {"event": "unspecified", "conditions": []},
+            "chance": None,
+            "area": None,
+            "save": None,
+            "modifiers": [
+                {"stat": stat, "op": "add", "value": numeric_value, "stack_rule": None}
+            ],
+            "targeting": None,
+            "outcomes": [],
+            "notes": None,
+        }
+        effects.append(synthetic_effect)
+        stats_present.add(stat)
+    payload["effects"] = effects
+
+    physical = payload.get("physical")
+    if isinstance(physical, dict):
+        weight = physical.get("weight_kg")
+        if weight is not None and not isinstance(weight, (int, float)):
+            physical["weight_kg"] = None
+        dimensions = physical.get("dimensions_cm")
+        if isinstance(dimensions, dict):
+            cleaned_dimensions: dict[str, float] = {}
+            for axis in ("w", "h", "d"):
+                value = dimensions.get(axis)
+                if isinstance(value, (int, float)):
+                    cleaned_dimensions[axis] = float(value)
+            if cleaned_dimensions:
+                physical["dimensions_cm"] = cleaned_dimensions
             else:
-                numeric_value = value
-            synthetic_effect = {
-                "name": f"+{numeric_value} {stat}",
-                "trigger": {"event": "unspecified", "conditions": []},
-                "chance": None,
-                "area": None,
-                "save": None,
-                "modifiers": [
-                    {"stat": stat, "op": "add", "value": numeric_value, "stack_rule": None}
-                ],
-                "targeting": None,
-                "outcomes": [],
-                "notes": None,
-            }
-            effects.append(synthetic_effect)
-            stats_present.add(stat)
-        payload["effects"] = effects
-
-        physical = payload.get("physical")
-        if isinstance(physical, dict):
-            weight = physical.get("weight_kg")
-            if weight is not None and not isinstance(weight, (int, float)):
-                physical["weight_kg"] = None
-            dimensions = physical.get("dimensions_cm")
-            if isinstance(dimensions, dict):
-                cleaned_dimensions: dict[str, float] = {}
-                for axis in ("w", "h", "d"):
-                    value = dimensions.get(axis)
-                    if isinstance(value, (int, float)):
-                        cleaned_dimensions[axis] = float(value)
-                if cleaned_dimensions:
-                    physical["dimensions_cm"] = cleaned_dimensions
-                else:
-                    physical["dimensions_cm"] = None
-            durability = physical.get("durability")
-            if isinstance(durability, dict):
-                for key in ("max", "current"):
-                    item = durability.get(key)
-                    if item is not None and not isinstance(item, (int, float)):
-                        durability[key] = None
+                physical["dimensions_cm"] = None
+        durability = physical.get("durability")
+        if isinstance(durability, dict):
+            for key in ("max", "current"):
+                item = durability.get(key)
+                if item is not None and not isinstance(item, (int, float)):
+                    durability[key] = None
+    return payload
 
 
+def cached_completion(
+    user_content: str,
+    cache_only: bool = False,
+    system: str = SYSTEM,
+    model: str = OPENAI_MODEL,
+) -> Dict[str, Any]:
+    """Return the completion for ``user_content`` from the LLM cache or the API.
+
+    Completions served from the cache carry ``"cached": True``.
+    """
+    cache_key = completion_cache_key(user_content, model, system)
+    completion = LLM_CACHE.get(cache_key)
+    if completion is not None:
+        TELEMETRY.add(llm_cache_hits=1)
+        return {**completion, "cached": True}
+    if cache_only:
+        raise CacheMiss("No cached completion for this request")
+    completion = request_completion(user_content, model, system)
+    LLM_CACHE.put(cache_key, completion)
+    return completion
+
+
+def build_repair_message(payload: Dict[str, Any], errors: list) -> str:
+    problems = "\n".join(f"- {line}" for line in describe_errors(errors))
+    return (
+        "The record below failed validation against the agreed schema.\n"
+        f"ERRORS:\n{problems}\n"
+        "RECORD:\n"
+        f"{json.dumps(payload, ensure_ascii=False, sort_keys=True)}"
+    )
+
+
+def extract_record(
+    page_title: str,
+    page_url: str,
+    page_text: str,
+    cache_only: bool = False,
+    trim: bool = TRIM_WIKITEXT,
+    model: str = OPENAI_MODEL,
+    repair_cache_only: bool | None = None,
+) -> Dict[str, Any]:
+    """Extract, normalize and validate the record for one page.
+
+    The model sees the page trimmed by ``trim_prompt``; normalization still
+    works on the full wikitext. Raw model output is cached under a key derived
+    from the model, system prompt, schema and prompt, so re-running
+    normalization over an unchanged page costs no API call. With
+    ``cache_only`` a cache miss raises ``CacheMiss`` instead of calling the API.
+    ``repair_cache_only`` overrides that for repair requests only.
+    """
+    user_content = build_user_message(page_title, page_url, extraction_text(page_title, page_text, trim))
+    completion = cached_completion(user_content, cache_only, model=model)
+    if repair_cache_only is None:
+        repair_cache_only = cache_only
+    return finish_record(
+        json.loads(completion["content"]), page_title, page_url, page_text, repair_cache_only, model
+    )
+
+
+def finish_record(
+    payload: Dict[str, Any],
+    page_title: str,
+    page_url: str,
+    page_text: str,
+    cache_only: bool = False,
+    model: str = OPENAI_MODEL,
+    repair_attempts: int = REPAIR_ATTEMPTS,
+) -> Dict[str, Any]:
+    """Normalize and validate a raw model ``payload`` for one page.
+
+    A record that fails validation is first repaired with ``schema_fix``; if
+    errors remain, ``model`` is sent only the error paths and the previous
+    JSON (``REPAIR_SYSTEM``) rather than the whole page again, up to
+    ``repair_attempts`` times. Outcomes are counted in ``REPAIR_STATS``.
+    Valid records are stamped with ``stamp_record``.
+    """
+    file_candidates = extract_file_titles(page_text)
+    with TELEMETRY.timer("normalize_seconds"):
+        payload = normalize_payload(payload, page_title, page_url, page_text, file_candidates)
+    validator = schema_validator()
+    TELEMETRY.add(validation_attempts=1)
+    errors = list(validator.iter_errors(payload))
+    if not errors:
+        REPAIR_STATS.record("clean")
+        return stamp_record(payload, model)
+    payload, fixes, errors = schema_fix(payload, validator)
+    if not errors:
+        REPAIR_STATS.record("schema_fixed", fixes)
+        return stamp_record(payload, model)
+    for attempt in range(repair_attempts):
+        TELEMETRY.add(validation_attempts=1)
         try:
-            VALIDATOR.validate(payload)
-            return payload
-        except ValidationError as err:
-            last_error = err
-    if last_error:
-        raise last_error
-    raise RuntimeError("Failed to extract record for unknown reasons")
+            repaired = cached_completion(
+                build_repair_message(payload, errors), cache_only, REPAIR_SYSTEM, model
+            )
+            candidate = json.loads(repaired["content"])
+        except (CacheMiss, json.JSONDecodeError):
+            REPAIR_STATS.record("failed", fixes, attempt)
+            raise
+        payload, more_fixes, errors = schema_fix(candidate, validator)
+        fixes += more_fixes
+        if not errors:
+            REPAIR_STATS.record("llm_repaired", fixes, attempt + 1)
+            return stamp_record(payload, model)
+    REPAIR_STATS.record("failed", fixes, repair_attempts)
+    raise errors[0]
@@ -0,0 +1,97 @@
+import datetime
+import os
+import threading
+from typing import Callable, Dict, Iterator
+
+import orjson
+
+from collector.config import (
+    FAILURE_LOG_PATH,
+    RETRY_BASE_SECONDS,
+    RETRY_DETERMINISTIC_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_SECONDS,
+)
+from collector.state import STATE
+
+# Matched by class name anywhere in the exception's MRO, so the optional
+# ``openai`` and ``requests`` exception classes need not be imported.
+TRANSIENT_ERRORS = {
+    "ConnectionError",
+    "Timeout",
+    "TimeoutError",
+    "ChunkedEncodingError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "CacheMiss",
+}
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504, 529}
+# MediaWikiClient gives up with these once its own retries are exhausted.
+TRANSIENT_MESSAGES = ("Server error", "Replication lag", "no attempts made")
+
+_log_lock = threading.Lock()
+
+
+def classify(exc: BaseException) -> str:
+    """``"transient"`` for errors a later attempt may not hit, else ``"deterministic"``.
+
+    Transient: connection failures, timeouts, rate limits and 5xx responses
+    from the wiki or the API, and LLM cache misses in ``--cache-only`` runs.
+    Deterministic: everything that would fail the same way on the same page,
+    prompt and code, such as a record still invalid after repair, unparseable
+    model output or a page that no longer exists.
+    """
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & TRANSIENT_ERRORS:
+        return "transient"
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in TRANSIENT_STATUSES:
+        return "transient"
+    if "MWError" in names and str(exc).startswith(TRANSIENT_MESSAGES):
+        return "transient"
+    return "deterministic"
+
+
+def backoff(kind: str) -> Callable[[int], float]:
+    """Seconds to wait after the n-th consecutive failure: doubling from a per-kind base."""
+    base = RETRY_BASE_SECONDS if kind == "transient" else RETRY_DETERMINISTIC_SECONDS
+    return lambda attempts: min(RETRY_MAX_SECONDS, base * 2 ** max(0, attempts - 1))
+
+
+def record_failure(title: str, exc: BaseException, stage: str | None = None) -> Dict:
+    """Enter a failed attempt in the crawl state and append it to ``FAILURE_LOG_PATH``."""
+    kind = classify(exc)
+    row = STATE.record_failure(title, exc, stage, kind, backoff(kind))
+    entry = {
+        "title": title,
+        "at": row["last_failure"],
+        "stage": stage,
+        "error_class": type(exc).__name__,
+        "kind": kind,
+        "attempts": row["attempts"],
+        "next_eligible": row["next_eligible"],
+        "poisoned": row["attempts"] >= RETRY_MAX_ATTEMPTS,
+        "error": str(exc),
+    }
+    with _log_lock:
+        os.makedirs(os.path.dirname(FAILURE_LOG_PATH), exist_ok=True)
+        with open(FAILURE_LOG_PATH, "ab") as handle:
+            handle.write(orjson.dumps(entry) + b"\n")
+    return entry
+
+
+def retry_due(row: Dict, max_attempts: int = RETRY_MAX_ATTEMPTS) -> bool:
+    """Whether a crawl state row is a failure whose next attempt is due and under the cap."""
+    now = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    return bool(row.get("error_class")) and row["attempts"] < max_attempts and (row.get("next_eligible") or "") <= now
+
+
+def retry_titles(max_attempts: int = RETRY_MAX_ATTEMPTS) -> Iterator[str]:
+    """The due retry queue, read from the crawl state when iteration starts."""
+    due, poisoned = STATE.retry_queue(max_attempts)
+    print(f"Retry queue: due={len(due)} poisoned={poisoned} (max attempts {max_attempts})")
+    yield from due
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import unquote
+
+import orjson
+
+from collector.config import IMAGE_INFO_CACHE_PATH, IMAGE_INFO_KEEP_SECONDS, IMAGE_INFO_TTL_SECONDS
+from collector.mediawiki import fetch_image_info_batch
+from collector.utils import write_json_atomic
+
+
+def normalize_file_name(name: str) -> str:
+    """Return the cache key for a file name, URL fragment or ``File:`` title."""
+    value = unquote(name or "").split("?", 1)[0].strip()
+    if value.lower().startswith("file:"):
+        value = value[5:]
+    return value.replace("_", " ").strip().lower()
+
+
+class ImageInfoCache:
+    """On-disk ``prop=imageinfo`` cache shared by crawls and image refreshes.
+
+    Entries are keyed by normalized file name and store the file's sha1 and
+    upload timestamp next to the image info. Entries older than ``ttl`` are
+    revalidated in bulk by sha1 alone: unchanged files keep their entry, and
+    only new or re-uploaded files (counted in ``changed``) are fetched in
+    full. Lookups only update memory; ``save`` writes the file once per run
+    and evicts entries not refreshed within ``keep``. While ``offline``
+    nothing is fetched: stale entries are served as they are and unknown
+    files resolve to empty info.
+    """
+
+    def __init__(
+        self,
+        path: str = IMAGE_INFO_CACHE_PATH,
+        ttl: float = IMAGE_INFO_TTL_SECONDS,
+        keep: float = IMAGE_INFO_KEEP_SECONDS,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.keep = keep
+        self.entries: Optional[Dict[str, Dict]] = None
+        self.changed = 0
+        self.offline = False
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def use_offline(self, offline: bool) -> None:
+        """Answer from the cache file alone from now on (``--cache-only`` runs)."""
+        self.offline = offline
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.entries is None:
+            self.entries = {}
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as handle:
+                    self.entries = orjson.loads(handle.read())
+        return self.entries
+
+    def _fresh(self, entry: Optional[Dict], now: float) -> bool:
+        return entry is not None and now - entry.get("fetched_at", 0) < self.ttl
+
+    def _revalidate(self, expired: Dict[str, str], now: float) -> Dict[str, str]:
+        """Renew expired entries whose sha1 is unchanged; return the ones to fetch again."""
+        current = fetch_image_info_batch(expired.values(), iiprop="sha1")
+        refetch = {}
+        with self._lock:
+            for key, name in expired.items():
+                sha1 = (current.get(name) or {}).get("sha1")
+                if sha1 and sha1 == self.entries[key]["sha1"]:
+                    self.entries[key]["fetched_at"] = now
+                    continue
+                if sha1:
+                    self.changed += 1
+                refetch[key] = name
+            self._dirty = True
+        return refetch
+
+    def lookup(self, names: Iterable[str]) -> Dict[str, Dict]:
+        """Return ``{name: imageinfo}`` for ``names``, fetching misses in batches."""
+        names = [name for name in names if normalize_file_name(name)]
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            missing: Dict[str, str] = {}
+            expired: Dict[str, str] = {}
+            for name in names:
+                key = normalize_file_name(name)
+                entry = entries.get(key)
+                if self._fresh(entry, now) or key in missing or key in expired:
+                    continue
+                if entry and entry.get("sha1"):
+                    expired[key] = name
+                else:
+                    missing[key] = name
+        if expired and not self.offline:
+            missing.update(self._revalidate(expired, now))
+        if missing and not self.offline:
+            fetched = fetch_image_info_batch(missing.values())
+            with self._lock:
+                for key, name in missing.items():
+                    info = fetched.get(name) or {}
+                    entries[key] = {
+                        "info": info,
+                        "sha1": info.get("sha1"),
+                        "timestamp": info.get("timestamp"),
+                        "fetched_at": now,
+                    }
+                self._dirty = True
+        with self._lock:
+            return {name: (entries.get(normalize_file_name(name)) or {}).get("info", {}) for name in names}
+
+    def get(self, name: str) -> Dict:
+        if not normalize_file_name(name):
+            return {}
+        return self.lookup([name])[name]
+
+    def save(self) -> None:
+        """Write the cache if lookups changed it."""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = self._load()
+            for key in [key for key, entry in entries.items() if now - entry.get("fetched_at", 0) >= self.keep]:
+                del entries[key]
+            write_json_atomic(self.path, entries)
+            self._dirty = False
+
+
+IMAGE_INFO_CACHE = ImageInfoCache()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from collector.config import OPENAI_API_KEY, OPENAI_FAST_MODEL, OPENAI_MODEL
+from collector.extractor_openai import record_fingerprint, use_cache_schema
+from collector.main import output_path_for_title, process_titles
+from collector.rawstore import load_manifest
+from collector.schema import (
+    load_schema,
+    load_schema_snapshot,
+    save_schema_snapshot,
+    schema_changes,
+    schema_fingerprint,
+)
+from collector.state import STATE
+
+# Built by normalize_payload rather than taken from the model, so a change
+# to their sub-schemas only needs the records renormalized.
+POSTPROCESSED = {"provenance", "metadata"}
+
+
+def _present(value: Any) -> bool:
+    return value not in (None, "", [], {})
+
+
+def baseline_stamp(record: Dict[str, Any], schema_digest: str) -> Dict[str, str]:
+    """The fingerprint assumed for a record written before records carried one."""
+    rules = (record.get("provenance") or {}).get("extraction_method") == "rules"
+    return {
+        **record_fingerprint("rules" if rules else OPENAI_MODEL),
+        "schema": schema_digest,
+        "prompt_schema": schema_digest,
+        "normalizer": "0",
+    }
+
+
+def plan_record(record: Dict[str, Any], baseline: Optional[str] = None) -> Dict[str, Any]:
+    """What a stored record needs: ``current``, ``renormalize`` or ``extract``.
+
+    A different model or prompt, or a schema change in a property the record
+    fills (or one outside the existing properties), needs a new completion.
+    A schema change only in properties the record leaves empty or that
+    normalization builds, or a new ``NORMALIZER_VERSION``, is renormalized
+    offline from the completion cached under the record's old schema
+    (``cache_schema``). Rule-based records never need the model, so they
+    are always renormalized.
+    """
+    stamp = (record.get("provenance") or {}).get("fingerprint")
+    if not stamp and baseline:
+        stamp = baseline_stamp(record, baseline)
+    if not stamp:
+        rules = (record.get("provenance") or {}).get("extraction_method") == "rules"
+        return {"action": "renormalize" if rules else "extract", "reason": "unstamped", "cache_schema": None}
+    current = record_fingerprint(stamp.get("model") or OPENAI_MODEL)
+    rules = stamp.get("model") == "rules"
+    stale: List[str] = []
+    reasons: List[str] = []
+    cache_schema = stamp.get("prompt_schema") or stamp.get("schema")
+    if stamp.get("model") not in {"rules", OPENAI_MODEL, OPENAI_FAST_MODEL or OPENAI_MODEL}:
+        stale.append(f"model {stamp.get('model')}")
+    if stamp.get("prompt") != current["prompt"]:
+        stale.append("prompt")
+    if stamp.get("schema") != current["schema"]:
+        old = load_schema_snapshot(stamp.get("schema") or "")
+        changed = None if old is None else schema_changes(old, load_schema())
+        touched = sorted(key for key in (changed or set()) - POSTPROCESSED if _present(record.get(key)))
+        if old is None:
+            stale.append("schema (no snapshot)")
+        elif changed is None:
+            stale.append("schema (root)")
+        elif touched:
+            stale.append(f"schema: {','.join(touched)}")
+        else:
+            reasons.append(f"schema: {','.join(sorted(changed)) or '-'}")
+    if stamp.get("normalizer") != current["normalizer"]:
+        reasons.append("normalizer")
+    if stale and not rules:
+        return {"action": "extract", "reason": "; ".join(stale + reasons), "cache_schema": None}
+    if stale or reasons:
+        return {"action": "renormalize", "reason": "; ".join(stale + reasons), "cache_schema": cache_schema}
+    return {"action": "current", "reason": "", "cache_schema": None}
+
+
+def plan_invalidation(baseline: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """``plan_record`` for every title with a stored record, by title."""
+    STATE.seed(load_manifest(), output_path_for_title)
+    connection = STATE.connect()
+    plan = {}
+    for row in connection.execute("SELECT title FROM titles WHERE output_hash IS NOT NULL ORDER BY title"):
+        path = output_path_for_title(row["title"])
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as handle:
+            plan[row["title"]] = plan_record(orjson.loads(handle.read()), baseline)
+    return plan
+
+
+def apply_plan(plan: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """Renormalize offline, grouped by the schema their completions were cached under, then re-extract."""
+    totals = {"written": 0, "skipped": 0, "failed": 0}
+    groups: Dict[Optional[str], List[str]] = {}
+    for title, entry in plan.items():
+        if entry["action"] == "renormalize":
+            groups.setdefault(entry["cache_schema"], []).append(title)
+    extract = [title for title, entry in plan.items() if entry["action"] == "extract"]
+    runs = [(digest, titles, True) for digest, titles in groups.items()]
+    if extract:
+        runs.append((None, extract, False))
+    for digest, titles, cache_only in runs:
+        schema = load_schema_snapshot(digest) if digest and digest != schema_fingerprint() else None
+        use_cache_schema(schema)
+        try:
+            counts = process_titles(titles, force=True, cache_only=cache_only)
+        finally:
+            use_cache_schema(None)
+        for key, value in zip(totals, counts):
+            totals[key] += value
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Find records made stale by a model, prompt, schema or normalizer change"
+    )
+    parser.add_argument("--list", action="store_true", help="Print the action and reason for every stale record")
+    parser.add_argument("--apply", action="store_true", help="Renormalize and re-extract the stale records")
+    parser.add_argument(
+        "--baseline",
+        default="",
+        help="Schema file that records without a fingerprint were extracted with "
+        "(they are otherwise re-extracted)",
+    )
+    args = parser.parse_args()
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as handle:
+            baseline = save_schema_snapshot(json.load(handle))
+    save_schema_snapshot()
+    plan = plan_invalidation(baseline)
+    counts: Dict[str, int] = {}
+    reasons: Dict[str, int] = {}
+    for title, entry in plan.items():
+        counts[entry["action"]] = counts.get(entry["action"], 0) + 1
+        if entry["action"] != "current":
+            key = f"{entry['action']}: {entry['reason']}"
+            reasons[key] = reasons.get(key, 0) + 1
+            if args.list:
+                print(f"{entry['action']:<12} {title}\t{entry['reason']}")
+    print(" ".join(f"{action}={counts.get(action, 0)}" for action in ("current", "renormalize", "extract")))
+    for key, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"  {key}: {count}")
+    if not args.apply:
+        return
+    if any(entry["action"] == "extract" for entry in plan.values()) and not OPENAI_API_KEY:
+        raise SystemExit("Missing OPENAI_API_KEY in environment")
+    totals = apply_plan(plan)
+    print("Done. " + " ".join(f"{key}={value}" for key, value in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import datetime
+import glob
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+
+from collector.config import LLM_CACHE_DIR, LLM_CACHE_MAX_AGE_SECONDS, LLM_CACHE_MAX_BYTES
+from collector.utils import write_json_atomic
+
+
+class CacheMiss(LookupError):
+    pass
+
+
+def fingerprint(value: Any) -> str:
+    """Return a stable SHA-256 for a string or JSON-serializable value."""
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+    else:
+        data = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(data).hexdigest()
+
+
+class LLMCache:
+    """Persistent store of raw extraction responses, one JSON file per request key.
+
+    The key covers the model, the system prompt, the schema and the user
+    message (title, URL and wikitext), so any change to one of them misses.
+    Entries keep the raw model output and token usage, not the normalized
+    record. They expire after ``max_age`` seconds, and ``prune`` also drops
+    the oldest entries once the cache grows past ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        root: str = LLM_CACHE_DIR,
+        max_age: float = LLM_CACHE_MAX_AGE_SECONDS,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ) -> None:
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def key(self, model: str, system: str, schema: Dict, user_content: str) -> str:
+        return fingerprint(
+            "\0".join([model, fingerprint(system), fingerprint(schema), fingerprint(user_content)])
+        )
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path(key)
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) >= self.max_age:
+            self._count("misses")
+            return None
+        with open(path, "rb") as handle:
+            entry = orjson.loads(handle.read())
+        self._count("hits")
+        return entry
+
+    def put(self, key: str, completion: Dict[str, Any]) -> None:
+        entry = {
+            **completion,
+            "created_at": datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
+        }
+        write_json_atomic(self.path(key), entry)
+        self._count("writes")
+
+    def prune(self) -> Dict[str, int]:
+        """Evict expired entries, then the oldest ones until under ``max_bytes``."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in glob.glob(os.path.join(self.root, "*", "*.json")):
+            mtime = os.path.getmtime(path)
+            if now - mtime >= self.max_age:
+                os.remove(path)
+                removed += 1
+                continue
+            entries.append((mtime, os.path.getsize(path), path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            os.remove(path)
+            total -= size
+            removed += 1
+        return {"removed": removed, "kept": len(entries), "bytes": total}
+
+
+LLM_CACHE = LLMCache()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or prune the LLM extraction cache")
+    parser.add_argument("--prune", action="store_true", help="Evict expired and excess entries")
+    args = parser.parse_args()
+    if args.prune:
+        result = LLM_CACHE.prune()
+        print(f"Pruned {result['removed']} entr(ies); kept={result['kept']} bytes={result['bytes']}")
+        return
+    paths = glob.glob(os.path.join(LLM_CACHE.root, "*", "*.json"))
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"entries={len(paths)} bytes={size}")
+
+
+if __name__ == "__main__":
+    main()
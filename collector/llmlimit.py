@@ -0,0 +1,132 @@
+import collections
+import threading
+import time
+from typing import Dict, List
+
+from collector.config import (
+    EXTRACT_WORKERS,
+    LLM_INITIAL_IN_FLIGHT,
+    LLM_RPM,
+    LLM_TARGET_LATENCY_SECONDS,
+    LLM_TPM,
+)
+
+BUDGET_WINDOW_SECONDS = 60.0
+DECREASE_COOLDOWN_SECONDS = 2.0
+COMPLETION_TOKEN_ESTIMATE = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size (about four characters per token) used to reserve TPM budget."""
+    return len(text) // 4 + 1
+
+
+class AdaptiveLimiter:
+    """Bound concurrent LLM requests with an AIMD window and per-minute budgets.
+
+    ``acquire`` blocks until fewer than ``limit`` requests are in flight and
+    the last minute's request and token counts leave room for one more. The
+    window grows by ``1/limit`` for every request that finishes under
+    ``target_latency`` (about +1 per window of healthy requests) and halves on
+    a 429 or overload response, at most once per cooldown so a burst of
+    rejections from the same window counts as one signal. ``rpm``/``tpm`` of 0
+    disable that budget.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = EXTRACT_WORKERS,
+        initial: float = LLM_INITIAL_IN_FLIGHT,
+        rpm: int = LLM_RPM,
+        tpm: int = LLM_TPM,
+        target_latency: float = LLM_TARGET_LATENCY_SECONDS,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.limit = float(min(max(1, initial), self.max_in_flight))
+        self.rpm = rpm
+        self.tpm = tpm
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "overloads": 0,
+            "decreases": 0,
+            "wait_seconds": 0.0,
+            "peak_limit": self.limit,
+        }
+        self._window: collections.deque = collections.deque()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def configure(self, max_in_flight: int | None = None, rpm: int | None = None, tpm: int | None = None) -> None:
+        with self._cond:
+            if max_in_flight is not None:
+                self.max_in_flight = max(1, max_in_flight)
+                self.limit = min(self.limit, float(self.max_in_flight))
+            if rpm is not None:
+                self.rpm = rpm
+            if tpm is not None:
+                self.tpm = tpm
+            self._cond.notify_all()
+
+    def _budget_delay(self, now: float, tokens: int) -> float:
+        while self._window and now - self._window[0][0] >= BUDGET_WINDOW_SECONDS:
+            self._window.popleft()
+        if not self._window:
+            return 0.0
+        release_at = self._window[0][0] + BUDGET_WINDOW_SECONDS - now
+        if self.rpm and len(self._window) >= self.rpm:
+            return release_at
+        if self.tpm and sum(entry[1] for entry in self._window) + tokens > self.tpm:
+            return release_at
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> List:
+        """Wait for a slot and reserve ``tokens``; pass the returned ticket to ``release``."""
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                delay = max(self.paused_until - now, self._budget_delay(now, tokens))
+                if delay <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._cond.wait(timeout=delay if delay > 0 else None)
+            self.in_flight += 1
+            ticket = [time.monotonic(), tokens]
+            self._window.append(ticket)
+            self.stats["requests"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - started
+        return ticket
+
+    def release(self, ticket: List, latency: float | None = None, tokens: int | None = None) -> None:
+        """Return a slot, growing the window if the request succeeded within the target latency."""
+        with self._cond:
+            self.in_flight -= 1
+            if tokens is not None:
+                ticket[1] = tokens
+            if latency is not None and latency <= self.target_latency and self.limit < self.max_in_flight:
+                self.limit = min(float(self.max_in_flight), self.limit + 1.0 / self.limit)
+                self.stats["peak_limit"] = max(self.stats["peak_limit"], self.limit)
+            self._cond.notify_all()
+
+    def overloaded(self, ticket: List, retry_after: float = 0.0) -> None:
+        """Return a slot after a 429/overload response and shrink the window."""
+        with self._cond:
+            self.in_flight -= 1
+            self.stats["overloads"] += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+                self.stats["decreases"] += 1
+            if retry_after > 0:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {**self.stats, "limit": self.limit, "in_flight": self.in_flight}
+
+
+LLM_LIMITER = AdaptiveLimiter()
@@ -1,15 +1,62 @@
 import argparse
-import hashlib
+import functools
+import itertools
 import os
 import re
+from collections import deque
+from typing import Iterable, Iterator
 
 import orjson
 from tqdm import tqdm
 
-from collector.config import CATEGORY_ROOT, DATA_DIR, RAW_DIR
-from collector.extractor_openai import extract_record
-from collector.mediawiki import fetch_wikitext, list_category_titles
-from collector.utils import sanitize_title_for_fs
+from collector.config import (
+    CATEGORY_ROOT,
+    DATA_DIR,
+    EXTRACT_WORKERS,
+    LLM_RPM,
+    LLM_TPM,
+    MAX_TITLES_PER_REQUEST,
+    OPENAI_API_KEY,
+    OPENAI_FAST_MODEL,
+    OPENAI_MODEL,
+    RAW_DIR,
+    RETIRED_DIR,
+    RETRY_MAX_ATTEMPTS,
+    RULES_FAST_PATH,
+    TELEMETRY_PATH,
+)
+from collector.categories import iter_category_tree
+from collector.chunks import CHUNK_STATS, extract_chunked, oversized
+from collector.dedupe import DUPLICATES
+from collector.extractor_openai import extract_record, extraction_fingerprint
+from collector.failures import record_failure, retry_due, retry_titles
+from collector.imagecache import IMAGE_INFO_CACHE
+from collector.llmcache import LLM_CACHE
+from collector.llmlimit import LLM_LIMITER
+from collector.mediawiki import (
+    fetch_revisions,
+    fetch_wikitext_batch,
+    get_client,
+    iter_category_revisions,
+)
+from collector.pipeline import Stage, run_pipeline
+from collector.rawstore import (
+    load_manifest,
+    read_raw,
+    record_revision,
+    save_manifest,
+    use_manifest,
+    use_objects,
+)
+from collector.repair import REPAIR_STATS
+from collector.rules import RULE_STATS, extract_rule_based
+from collector.schema import save_schema_snapshot, schema_validator
+from collector.shards import parse_shard, prepare_staging, shard_of, write_shard_manifest
+from collector.state import STATE, output_hash
+from collector.telemetry import TELEMETRY, summary_lines
+from collector.tiers import TIER_STATS, extract_tiered
+from collector.trim import TRIM_STATS
+from collector.utils import batched, write_json_atomic
 
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(RAW_DIR, exist_ok=True)
@@ -23,13 +70,404 @@ def slug(value: str) -> str:
     return value[:120]
 
 
-def file_hash(path: str) -> str:
-    if not os.path.exists(path):
-        return ""
-    digest = hashlib.sha256()
-    with open(path, "rb") as handle:
-        digest.update(handle.read())
-    return digest.hexdigest()
+def log_failure(title: str, exc: Exception, stage: str | None = None) -> None:
+    entry = record_failure(title, exc, stage)
+    print(f"[ERROR] {title}: {exc} ({entry['kind']}, attempt {entry['attempts']})")
+
+
+def output_path_for_title(title: str) -> str:
+    return os.path.join(DATA_DIR, f"{slug(title)}.json")
+
+
+def use_shard(index: int, count: int) -> str:
+    """Send this process's records, revisions, raw blobs, crawl state and aliases to the shard's staging directory."""
+    global DATA_DIR
+    STATE.seed(load_manifest(), output_path_for_title)
+    root = prepare_staging(index, count)
+    DATA_DIR = os.path.join(root, "items")
+    use_manifest(os.path.join(root, "revisions.json"))
+    STATE.path = os.path.join(root, "state.sqlite")
+    DUPLICATES.use(os.path.join(root, "aliases.json"))
+    use_objects(os.path.join(root, "objects"))
+    return root
+
+
+def has_record(title: str) -> bool:
+    """Whether ``title`` has a record, either its own or its canonical title's."""
+    return STATE.has_output(DUPLICATES.canonical(title))
+
+
+def page_url_for_title(title: str) -> str:
+    return f"https://dungeon-crawler-carl.fandom.com/wiki/{title.replace(' ', '_')}"
+
+
+def write_record(record: dict, output_path: str) -> str:
+    """Atomically write ``record`` as sorted, indented JSON and return the SHA-256 of the file."""
+    return output_hash(write_json_atomic(output_path, record))
+
+
+def window_titles(
+    titles: Iterable[str], resume_from: str = "", offset: int = 0, limit: int = 0
+) -> Iterator[str]:
+    """Apply ``--resume-from``, ``--offset`` and ``--limit`` to a title stream lazily.
+
+    Titles are held back until ``resume_from`` shows up; if it never does,
+    every title is kept, as when the whole list was searched up front.
+    """
+    iterator = iter(titles)
+    if resume_from:
+        held: list[str] | None = []
+        for title in iterator:
+            if title == resume_from:
+                held = None
+                break
+            held.append(title)
+        if held is not None:
+            iterator = iter(held)
+    if offset > 0:
+        iterator = itertools.islice(iterator, offset, None)
+    if limit > 0:
+        iterator = itertools.islice(iterator, limit)
+    yield from iterator
+
+
+def category_titles(category: str, revisions: dict) -> Iterator[str]:
+    """Stream a category's articles, keeping the revision metadata listed with them in ``revisions``."""
+    for title, revision in iter_category_revisions(category):
+        if revision:
+            revisions[title] = revision
+        yield title
+
+
+def report_titles(titles: Iterable[str], force: bool = False, revisions: dict | None = None) -> None:
+    STATE.seed(load_manifest(), output_path_for_title)
+    revisions = {} if revisions is None else revisions
+    report_new: list[str] = []
+    report_updated: list[str] = []
+    report_missing: list[str] = []
+    for batch in batched(titles, MAX_TITLES_PER_REQUEST):
+        unknown = [title for title in batch if title not in revisions]
+        if unknown:
+            revisions.update(fetch_revisions(unknown))
+        known_rows = STATE.rows(batch)
+        for title in batch:
+            current = revisions.get(title)
+            if current is None:
+                log_failure(title, LookupError("page not found on wiki"), "report")
+                continue
+            known = known_rows.get(title) or {}
+            if not has_record(title):
+                if known:
+                    report_missing.append(title)
+                else:
+                    report_new.append(title)
+            elif force or known.get("revid") != current["revid"]:
+                report_updated.append(title)
+
+    if report_new:
+        print("New titles:")
+        for title in report_new:
+            print(f"  + {title}")
+    if report_updated:
+        print("Updated titles:")
+        for title in report_updated:
+            print(f"  * {title}")
+    if report_missing:
+        print("Missing outputs:")
+        for title in report_missing:
+            print(f"  ? {title}")
+    total = len(report_new) + len(report_updated) + len(report_missing)
+    print(f"Report complete. total={total} new={len(report_new)} updated={len(report_updated)} missing={len(report_missing)}")
+
+
+def plan_stage(revisions: dict, force: bool, explicit: bool = False):
+    """Mark titles whose stored revision is current and whose record exists as skipped.
+
+    A title whose last attempt failed is skipped until its retry is due, and
+    for good once it reached ``RETRY_MAX_ATTEMPTS``, whether or not it has a
+    record. ``force`` and ``explicit`` (titles named with ``--title`` or
+    taken from the retry queue) bypass that.
+
+    Each listing batch costs one revision query to the wiki and two indexed
+    lookups in the crawl state (the titles and their canonical titles).
+    """
+
+    def plan(items):
+        for batch in batched(items, MAX_TITLES_PER_REQUEST):
+            unknown = [item["title"] for item in batch if item["title"] not in revisions]
+            if unknown:
+                revisions.update(fetch_revisions(unknown))
+            titles = [item["title"] for item in batch]
+            known = STATE.rows(titles)
+            records = STATE.rows({DUPLICATES.canonical(title) for title in titles})
+            for item in batch:
+                title = item["title"]
+                current = revisions.get(title)
+                row = known.get(title) or {}
+                if current is None:
+                    item["error"] = LookupError("page not found on wiki")
+                    item["stage"] = "plan"
+                elif force:
+                    pass
+                elif row.get("error_class"):
+                    item["skip"] = not explicit and not retry_due(row)
+                elif (
+                    row.get("revid") == current["revid"]
+                    and (records.get(DUPLICATES.canonical(title)) or {}).get("output_hash")
+                ):
+                    item["skip"] = True
+                yield item
+
+    return plan
+
+
+def fetch_stage(items):
+    buffered = deque()
+    ready = deque()
+
+    def titles():
+        for item in items:
+            if item.get("error") or item.get("skip"):
+                ready.append(item)
+                continue
+            buffered.append(item)
+            yield item["title"]
+
+    for raw in fetch_wikitext_batch(titles()):
+        while ready:
+            yield ready.popleft()
+        item = buffered.popleft()
+        item["raw"] = raw
+        TELEMETRY.add(item["title"], **raw.get("http", {}))
+        yield item
+    while ready:
+        yield ready.popleft()
+
+
+def load_stage(manifest: dict):
+    def load(item: dict) -> dict:
+        wikitext = read_raw(item["title"], manifest)
+        if wikitext is None:
+            raise LookupError("no stored wikitext for page")
+        entry = manifest.get(item["title"]) or {}
+        item["raw"] = {"title": item["title"], "wikitext": wikitext, "hash": entry.get("hash")}
+        return item
+
+    return load
+
+
+def dedupe_stage(item: dict) -> dict:
+    """Mark ``item`` as an alias when its content was already claimed by another title.
+
+    Runs on one worker so the first title in input order becomes canonical.
+    """
+    raw = item["raw"]
+    alias_of = None if raw.get("missing") else DUPLICATES.assign(item["title"], raw.get("hash"))
+    if alias_of:
+        item["alias_of"] = alias_of
+        item["skip"] = True
+    return item
+
+
+def apply_aliases() -> int:
+    """Add this run's duplicate titles to their canonical records; return aliases recorded.
+
+    Records previously written for a title that turned out to be an alias
+    are moved to ``RETIRED_DIR``, and titles whose content no longer matches
+    their canonical page are dropped from its ``aliases``. Groups whose
+    canonical record failed are left alone and retried next run.
+    """
+    changes: dict = {}
+    for canonical, aliases in DUPLICATES.aliases().items():
+        changes.setdefault(canonical, ([], []))[0].extend(aliases)
+    for alias, canonical in DUPLICATES.departed.items():
+        changes.setdefault(canonical, ([], []))[1].append(alias)
+    recorded = 0
+    for canonical, (added, removed) in changes.items():
+        path = output_path_for_title(canonical)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as handle:
+            record = orjson.loads(handle.read())
+        names = [name for name in record.get("aliases") or [] if name not in removed]
+        for alias in added:
+            if alias != record.get("name") and alias not in names:
+                names.append(alias)
+            stale = output_path_for_title(alias)
+            if stale != path and os.path.exists(stale):
+                os.makedirs(RETIRED_DIR, exist_ok=True)
+                os.replace(stale, os.path.join(RETIRED_DIR, os.path.basename(stale)))
+                STATE.clear_output(alias)
+            DUPLICATES.index[alias] = canonical
+            recorded += 1
+        if names != (record.get("aliases") or []):
+            record["aliases"] = names
+            STATE.record_output(canonical, write_record(record, path))
+    DUPLICATES.save()
+    return recorded
+
+
+def reconcile_aliases() -> int:
+    """Regroup duplicate content across every stored title and apply the aliases.
+
+    A sharded run only groups duplicates among its own titles; this runs
+    after ``collector.shards`` has merged them. Returns aliases recorded.
+    """
+    manifest = load_manifest()
+    DUPLICATES.seed(manifest, has_record)
+    for title, entry in manifest.items():
+        DUPLICATES.assign(title, entry.get("hash"))
+    return apply_aliases()
+
+
+def print_duplicates() -> None:
+    groups = DUPLICATES.aliases()
+    if not groups:
+        return
+    print(f"Duplicates: groups={len(groups)} aliases={sum(len(v) for v in groups.values())}")
+    for canonical, aliases in sorted(groups.items()):
+        print(f"  {canonical} <- {', '.join(aliases)}")
+
+
+def extract_stage(item: dict, cache_only: bool = False) -> dict:
+    raw = item["raw"]
+    if raw.get("missing"):
+        raise LookupError("page not found on wiki")
+    title = item["title"]
+    url = page_url_for_title(title)
+    with TELEMETRY.bind(title), TELEMETRY.timer("extract_seconds"):
+        record = extract_rule_based(title, url, raw["wikitext"]) if RULES_FAST_PATH else None
+        if record is None:
+            if oversized(raw["wikitext"]):
+                extract = extract_chunked
+            elif OPENAI_FAST_MODEL and OPENAI_FAST_MODEL != OPENAI_MODEL:
+                extract = extract_tiered
+            else:
+                extract = extract_record
+            record = extract(title, url, raw["wikitext"], cache_only=cache_only)
+    item["record"] = record
+    return item
+
+
+def validate_stage(item: dict) -> dict:
+    record = item["record"]
+    title = item["title"]
+    base_identifier = record.get("id") or record.get("name") or title
+    record["id"] = slug(base_identifier)
+    record["name"] = record.get("name") or title
+    if not record["id"]:
+        record["id"] = slug(title)
+    schema_validator().validate(record)
+    return item
+
+
+def ordered_stage(items):
+    """Release items in input order (by ``seq``) so records are written deterministically."""
+    held = {}
+    next_seq = 0
+    for item in items:
+        held[item["seq"]] = item
+        while next_seq in held:
+            yield held.pop(next_seq)
+            next_seq += 1
+
+
+def write_stage(item: dict) -> dict:
+    with TELEMETRY.timer("write_seconds", item["title"]):
+        digest = write_record(item["record"], output_path_for_title(item["title"]))
+    # The stamp names the model whose answer was kept (the fast tier's unless escalated).
+    stamp = item["record"]["provenance"]["fingerprint"]
+    STATE.record_success(item["title"], stamp["model"], extraction_fingerprint(stamp), digest)
+    return item
+
+
+def process_titles(
+    titles: Iterable[str],
+    revisions: dict | None = None,
+    force: bool = False,
+    extract_workers: int = EXTRACT_WORKERS,
+    cache_only: bool = False,
+    explicit: bool = False,
+) -> tuple[int, int, int]:
+    """Fetch and extract every title whose revision moved; return written/skipped/failed.
+
+    ``titles`` may be a lazy stream; ``revisions`` may be filled while it is
+    consumed (see ``category_titles``), and titles found there are not
+    looked up again. Revision checks, fetching, extraction,
+    validation and writing run as overlapping pipeline stages, so the first
+    page is extracted as soon as its listing batch has been planned. Titles
+    whose content duplicates an earlier title's are not extracted but added
+    to that record's ``aliases`` (see ``DuplicateGroups``). Pages finish
+    extraction out of order but are written in input order. With
+    ``cache_only`` every title is re-normalized offline from the raw store and
+    the LLM cache; nothing is requested from the wiki or the API. Failed
+    titles wait out their backoff unless ``explicit`` (see ``plan_stage``).
+    """
+    written = skipped = failed = 0
+    manifest = load_manifest()
+    STATE.seed(manifest, output_path_for_title)
+    DUPLICATES.seed(manifest, has_record)
+    save_schema_snapshot()
+    revisions = {} if revisions is None else revisions
+    LLM_LIMITER.configure(max_in_flight=extract_workers)
+    IMAGE_INFO_CACHE.use_offline(cache_only)
+    progress = tqdm(total=0, desc="Collecting")
+
+    def source():
+        for seq, title in enumerate(titles):
+            progress.total += 1
+            TELEMETRY.add(title)
+            yield {"title": title, "seq": seq}
+
+    if cache_only:
+        stages = [Stage("load", load_stage(manifest), maxsize=MAX_TITLES_PER_REQUEST)]
+    else:
+        stages = [
+            Stage("plan", plan_stage(revisions, force, explicit), stream=True, maxsize=MAX_TITLES_PER_REQUEST),
+            Stage("fetch", fetch_stage, stream=True, maxsize=MAX_TITLES_PER_REQUEST),
+        ]
+    stages += [
+        Stage("dedupe", dedupe_stage),
+        Stage(
+            "extract",
+            functools.partial(extract_stage, cache_only=cache_only),
+            workers=extract_workers,
+            maxsize=extract_workers * 2,
+        ),
+        Stage("validate", validate_stage),
+        Stage("order", ordered_stage, stream=True, maxsize=extract_workers * 2),
+        Stage("write", write_stage),
+    ]
+    fetched = False
+    try:
+        for item in run_pipeline(source(), stages):
+            progress.update(1)
+            raw = item.get("raw") or {}
+            if raw.get("pageid"):
+                record_revision(manifest, item["title"], raw)
+                fetched = True
+                if not item.get("error"):
+                    # The state's revision is the one its record was built from,
+                    # so a failed new revision is planned again next run.
+                    STATE.record_fetch(item["title"], raw.get("revid"), raw.get("hash"))
+            if item.get("error"):
+                failed += 1
+                log_failure(item["title"], item["error"], item.get("stage"))
+                outcome = "failed"
+            elif item.get("skip"):
+                skipped += 1
+                outcome = "alias" if item.get("alias_of") else "skipped"
+            else:
+                written += 1
+                outcome = "written"
+            TELEMETRY.finish(item["title"], outcome)
+    finally:
+        progress.close()
+        if fetched:
+            save_manifest(manifest)
+        apply_aliases()
+        IMAGE_INFO_CACHE.save()
+    return written, skipped, failed
 
 
 def main() -> None:
@@ -39,6 +477,17 @@ def main() -> None:
         default=CATEGORY_ROOT,
         help="MediaWiki category to crawl (default: Items)",
     )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also crawl pages in subcategories (walked concurrently, listings cached)",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=-1,
+        help="Subcategory depth limit for --recursive (-1 = unlimited)",
+    )
     parser.add_argument(
         "--limit", type=int, default=0, help="Max pages to process (0 = no limit)"
     )
@@ -65,104 +514,142 @@ def main() -> None:
         action="store_true",
         help="Report titles that would be new or updated without extracting",
     )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=EXTRACT_WORKERS,
+        help="Upper bound on concurrent extraction requests (the adaptive window starts lower)",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=LLM_RPM,
+        help="LLM requests-per-minute budget (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=LLM_TPM,
+        help="LLM tokens-per-minute budget (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="Re-normalize stored pages from cached LLM output only (no wiki or API calls)",
+    )
     parser.add_argument(
         "--force",
         action="store_true",
-        help="Re-extract even if cached wikitext has not changed",
+        help="Re-extract even if the page revision has not changed",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help=f"Process only failed titles whose retry is due (backoff per error kind, at most {RETRY_MAX_ATTEMPTS} attempts)",
+    )
+    parser.add_argument(
+        "--shard",
+        default="",
+        help="Process only shard i of N (e.g. 2/4), staged under data/v1/shards/ for collector.shards to merge",
+    )
+    parser.add_argument(
+        "--telemetry",
+        action="store_true",
+        help=f"Log per-title timings, tokens and cost to {TELEMETRY_PATH} and summarize them",
     )
     args = parser.parse_args()
+    if args.telemetry:
+        TELEMETRY.enable()
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
 
+    category_stats: dict = {}
+    revisions: dict = {}
     if args.titles:
-        titles = args.titles
+        titles: Iterable[str] = args.titles
+    elif args.retry_failed:
+        # Read lazily so a --shard run sees the shard's own crawl state.
+        titles = retry_titles()
+        if shard:
+            titles = (title for title in titles if shard_of(title, shard[1]) == shard[0])
+        titles = window_titles(titles, "", 0, args.limit)
     else:
-        titles = list_category_titles(args.category)
-        if args.resume_from and args.resume_from in titles:
-            start_index = titles.index(args.resume_from) + 1
-            titles = titles[start_index:]
-        if args.offset > 0:
-            titles = titles[args.offset:]
-        if args.limit > 0:
-            titles = titles[: args.limit]
+        if args.cache_only:
+            titles = load_manifest()
+        elif args.recursive:
+            titles = iter_category_tree(
+                args.category, max_depth=args.max_depth, stats=category_stats
+            )
+        else:
+            titles = category_titles(args.category, revisions)
+        if shard:
+            titles = (title for title in titles if shard_of(title, shard[1]) == shard[0])
+        titles = window_titles(titles, args.resume_from, args.offset, args.limit)
+    if shard and args.titles:
+        titles = [title for title in titles if shard_of(title, shard[1]) == shard[0]]
 
     if args.count_only:
-        print(f"Titles scheduled: {len(titles)}")
+        print(f"Titles scheduled: {sum(1 for _ in titles)}")
         return
 
-    written = skipped = failed = 0
-    report_new: list[str] = []
-    report_updated: list[str] = []
-    report_missing: list[str] = []
-
-    progress_iter = tqdm(titles, desc="Collecting", disable=args.report)
-    for title in progress_iter:
-        page_url = f"https://dungeon-crawler-carl.fandom.com/wiki/{title.replace(' ', '_')}"
-        raw_path = os.path.join(RAW_DIR, f"{sanitize_title_for_fs(title)}.wikitext.txt")
-        previous_hash = file_hash(raw_path)
-        raw = fetch_wikitext(title)
-        current_hash = file_hash(raw_path)
-        if (
-            not args.force
-            and previous_hash
-            and previous_hash == current_hash
-        ):
-            candidate_output = os.path.join(DATA_DIR, f"{slug(title)}.json")
-            if os.path.exists(candidate_output):
-                skipped += 1
-                continue
-        try:
-            output_path = os.path.join(DATA_DIR, f"{slug(title)}.json")
-            if args.report:
-                if not os.path.exists(output_path):
-                    if previous_hash:
-                        report_missing.append(title)
-                    else:
-                        report_new.append(title)
-                elif args.force or previous_hash != current_hash:
-                    report_updated.append(title)
-                continue
-
-            record = extract_record(title, page_url, raw["wikitext"])
-            base_identifier = record.get("id") or record.get("name") or title
-            record["id"] = slug(base_identifier)
-            record["name"] = record.get("name") or title
-            if not record["id"]:
-                record["id"] = slug(title)
-            with open(output_path, "wb") as handle:
-                handle.write(
-                    orjson.dumps(
-                        record, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
-                    )
-                )
-            written += 1
-        except Exception as exc:  # noqa: BLE001
-            failed += 1
-            os.makedirs(os.path.join("data", "v1", "tmp"), exist_ok=True)
-            with open(
-                os.path.join("data", "v1", "tmp", "failures.txt"),
-                "a",
-                encoding="utf-8",
-            ) as log:
-                log.write(f"{title}\t{type(exc).__name__}: {exc}\n")
-            print(f"[ERROR] {title}: {exc}")
-
     if args.report:
-        if report_new:
-            print("New titles:")
-            for title in report_new:
-                print(f"  + {title}")
-        if report_updated:
-            print("Updated titles:")
-            for title in report_updated:
-                print(f"  * {title}")
-        if report_missing:
-            print("Missing outputs:")
-            for title in report_missing:
-                print(f"  ? {title}")
-        total = len(report_new) + len(report_updated) + len(report_missing)
-        print(f"Report complete. total={total} new={len(report_new)} updated={len(report_updated)} missing={len(report_missing)}")
+        report_titles(titles, force=args.force, revisions=revisions)
         return
 
+    if not args.cache_only and not OPENAI_API_KEY:
+        raise SystemExit("Missing OPENAI_API_KEY in environment")
+    LLM_LIMITER.configure(rpm=args.rpm, tpm=args.tpm)
+    staging = use_shard(*shard) if shard else None
+    written, skipped, failed = process_titles(
+        titles,
+        revisions,
+        force=args.force,
+        extract_workers=args.extract_workers,
+        cache_only=args.cache_only,
+        explicit=bool(args.titles or args.retry_failed),
+    )
+    if staging:
+        counts = {"written": written, "skipped": skipped, "failed": failed}
+        write_shard_manifest(staging, *shard, counts)
+        print(f"Shard {args.shard}: staged in {staging}")
+    LLM_CACHE.prune()
+    if category_stats:
+        print(
+            f"Categories: {len(category_stats['categories'])} "
+            f"(cached={category_stats['cached']} listed={category_stats['listed']})"
+        )
     print(f"Done. written={written} skipped={skipped} failed={failed}")
+    http = get_client().stats
+    print(
+        f"HTTP: requests={http['requests']} bytes={http['bytes']} "
+        f"waited={http['wait_seconds']:.1f}s retries={http['retries']}"
+    )
+    cache = LLM_CACHE.stats
+    print(f"LLM cache: hits={cache['hits']} misses={cache['misses']} writes={cache['writes']}")
+    print_duplicates()
+    if RULE_STATS.outcomes:
+        print(f"Rules: {RULE_STATS.summary()}")
+    if CHUNK_STATS.pages:
+        print(f"Chunks: {CHUNK_STATS.summary()}")
+    if TIER_STATS.tiers["fast"]["pages"]:
+        print(f"Tiers: {TIER_STATS.summary()}")
+    if any(REPAIR_STATS.outcomes.values()):
+        print(f"Validation: {REPAIR_STATS.summary()}")
+    if TRIM_STATS.totals["pages"]:
+        print(f"Trim: {TRIM_STATS.summary()}")
+    limiter = LLM_LIMITER.snapshot()
+    print(
+        f"LLM: requests={limiter['requests']} overloads={limiter['overloads']} "
+        f"window={limiter['limit']:.1f} peak={limiter['peak_limit']:.1f} "
+        f"waited={limiter['wait_seconds']:.1f}s"
+    )
+    if TELEMETRY.finished:
+        print(f"Telemetry ({TELEMETRY.log_path}):")
+        print("\n".join(summary_lines(TELEMETRY.finished)))
 
 
 if __name__ == "__main__":
@@ -1,17 +1,23 @@
 import os
+import threading
 import time
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
-from tenacity import (
-    retry,
-    wait_exponential,
-    stop_after_attempt,
-    retry_if_exception_type,
-)
+from requests.adapters import HTTPAdapter
 
-from collector.config import WIKI_API, USER_AGENT, RATE_LIMIT_SECONDS, RAW_DIR
-from collector.utils import sanitize_title_for_fs
+from collector.config import (
+    WIKI_API,
+    USER_AGENT,
+    RATE_LIMIT_SECONDS,
+    RAW_DIR,
+    MAX_TITLES_PER_REQUEST,
+    MAXLAG_SECONDS,
+    HTTP_MAX_ATTEMPTS,
+    HTTP_POOL_SIZE,
+)
+from collector.rawstore import put_blob
+from collector.utils import batched
 
 os.makedirs(RAW_DIR, exist_ok=True)
 
@@ -20,87 +26,441 @@ class MWError(Exception):
     pass
 
 
-@retry(
-    wait=wait_exponential(multiplier=1, min=1, max=30),
-    stop=stop_after_attempt(5),
-    retry=retry_if_exception_type((requests.HTTPError, MWError)),
-)
-def _get(params: Dict) -> Dict:
-    params = {**params, "format": "json"}
-    response = requests.get(
-        WIKI_API,
-        params=params,
-        headers={"User-Agent": USER_AGENT},
-        timeout=30,
-    )
-    if response.status_code >= 500:
-        raise MWError(f"Server error {response.status_code}")
-    response.raise_for_status()
-    time.sleep(RATE_LIMIT_SECONDS)
-    return response.json()
-
-
-def list_category_titles(category: str) -> List[str]:
-    titles: List[str] = []
-    continuation = None
+class RateLimiter:
+    """Token bucket that spaces request *starts* ``interval`` seconds apart.
+
+    ``backoff`` stretches the interval (up to ``max_interval``) and blocks new
+    requests for a while when the server pushes back; every successful
+    response eases the interval back towards its base value.
+    """
+
+    def __init__(self, interval: float, burst: int = 1, max_interval: float = 30.0) -> None:
+        self.base_interval = interval
+        self.interval = interval
+        self.max_interval = max_interval
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may start; return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.interval > 0:
+                    elapsed = now - self.updated
+                    self.tokens = min(self.burst, self.tokens + elapsed / self.interval)
+                else:
+                    self.tokens = self.burst
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(
+                    self.blocked_until - now,
+                    (1 - self.tokens) * self.interval,
+                )
+            time.sleep(delay)
+            waited += delay
+
+    def backoff(self, delay: float) -> None:
+        with self._lock:
+            self.interval = min(self.max_interval, max(self.interval * 2, self.base_interval))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    def relax(self) -> None:
+        with self._lock:
+            self.interval = max(self.base_interval, self.interval * 0.9)
+
+
+class MediaWikiClient:
+    """Pooled, rate-limited HTTP client for the MediaWiki API.
+
+    Retries server errors, timeouts, HTTP 429 and ``maxlag`` responses,
+    honouring ``Retry-After`` when the server provides it. ``stats`` counts
+    requests, response bytes, seconds spent waiting and retries; ``get`` also
+    adds them to a caller's ``meter`` so a batch can attribute its cost.
+    """
+
+    def __init__(
+        self,
+        api_url: str = WIKI_API,
+        interval: float = RATE_LIMIT_SECONDS,
+        max_attempts: int = HTTP_MAX_ATTEMPTS,
+        pool_size: int = HTTP_POOL_SIZE,
+    ) -> None:
+        self.api_url = api_url
+        self.max_attempts = max_attempts
+        self.limiter = RateLimiter(interval)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.stats = {"requests": 0, "bytes": 0, "wait_seconds": 0.0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: float = 1, meter: Optional[Dict] = None) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+        if meter is not None:
+            meter[key] = meter.get(key, 0) + amount
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    def get(self, params: Dict, meter: Optional[Dict] = None) -> Dict:
+        params = {**params, "format": "json", "maxlag": MAXLAG_SECONDS}
+        last_error: Exception = MWError("no attempts made")
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._count("retries", meter=meter)
+            self._count("wait_seconds", self.limiter.acquire(), meter=meter)
+            fallback_delay = min(30.0, 2.0 ** attempt)
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=30)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                last_error = exc
+                self.limiter.backoff(fallback_delay)
+                continue
+            self._count("requests", meter=meter)
+            self._count("bytes", len(response.content), meter=meter)
+            retry_after = self._retry_after(response)
+            if response.status_code == 429 or response.status_code >= 500:
+                last_error = MWError(f"Server error {response.status_code}")
+                self.limiter.backoff(retry_after if retry_after is not None else fallback_delay)
+                continue
+            response.raise_for_status()
+            data = response.json()
+            error = data.get("error") if isinstance(data, dict) else None
+            if error and error.get("code") == "maxlag":
+                last_error = MWError(f"Replication lag: {error.get('info', '')}")
+                lag = error.get("lag")
+                delay = retry_after if retry_after is not None else float(lag or fallback_delay)
+                self.limiter.backoff(delay)
+                continue
+            if error:
+                raise MWError(f"{error.get('code')}: {error.get('info', '')}")
+            self.limiter.relax()
+            return data
+        raise last_error
+
+
+_client: Optional[MediaWikiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> MediaWikiClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MediaWikiClient()
+        return _client
+
+
+def _get(params: Dict, meter: Optional[Dict] = None) -> Dict:
+    return get_client().get(params, meter)
+
+
+def iter_category_batches(
+    category: str, cmcontinue: Optional[str] = None, cmtype: str = "page"
+) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    """Yield ``(members, next_cmcontinue)`` for each listing request of a category.
+
+    Passing a saved ``cmcontinue`` resumes an interrupted listing.
+    """
+    continuation = cmcontinue
     while True:
         params = {
             "action": "query",
             "list": "categorymembers",
             "cmtitle": f"Category:{category}",
+            "cmtype": cmtype,
             "cmlimit": 500,
         }
         if continuation:
             params["cmcontinue"] = continuation
         data = _get(params)
-        titles.extend(
-            [
-                entry["title"]
-                for entry in data["query"]["categorymembers"]
-                if entry.get("ns") == 0
-            ]
-        )
         continuation = data.get("continue", {}).get("cmcontinue")
+        yield data["query"]["categorymembers"], continuation
         if not continuation:
             break
-    return titles
 
 
-def fetch_wikitext(title: str) -> Dict:
-    data = _get(
-        {
-            "action": "query",
-            "prop": "revisions",
-            "rvprop": "content",
-            "rvslots": "main",
-            "titles": title,
+def fetch_category_info(
+    categories: Iterable[str], batch_size: int = MAX_TITLES_PER_REQUEST
+) -> Dict[str, Dict]:
+    """Return ``{category: {size, pages, files, subcats}}``; unknown categories map to ``{}``."""
+    categories = list(categories)
+    results: Dict[str, Dict] = {}
+    for start in range(0, len(categories), batch_size):
+        batch = categories[start : start + batch_size]
+        requested = {f"Category:{name}": name for name in batch}
+        data = _get(
+            {
+                "action": "query",
+                "prop": "categoryinfo",
+                "titles": "|".join(requested),
+            }
+        )
+        query = data.get("query", {})
+        aliases = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+        pages = {page.get("title"): page for page in query.get("pages", {}).values()}
+        for title, name in requested.items():
+            page = pages.get(_resolve_title(title, aliases)) or {}
+            results[name] = page.get("categoryinfo") or {}
+    return results
+
+
+def _resolve_title(title: str, aliases: Dict[str, str]) -> str:
+    seen = {title}
+    while title in aliases:
+        title = aliases[title]
+        if title in seen:
+            break
+        seen.add(title)
+    return title
+
+
+def _fetch_wikitext_chunk(titles: List[str]) -> Iterator[Dict]:
+    params = {
+        "action": "query",
+        "prop": "revisions",
+        "rvprop": "ids|timestamp|content",
+        "rvslots": "main",
+        "redirects": 1,
+        "titles": "|".join(titles),
+    }
+    aliases: Dict[str, str] = {}
+    pages: Dict[str, Dict] = {}
+    continuation: Dict = {}
+    meter: Dict = {}
+    started = time.monotonic()
+    while True:
+        data = _get({**params, **continuation}, meter)
+        query = data.get("query", {})
+        for entry in query.get("normalized", []) + query.get("redirects", []):
+            aliases[entry["from"]] = entry["to"]
+        for page in query.get("pages", {}).values():
+            known = pages.setdefault(page["title"], page)
+            if page.get("revisions") and not known.get("revisions"):
+                known["revisions"] = page["revisions"]
+        continuation = data.get("continue") or {}
+        if not continuation:
+            break
+    share = len(titles) or 1
+    http = {
+        "http_seconds": (time.monotonic() - started) / share,
+        "http_bytes": meter.get("bytes", 0) / share,
+        "http_wait_seconds": meter.get("wait_seconds", 0.0) / share,
+        "http_retries": meter.get("retries", 0) / share,
+    }
+
+    for title in titles:
+        resolved = _resolve_title(title, aliases)
+        page = pages.get(resolved) or {}
+        revisions = page.get("revisions") or []
+        if "missing" in page or "invalid" in page or not revisions:
+            yield {"title": title, "wikitext": None, "pageid": None, "missing": True, "http": http}
+            continue
+        revision = revisions[0]
+        content = revision["slots"]["main"]["*"]
+        yield {
+            "title": title,
+            "wikitext": content,
+            "pageid": page["pageid"],
+            "revid": revision.get("revid"),
+            "timestamp": revision.get("timestamp"),
+            "resolved_title": resolved,
+            "http": http,
+            **put_blob(content),
         }
-    )
-    pages = data["query"]["pages"]
-    page = next(iter(pages.values()))
-    revision = page["revisions"][0]
-    content = revision["slots"]["main"]["*"]
-    safe_name = sanitize_title_for_fs(title)
-    path = os.path.join(RAW_DIR, f"{safe_name}.wikitext.txt")
-    with open(path, "w", encoding="utf-8") as handle:
-        handle.write(content)
-    return {"title": title, "wikitext": content, "pageid": page["pageid"]}
-
-
-def fetch_image_info(file_title: str) -> Dict:
-    if not file_title:
-        return {}
-    normalized = file_title.strip()
-    if normalized.lower().startswith("file:"):
-        normalized = normalized[5:]
+
+
+def fetch_wikitext_batch(
+    titles: Iterable[str], batch_size: int = MAX_TITLES_PER_REQUEST
+) -> Iterator[Dict]:
+    """Fetch wikitext for many titles, packing up to ``batch_size`` per request.
+
+    Results are yielded in input order as each batch arrives, after the
+    content has been saved to the raw store (``hash``/``size`` are included).
+    Normalized and redirected titles are mapped back to the requested title,
+    and pages that do not exist are yielded with ``missing`` set instead of
+    raising.
+    """
+    for batch in batched(titles, batch_size):
+        yield from _fetch_wikitext_chunk(batch)
+
+
+def _revision_entry(page: Dict) -> Dict:
+    revision = (page.get("revisions") or [{}])[0]
+    return {
+        "pageid": page.get("pageid"),
+        "revid": revision.get("revid"),
+        "timestamp": revision.get("timestamp"),
+    }
+
+
+def iter_category_revisions(category: str) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """Yield ``(title, {pageid, revid, timestamp})`` for every article in a category.
+
+    Members arrive with their revision metadata (``generator=categorymembers``),
+    so a whole category costs one request per 500 articles and needs no
+    separate revision lookups. Each batch is yielded in title order as it
+    arrives; a member without revision data comes with ``None``.
+    """
     params = {
         "action": "query",
-        "titles": f"File:{normalized}",
-       "prop": "imageinfo",
-        "iiprop": "url|mime|size|timestamp|sha1",
+        "generator": "categorymembers",
+        "gcmtitle": f"Category:{category}",
+        "gcmnamespace": 0,
+        "gcmlimit": 500,
+        "prop": "revisions",
+        "rvprop": "ids|timestamp",
     }
-    data = _get(params)
-    pages = data.get("query", {}).get("pages", {})
-    page = next(iter(pages.values()), {})
-    imageinfo = page.get("imageinfo") or []
-    return imageinfo[0] if imageinfo else {}
+    continuation: Dict = {}
+    while True:
+        data = _get({**params, **continuation})
+        pages = sorted(data.get("query", {}).get("pages", {}).values(), key=lambda page: page["title"])
+        for page in pages:
+            yield page["title"], _revision_entry(page) if page.get("revisions") else None
+        continuation = data.get("continue") or {}
+        if not continuation:
+            break
+
+
+def fetch_revisions(
+    titles: Iterable[str], batch_size: int = MAX_TITLES_PER_REQUEST
+) -> Dict[str, Dict]:
+    """Return latest revision metadata keyed by the requested titles.
+
+    Titles that do not exist on the wiki are omitted from the result.
+    """
+    titles = list(titles)
+    revisions: Dict[str, Dict] = {}
+    for start in range(0, len(titles), batch_size):
+        batch = titles[start : start + batch_size]
+        data = _get(
+            {
+                "action": "query",
+                "prop": "revisions",
+                "rvprop": "ids|timestamp",
+                "redirects": 1,
+                "titles": "|".join(batch),
+            }
+        )
+        query = data.get("query", {})
+        aliases = {
+            entry["from"]: entry["to"]
+            for entry in query.get("normalized", []) + query.get("redirects", [])
+        }
+        pages = {page["title"]: page for page in query.get("pages", {}).values()}
+        for title in batch:
+            page = pages.get(_resolve_title(title, aliases)) or {}
+            if page.get("revisions"):
+                revisions[title] = _revision_entry(page)
+    return revisions
+
+
+def fetch_recent_changes(since: str, namespace: int = 0) -> List[Dict]:
+    """Return edits, page creations and delete/move log entries newer than ``since``.
+
+    Changes are ordered oldest first and include ``rcid`` so callers can
+    de-duplicate entries that share the boundary timestamp.
+    """
+    params = {
+        "action": "query",
+        "list": "recentchanges",
+        "rcnamespace": namespace,
+        "rcdir": "newer",
+        "rcstart": since,
+        "rctype": "edit|new|log",
+        "rcprop": "title|ids|timestamp|loginfo",
+        "rclimit": 500,
+    }
+    changes: List[Dict] = []
+    continuation: Dict = {}
+    while True:
+        data = _get({**params, **continuation})
+        changes.extend(data.get("query", {}).get("recentchanges", []))
+        continuation = data.get("continue") or {}
+        if not continuation:
+            break
+    return changes
+
+
+def filter_category_members(
+    titles: Iterable[str], categories: str | Iterable[str], batch_size: int = MAX_TITLES_PER_REQUEST
+) -> List[str]:
+    """Return the subset of ``titles`` that are currently in any of ``categories``."""
+    titles = list(titles)
+    categories = [categories] if isinstance(categories, str) else list(categories)
+    members: set = set()
+    for start in range(0, len(titles), batch_size):
+        batch = titles[start : start + batch_size]
+        for names in batched(categories, MAX_TITLES_PER_REQUEST):
+            data = _get(
+                {
+                    "action": "query",
+                    "prop": "categories",
+                    "clcategories": "|".join(f"Category:{name}" for name in names),
+                    "cllimit": "max",
+                    "titles": "|".join(batch),
+                }
+            )
+            query = data.get("query", {})
+            aliases = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+            pages = {page["title"]: page for page in query.get("pages", {}).values()}
+            for title in batch:
+                if (pages.get(_resolve_title(title, aliases)) or {}).get("categories"):
+                    members.add(title)
+    return [title for title in titles if title in members]
+
+
+def _strip_file_prefix(file_title: str) -> str:
+    normalized = (file_title or "").strip()
+    if normalized.lower().startswith("file:"):
+        normalized = normalized[5:]
+    return normalized
+
+
+def fetch_image_info_batch(
+    file_titles: Iterable[str],
+    batch_size: int = MAX_TITLES_PER_REQUEST,
+    iiprop: str = "url|mime|size|timestamp|sha1",
+) -> Dict[str, Dict]:
+    """Return ``{file_title: imageinfo}`` for many ``File:`` pages at once.
+
+    Keys are the titles as passed in; files without image info map to ``{}``.
+    """
+    names = [name for name in dict.fromkeys(file_titles) if _strip_file_prefix(name)]
+    results: Dict[str, Dict] = {}
+    for start in range(0, len(names), batch_size):
+        batch = names[start : start + batch_size]
+        requested = {f"File:{_strip_file_prefix(name)}": name for name in batch}
+        data = _get(
+            {
+                "action": "query",
+                "titles": "|".join(requested),
+                "prop": "imageinfo",
+                "iiprop": iiprop,
+            }
+        )
+        query = data.get("query", {})
+        aliases = {entry["from"]: entry["to"] for entry in query.get("normalized", [])}
+        pages = {page.get("title"): page for page in query.get("pages", {}).values()}
+        for title, name in requested.items():
+            page = pages.get(_resolve_title(title, aliases)) or {}
+            imageinfo = page.get("imageinfo") or []
+            results[name] = imageinfo[0] if imageinfo else {}
+    return results
@@ -0,0 +1,128 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline with its own worker count and bounded output queue.
+
+    Item stages call ``func(item)`` once per item on ``workers`` threads and
+    drop the item when it returns ``None``. Stream stages (``stream=True``)
+    run ``func`` once on a single thread with an iterator over all inputs and
+    must yield every input item object back exactly once, in any order; this
+    lets a stage batch several inputs into one request.
+
+    Items are dicts. If ``func`` raises, the exception is stored under
+    ``item["error"]`` together with the stage name. Items with an error or a
+    truthy ``skip`` pass straight through later item stages so the sink can
+    account for them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        workers: int = 1,
+        maxsize: int = 8,
+        stream: bool = False,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.workers = 1 if stream else max(1, workers)
+        self.maxsize = maxsize
+        self.stream = stream
+
+
+def _drain(inbox: queue.Queue) -> Iterator[Any]:
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            inbox.put(_DONE)
+            return
+        yield item
+
+
+def _run_item_stage(stage: Stage, inbox: queue.Queue, outbox: queue.Queue) -> None:
+    for item in _drain(inbox):
+        if not item.get("error") and not item.get("skip"):
+            try:
+                item = stage.func(item)
+            except Exception as exc:  # noqa: BLE001
+                item["error"] = exc
+                item["stage"] = stage.name
+        if item is not None:
+            outbox.put(item)
+
+
+def _run_stream_stage(stage: Stage, inbox: queue.Queue, outbox: queue.Queue) -> None:
+    pending: List[Any] = []
+
+    def inputs() -> Iterator[Any]:
+        for item in _drain(inbox):
+            pending.append(item)
+            yield item
+
+    try:
+        for item in stage.func(inputs()):
+            outbox.put(item)
+            for index, candidate in enumerate(pending):
+                if candidate is item:
+                    del pending[index]
+                    break
+    except Exception as exc:  # noqa: BLE001
+        for item in pending + list(_drain(inbox)):
+            item["error"] = exc
+            item["stage"] = stage.name
+            outbox.put(item)
+
+
+def run_pipeline(source: Iterable[Any], stages: List[Stage]) -> Iterator[dict]:
+    """Push ``source`` through ``stages`` concurrently and yield finished items.
+
+    Every stage reads from a bounded queue, so a slow stage applies
+    backpressure to the ones before it. Items come out in completion order.
+    If iterating ``source`` raises, the items it already produced still
+    finish and the exception is then raised from this generator.
+    """
+    queues = [queue.Queue(maxsize=stage.maxsize) for stage in stages]
+    queues.append(queue.Queue(maxsize=stages[-1].maxsize if stages else 0))
+    failure: List[Exception] = []
+
+    def feed() -> None:
+        try:
+            for item in source:
+                queues[0].put(item)
+        except Exception as exc:  # noqa: BLE001
+            failure.append(exc)
+        finally:
+            queues[0].put(_DONE)
+
+    threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+    for index, stage in enumerate(stages):
+        inbox, outbox = queues[index], queues[index + 1]
+        remaining = [stage.workers]
+        lock = threading.Lock()
+
+        def work(stage=stage, inbox=inbox, outbox=outbox, remaining=remaining, lock=lock) -> None:
+            try:
+                if stage.stream:
+                    _run_stream_stage(stage, inbox, outbox)
+                else:
+                    _run_item_stage(stage, inbox, outbox)
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        outbox.put(_DONE)
+
+        for number in range(stage.workers):
+            threads.append(
+                threading.Thread(target=work, name=f"pipeline-{stage.name}-{number}", daemon=True)
+            )
+    for thread in threads:
+        thread.start()
+    yield from _drain(queues[-1])
+    if failure:
+        raise failure[0]
@@ -0,0 +1,187 @@
+import argparse
+import datetime
+import glob
+import gzip
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional
+
+import orjson
+
+from collector.config import (
+    RAW_DIR,
+    RAW_HISTORY_PATH,
+    RAW_OBJECTS_DIR,
+    REVISION_MANIFEST_PATH,
+)
+from collector.utils import sanitize_title_for_fs, write_json_atomic
+
+MANIFEST_FIELDS = ("pageid", "revid", "timestamp", "hash", "size", "fetched_at")
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+_objects_dir = RAW_OBJECTS_DIR
+
+
+def use_objects(path: str) -> None:
+    """Store new blobs under ``path`` from now on (sharded runs stage their own).
+
+    Blobs already in ``RAW_OBJECTS_DIR`` are still read from there.
+    """
+    global _objects_dir
+    _objects_dir = path
+
+
+def blob_path(digest: str, root: Optional[str] = None) -> str:
+    return os.path.join(root or _objects_dir, digest[:2], f"{digest}.wikitext.gz")
+
+
+def _find_blob(digest: str) -> Optional[str]:
+    for root in dict.fromkeys((_objects_dir, RAW_OBJECTS_DIR)):
+        path = blob_path(digest, root)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def legacy_raw_path(title: str) -> str:
+    return os.path.join(RAW_DIR, f"{sanitize_title_for_fs(title)}.wikitext.txt")
+
+
+def put_blob(content: str) -> Dict:
+    """Store ``content`` once under its SHA-256 and return ``{hash, size}``.
+
+    Identical pages (redirect targets, aliases, re-fetches of an unchanged
+    revision) share one compressed blob.
+    """
+    digest = content_hash(content)
+    path = blob_path(digest)
+    if _find_blob(digest) is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as handle:
+                handle.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return {"hash": digest, "size": len(content.encode("utf-8"))}
+
+
+def read_blob(digest: str) -> Optional[str]:
+    path = _find_blob(digest)
+    if path is None:
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return handle.read()
+
+
+_manifest_path = REVISION_MANIFEST_PATH
+_manifest_cache: Optional[Dict[str, Dict]] = None
+
+
+def use_manifest(path: str) -> None:
+    """Read and write the revisions manifest at ``path`` from now on (sharded runs stage their own)."""
+    global _manifest_path, _manifest_cache
+    _manifest_path = path
+    _manifest_cache = None
+
+
+def load_manifest(path: Optional[str] = None) -> Dict[str, Dict]:
+    """Return ``{title: {pageid, revid, timestamp, hash, size, fetched_at}}``."""
+    path = path or _manifest_path
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as handle:
+        return orjson.loads(handle.read())
+
+
+def save_manifest(manifest: Dict[str, Dict], path: Optional[str] = None) -> None:
+    write_json_atomic(path or _manifest_path, manifest)
+
+
+def record_revision(manifest: Dict[str, Dict], title: str, raw: Dict) -> Dict:
+    """Point ``title`` at a freshly fetched revision, archiving the one it replaces."""
+    entry = {key: raw.get(key) for key in MANIFEST_FIELDS if key in raw}
+    entry.setdefault(
+        "fetched_at",
+        datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    )
+    previous = manifest.get(title)
+    if previous and previous.get("hash") and previous.get("hash") != entry.get("hash"):
+        os.makedirs(os.path.dirname(RAW_HISTORY_PATH), exist_ok=True)
+        with open(RAW_HISTORY_PATH, "ab") as handle:
+            handle.write(orjson.dumps({"title": title, **previous}) + b"\n")
+    manifest[title] = entry
+    return entry
+
+
+def read_raw(title: str, manifest: Optional[Dict[str, Dict]] = None) -> Optional[str]:
+    """Return the stored wikitext for ``title`` from the blob store or a legacy file."""
+    global _manifest_cache
+    if manifest is None:
+        if _manifest_cache is None:
+            _manifest_cache = load_manifest()
+        manifest = _manifest_cache
+    digest = (manifest.get(title) or {}).get("hash")
+    if digest:
+        content = read_blob(digest)
+        if content is not None:
+            return content
+    path = legacy_raw_path(title)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as handle:
+            return handle.read()
+    return None
+
+
+def migrate_legacy_files(manifest: Dict[str, Dict]) -> int:
+    """Move ``<title>.wikitext.txt`` files into the blob store; return how many moved.
+
+    Titles are recovered from the manifest, so only files that belong to a
+    known title are migrated.
+    """
+    by_path = {legacy_raw_path(title): title for title in manifest}
+    migrated = 0
+    for path in glob.glob(os.path.join(RAW_DIR, "*.wikitext.txt")):
+        title = by_path.get(path)
+        if title is None:
+            continue
+        with open(path, "r", encoding="utf-8") as handle:
+            blob = put_blob(handle.read())
+        manifest[title] = {**manifest[title], **blob}
+        os.remove(path)
+        migrated += 1
+    return migrated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect or migrate the raw wikitext store")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Move legacy .wikitext.txt files into the content-addressed store",
+    )
+    args = parser.parse_args()
+    manifest = load_manifest()
+    if args.migrate:
+        migrated = migrate_legacy_files(manifest)
+        save_manifest(manifest)
+        print(f"Migrated {migrated} legacy file(s)")
+    hashes = {entry.get("hash") for entry in manifest.values() if entry.get("hash")}
+    blobs = glob.glob(os.path.join(RAW_OBJECTS_DIR, "*", "*.wikitext.gz"))
+    stored = sum(os.path.getsize(path) for path in blobs)
+    logical = sum(entry.get("size") or 0 for entry in manifest.values())
+    print(
+        f"titles={len(manifest)} unique={len(hashes)} blobs={len(blobs)} "
+        f"logical_bytes={logical} stored_bytes={stored}"
+    )
+
+
+if __name__ == "__main__":
+    main()
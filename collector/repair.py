@@ -0,0 +1,161 @@
+import copy
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator, ValidationError
+
+MAX_FIX_PASSES = 5
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+TRUE_WORDS = {"true", "yes", "y", "1"}
+FALSE_WORDS = {"false", "no", "n", "0"}
+
+
+def format_path(path) -> str:
+    return "/".join(str(part) for part in path) or "(root)"
+
+
+def describe_errors(errors: List["ValidationError"]) -> List[str]:
+    return [f"{format_path(err.absolute_path)}: {err.message}" for err in errors]
+
+
+def _types(schema: Dict) -> List[str]:
+    value = schema.get("type", [])
+    return [value] if isinstance(value, str) else list(value)
+
+
+def coerce_value(value: Any, types: List[str]) -> Tuple[bool, Any]:
+    """Try to convert ``value`` to one of the JSON ``types``; return ``(ok, value)``."""
+    for kind in types:
+        if kind in ("number", "integer") and isinstance(value, str):
+            match = NUMBER_RE.search(value)
+            if match:
+                number = float(match.group(0))
+                if kind == "integer":
+                    if number.is_integer():
+                        return True, int(number)
+                    continue
+                return True, int(number) if number.is_integer() else number
+        if kind == "integer" and isinstance(value, float) and value.is_integer():
+            return True, int(value)
+        if kind == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return True, str(value)
+        if kind == "string" and isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return True, ", ".join(value)
+        if kind == "boolean" and isinstance(value, str):
+            word = value.strip().lower()
+            if word in TRUE_WORDS:
+                return True, True
+            if word in FALSE_WORDS:
+                return True, False
+        if kind == "array":
+            if value is None:
+                return True, []
+            if not isinstance(value, (list, dict)):
+                return True, [value]
+    if "null" in types:
+        return True, None
+    return False, value
+
+
+def _container(root: Any, path: List) -> Any:
+    node = root
+    for part in path:
+        node = node[part]
+    return node
+
+
+def _fix_error(payload: Dict, err: "ValidationError") -> str | None:
+    """Apply one deterministic fix for ``err`` in place; return its kind or ``None``."""
+    path = list(err.absolute_path)
+    keyword = err.validator
+    try:
+        if keyword == "additionalProperties":
+            target = _container(payload, path)
+            allowed = set(err.schema.get("properties", {}))
+            extras = [key for key in target if key not in allowed]
+            for key in extras:
+                del target[key]
+            return "drop_unknown_keys" if extras else None
+        if not path:
+            return None
+        parent = _container(payload, path[:-1])
+        key = path[-1]
+        if keyword == "type":
+            ok, value = coerce_value(err.instance, _types(err.schema))
+            if ok:
+                parent[key] = value
+                return "coerce_type"
+            return None
+        if keyword == "enum":
+            options = err.validator_value
+            wanted = re.sub(r"[^a-z0-9]+", "", str(err.instance).lower())
+            for option in options:
+                if isinstance(option, str) and re.sub(r"[^a-z0-9]+", "", option.lower()) == wanted:
+                    parent[key] = option
+                    return "coerce_enum"
+            if None in options or "null" in _types(err.schema):
+                parent[key] = None
+                return "null_enum"
+            return None
+        if keyword in ("minimum", "maximum") and isinstance(err.instance, (int, float)):
+            parent[key] = err.validator_value
+            return "clamp"
+        if keyword == "const":
+            parent[key] = err.validator_value
+            return "const"
+    except (KeyError, IndexError, TypeError):
+        return None
+    return None
+
+
+def schema_fix(
+    payload: Dict, validator: "Draft202012Validator"
+) -> Tuple[Dict, List[str], List["ValidationError"]]:
+    """Repair what the schema alone can decide: unknown keys, wrong types, bad enums.
+
+    Returns a fixed copy of ``payload``, the kinds of fixes applied and the
+    validation errors that remain.
+    """
+    payload = copy.deepcopy(payload)
+    applied: List[str] = []
+    errors = list(validator.iter_errors(payload))
+    for _ in range(MAX_FIX_PASSES):
+        if not errors:
+            break
+        fixed = False
+        for err in sorted(errors, key=lambda item: len(item.absolute_path), reverse=True):
+            kind = _fix_error(payload, err)
+            if kind:
+                applied.append(kind)
+                fixed = True
+        if not fixed:
+            break
+        errors = list(validator.iter_errors(payload))
+    return payload, applied, errors
+
+
+class RepairStats:
+    """How each extracted record became valid: as returned, by schema fixes, by a repair request."""
+
+    def __init__(self) -> None:
+        self.outcomes = {"clean": 0, "schema_fixed": 0, "llm_repaired": 0, "failed": 0}
+        self.fixes: Dict[str, int] = {}
+        self.repair_requests = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, fixes: List[str] = (), repair_requests: int = 0) -> None:
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.repair_requests += repair_requests
+            for kind in fixes:
+                self.fixes[kind] = self.fixes.get(kind, 0) + 1
+
+    def summary(self) -> str:
+        outcomes = " ".join(f"{key}={value}" for key, value in self.outcomes.items())
+        fixes = ",".join(f"{key}:{value}" for key, value in sorted(self.fixes.items())) or "-"
+        return f"{outcomes} repair_requests={self.repair_requests} fixes={fixes}"
+
+
+REPAIR_STATS = RepairStats()
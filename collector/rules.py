@@ -0,0 +1,173 @@
+import argparse
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+
+from collector.extractor_openai import (
+    STAT_ALIASES,
+    canonical_kind,
+    extract_ai_description,
+    extract_effect_details_from_wikitext,
+    extract_file_titles,
+    extract_infobox_effects,
+    extract_intro_description,
+    extract_type_tokens,
+    normalize_effect_name,
+    normalize_payload,
+    stamp_record,
+    strip_wikitext,
+)
+from collector.rawstore import load_manifest, read_raw
+from collector.schema import schema_validator
+from collector.trim import trim_wikitext
+from collector.wikitext import HEADING_RE
+
+RULES_CONFIDENCE = 0.9
+RULES_SECTIONS = {"ai description", "description"}
+STAT_BULLET_RE = re.compile(r"^([+-]?\d+(?:\.\d+)?)\s*(%?)\s*(?:to\s+)?([A-Za-z]+)\.?$")
+
+
+def stat_effect(text: str) -> Dict[str, Any] | None:
+    """Build an effect for a bullet that is nothing but a stat bonus, e.g. ``+3 Strength``."""
+    match = STAT_BULLET_RE.match(text)
+    if not match:
+        return None
+    token = match.group(3).lower()
+    stat = STAT_ALIASES.get(token) or STAT_ALIASES.get(token.rstrip("s"))
+    if not stat:
+        return None
+    value = float(match.group(1))
+    if match.group(2) == "%":
+        modifier = {"stat": stat, "op": "mul", "value": 1 + value / 100.0, "stack_rule": None}
+    else:
+        number: float | int = int(value) if value.is_integer() else value
+        modifier = {"stat": stat, "op": "add", "value": number, "stack_rule": None}
+    return {
+        "name": text,
+        "trigger": {"event": "unspecified", "conditions": []},
+        "chance": None,
+        "modifiers": [modifier],
+        "outcomes": [],
+    }
+
+
+def classify(page_text: str) -> Tuple[Dict[str, Any] | None, str]:
+    """Return ``(fields, "rules")`` for a page simple enough to extract without the LLM,
+    or ``(None, reason)`` naming the first check it failed."""
+    tokens = extract_type_tokens(page_text)
+    if not tokens:
+        return None, "no_type"
+    kind = canonical_kind(tokens)
+    if not kind:
+        return None, "unknown_kind"
+    body = extract_infobox_effects(page_text) or ""
+    if "UPGRADED" in body:
+        return None, "upgraded_effects"
+    effects: List[Dict[str, Any]] = []
+    for line in body.splitlines():
+        text = strip_wikitext(line.strip().lstrip("*").strip())
+        if not text:
+            continue
+        effect = stat_effect(text) if line.strip().startswith("*") else None
+        if effect is None:
+            return None, "complex_effects"
+        effects.append(effect)
+    trimmed = trim_wikitext(page_text)
+    known = {normalize_effect_name(effect["name"]) for effect in effects}
+    if set(extract_effect_details_from_wikitext(trimmed)) - known:
+        return None, "effect_details"
+    for line in trimmed.splitlines():
+        heading = HEADING_RE.match(line.strip())
+        if heading and heading.group(2).strip().lower() not in RULES_SECTIONS:
+            return None, "extra_sections"
+    description = extract_intro_description(page_text)
+    if not description:
+        return None, "no_description"
+    fields = {
+        "kind": kind,
+        "kind_detail": tokens,
+        "description": description,
+        "ai_description": extract_ai_description(page_text),
+        "effects": effects,
+        "rules_text": "; ".join(effect["name"] for effect in effects) or None,
+    }
+    return fields, "rules"
+
+
+class RuleStats:
+    def __init__(self) -> None:
+        self.outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def summary(self) -> str:
+        fast = self.outcomes.get("rules", 0)
+        total = sum(self.outcomes.values())
+        reasons = ",".join(
+            f"{key}:{value}" for key, value in sorted(self.outcomes.items()) if key != "rules"
+        )
+        return f"fast={fast} llm={total - fast} ({reasons or '-'})"
+
+
+RULE_STATS = RuleStats()
+
+
+def extract_rule_based(page_title: str, page_url: str, page_text: str) -> Dict[str, Any] | None:
+    """Build a schema-valid record from the infobox alone, or return ``None``.
+
+    Only pages whose type maps to a kind, whose infobox effects are plain
+    ``+N Stat`` bullets and which have no other effect text or sections
+    beyond the description qualify. Everything else goes to the LLM.
+    """
+    fields, outcome = classify(page_text)
+    record = None
+    if fields is not None:
+        files = extract_file_titles(page_text)
+        payload = {
+            "name": page_title,
+            **fields,
+            "images": [{"type": "icon", "src": files[0], "alt": page_title}] if files else [],
+            "provenance": {
+                "source_type": "wiki",
+                "source_ref": page_url,
+                "extraction_method": "rules",
+                "extraction_notes": "Parsed from the infobox without the LLM",
+                "confidence": RULES_CONFIDENCE,
+            },
+        }
+        record = normalize_payload(payload, page_title, page_url, page_text, files)
+        if schema_validator().is_valid(record):
+            stamp_record(record, "rules")
+        else:
+            record, outcome = None, "invalid"
+    RULE_STATS.record(outcome)
+    return record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Report which stored pages the rule-based fast path can extract"
+    )
+    parser.add_argument("--title", dest="titles", action="append", help="Page title (repeatable)")
+    parser.add_argument("--list", action="store_true", help="Print the outcome for every page")
+    args = parser.parse_args()
+    manifest = load_manifest()
+    outcomes: Dict[str, int] = {}
+    for title in args.titles or sorted(manifest):
+        wikitext = read_raw(title, manifest)
+        if wikitext is None:
+            continue
+        _, outcome = classify(wikitext)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if args.list:
+            print(f"{outcome:<16} {title}")
+    total = sum(outcomes.values())
+    for outcome, count in sorted(outcomes.items(), key=lambda item: -item[1]):
+        print(f"{outcome:<16} {count:>5}  {count / total:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+from collector.config import SCHEMA_PATH, SCHEMA_SNAPSHOT_DIR
+from collector.llmcache import fingerprint
+from collector.utils import write_json_atomic
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
+
+_lock = threading.Lock()
+_schemas: Dict[str, Dict[str, Any]] = {}
+_validators: Dict[str, "Draft202012Validator"] = {}
+_digests: Dict[str, str] = {}
+
+
+def load_schema(path: str = SCHEMA_PATH) -> Dict[str, Any]:
+    """The record schema at ``path``, read on first use and shared afterwards."""
+    with _lock:
+        if path not in _schemas:
+            with open(path, "r", encoding="utf-8") as handle:
+                _schemas[path] = json.load(handle)
+        return _schemas[path]
+
+
+def schema_validator(path: str = SCHEMA_PATH) -> "Draft202012Validator":
+    """A compiled validator for the schema at ``path``, built once per process."""
+    schema = load_schema(path)
+    with _lock:
+        if path not in _validators:
+            from jsonschema import Draft202012Validator
+
+            _validators[path] = Draft202012Validator(schema)
+        return _validators[path]
+
+
+def schema_fingerprint(schema: Optional[Dict[str, Any]] = None) -> str:
+    """Short hash of ``schema`` (default: the current record schema, hashed once)."""
+    if schema is not None:
+        return fingerprint(schema)[:16]
+    if SCHEMA_PATH not in _digests:
+        _digests[SCHEMA_PATH] = fingerprint(load_schema())[:16]
+    return _digests[SCHEMA_PATH]
+
+
+def save_schema_snapshot(
+    schema: Optional[Dict[str, Any]] = None, directory: str = SCHEMA_SNAPSHOT_DIR
+) -> str:
+    """Keep a copy of ``schema`` (default: the current one) under its fingerprint; return it."""
+    if schema is None:
+        schema = load_schema()
+    digest = schema_fingerprint(schema)
+    path = os.path.join(directory, f"{digest}.json")
+    if not os.path.exists(path):
+        write_json_atomic(path, schema)
+    return digest
+
+
+def load_schema_snapshot(digest: str, directory: str = SCHEMA_SNAPSHOT_DIR) -> Optional[Dict[str, Any]]:
+    if digest == schema_fingerprint():
+        return load_schema()
+    path = os.path.join(directory, f"{digest}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def schema_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Set[str]]:
+    """Top-level properties whose sub-schema differs between ``old`` and ``new``.
+
+    Returns ``None`` when the change is not confined to existing properties
+    (a property was added, or ``required`` or another root keyword changed),
+    since that can alter any record.
+    """
+    old_root = {key: value for key, value in old.items() if key != "properties"}
+    new_root = {key: value for key, value in new.items() if key != "properties"}
+    old_properties, new_properties = old.get("properties") or {}, new.get("properties") or {}
+    if old_root != new_root or new_properties.keys() - old_properties.keys():
+        return None
+    return {key for key, value in old_properties.items() if new_properties.get(key) != value}
@@ -0,0 +1,310 @@
+import argparse
+import datetime
+import hashlib
+import os
+import shutil
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from collector.config import (
+    ALIASES_PATH,
+    DATA_DIR,
+    RAW_OBJECTS_DIR,
+    REVISION_MANIFEST_PATH,
+    SHARD_REPORT_PATH,
+    SHARDS_DIR,
+    STATE_DB_PATH,
+)
+from collector.rawstore import blob_path, load_manifest, save_manifest
+from collector.state import CrawlState, output_hash
+from collector.utils import write_json_atomic
+
+SHARD_MANIFEST = "shard.json"
+
+
+def utc_now() -> str:
+    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse ``"i/N"`` (1-based) into ``(i, N)``."""
+    index, _, count = spec.partition("/")
+    try:
+        index_number, count_number = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"shard must look like i/N, got {spec!r}") from None
+    if count_number < 1 or not 1 <= index_number <= count_number:
+        raise ValueError(f"shard index must be between 1 and N, got {spec!r}")
+    return index_number, count_number
+
+
+def shard_of(title: str, count: int) -> int:
+    """The 1-based shard of ``title``; the same on every host and Python version."""
+    digest = hashlib.sha256(title.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def shard_dir(index: int, count: int, root: str = SHARDS_DIR) -> str:
+    return os.path.join(root, f"{index}-of-{count}")
+
+
+def _read_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, "rb") as handle:
+        return orjson.loads(handle.read())
+
+
+def prepare_staging(index: int, count: int) -> str:
+    """Create the shard's staging directory and seed it from the main tree.
+
+    The first time, the revisions manifest, crawl state and alias index are
+    copied for this shard's titles only, so unchanged pages are still
+    skipped. Records and raw blobs are not copied: the staging ``items/``
+    and ``objects/`` directories only receive what this shard writes.
+    """
+    root = shard_dir(index, count)
+    os.makedirs(os.path.join(root, "items"), exist_ok=True)
+    os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def mine(title: str) -> bool:
+        return shard_of(title, count) == index
+
+    manifest_path = os.path.join(root, "revisions.json")
+    if not os.path.exists(manifest_path):
+        manifest = load_manifest(REVISION_MANIFEST_PATH)
+        save_manifest({title: entry for title, entry in manifest.items() if mine(title)}, manifest_path)
+    CrawlState(os.path.join(root, "state.sqlite")).import_rows(STATE_DB_PATH, mine, only_if_empty=True)
+    aliases_path = os.path.join(root, "aliases.json")
+    if not os.path.exists(aliases_path):
+        aliases = _read_json(ALIASES_PATH, {})
+        write_json_atomic(aliases_path, {alias: canonical for alias, canonical in aliases.items() if mine(alias)})
+    return root
+
+
+def write_shard_manifest(root: str, index: int, count: int, counts: Dict[str, int]) -> Dict:
+    """Describe the staged records and failing titles of a shard in ``root/shard.json``."""
+    state = CrawlState(os.path.join(root, "state.sqlite"))
+    connection = state.connect()
+    titles_by_hash = {
+        row["output_hash"]: row["title"]
+        for row in connection.execute("SELECT title, output_hash FROM titles WHERE output_hash IS NOT NULL")
+    }
+    records = {}
+    items_dir = os.path.join(root, "items")
+    for name in sorted(os.listdir(items_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(items_dir, name), "rb") as handle:
+            data = handle.read()
+        digest = output_hash(data)
+        records[name] = {
+            "id": orjson.loads(data).get("id"),
+            "title": titles_by_hash.get(digest),
+            "output_hash": digest,
+        }
+    failures = {
+        row["title"]: {key: row[key] for key in ("error_class", "error", "stage", "attempts")}
+        for row in connection.execute("SELECT * FROM titles WHERE error_class IS NOT NULL ORDER BY title")
+    }
+    manifest = {
+        "shard": f"{index}/{count}",
+        "index": index,
+        "count": count,
+        "finished_at": utc_now(),
+        "counts": counts,
+        "records": records,
+        "failures": failures,
+    }
+    write_json_atomic(os.path.join(root, SHARD_MANIFEST), manifest)
+    return manifest
+
+
+def _main_ids(items_dir: str) -> Dict[str, str]:
+    ids = {}
+    if not os.path.isdir(items_dir):
+        return ids
+    for name in os.listdir(items_dir):
+        if name.endswith(".json"):
+            with open(os.path.join(items_dir, name), "rb") as handle:
+                ids[name] = orjson.loads(handle.read()).get("id")
+    return ids
+
+
+def _copy_blobs(root: str, revisions: Dict[str, Dict]) -> List[str]:
+    """Copy the blobs ``revisions`` refer to from the shard's ``objects/``; return titles still missing one."""
+    missing = []
+    for title, entry in revisions.items():
+        digest = entry.get("hash")
+        if not digest:
+            continue
+        target = blob_path(digest, RAW_OBJECTS_DIR)
+        if os.path.exists(target):
+            continue
+        source = blob_path(digest, os.path.join(root, "objects"))
+        if not os.path.exists(source):
+            missing.append(title)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+    return missing
+
+
+def merge_shards(root: str = SHARDS_DIR, items_dir: str = DATA_DIR, dry_run: bool = False) -> Dict:
+    """Merge every staged shard under ``root`` into the main tree and return the report.
+
+    A file name (the title slug) staged by more than one shard, or a record
+    ``id`` used by two different files (across shards or against the
+    records already in ``items_dir``), is a collision: those records are
+    left in staging and listed in the report. Ids that the same files
+    already shared before the merge are reported as ``preexisting`` and do
+    not block. Everything else is copied,
+    and the shards' revisions, crawl state and aliases replace the main
+    entries for their titles. The raw blobs those revisions refer to are
+    copied from each shard's ``objects/`` into ``RAW_OBJECTS_DIR``; titles
+    whose blob is in neither are reported under ``missing_blobs``.
+    """
+    shards = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        manifest = _read_json(os.path.join(root, name, SHARD_MANIFEST), None)
+        if manifest:
+            shards.append((os.path.join(root, name), manifest))
+    if not shards:
+        raise SystemExit(f"No shard manifests under {root}")
+    counts = sorted({manifest["count"] for _, manifest in shards})
+    expected = {(index, count) for count in counts for index in range(1, count + 1)}
+    present = {(manifest["index"], manifest["count"]) for _, manifest in shards}
+
+    staged: Dict[str, List[Tuple[str, Dict]]] = {}
+    for path, manifest in shards:
+        for name, record in manifest["records"].items():
+            staged.setdefault(name, []).append((path, {**record, "shard": manifest["shard"]}))
+    existing: Dict[str, set] = {}
+    owners: Dict[str, set] = {}
+    for name, record_id in _main_ids(items_dir).items():
+        existing.setdefault(record_id, set()).add(name)
+        if name not in staged and record_id:
+            owners.setdefault(record_id, set()).add(name)
+    for name, entries in staged.items():
+        for _, record in entries:
+            if record["id"]:
+                owners.setdefault(record["id"], set()).add(name)
+
+    collisions: List[Dict] = []
+    blocked = set()
+    for name, entries in sorted(staged.items()):
+        if len(entries) > 1:
+            collisions.append(
+                {"kind": "slug", "file": name, "shards": [record["shard"] for _, record in entries],
+                 "titles": [record["title"] for _, record in entries]}
+            )
+            blocked.add(name)
+    for record_id, names in sorted(owners.items()):
+        if len(names) > 1 and names & staged.keys():
+            known = names <= existing.get(record_id, set())
+            collisions.append({"kind": "id", "id": record_id, "files": sorted(names), "preexisting": known})
+            if not known:
+                blocked.update(name for name in names if name in staged)
+
+    merged = unchanged = 0
+    blocked_titles = set()
+    for name, entries in sorted(staged.items()):
+        path, record = entries[0]
+        if name in blocked:
+            blocked_titles.update(record["title"] for _, record in entries if record["title"])
+            continue
+        source = os.path.join(path, "items", name)
+        target = os.path.join(items_dir, name)
+        if os.path.exists(target):
+            with open(target, "rb") as handle:
+                if output_hash(handle.read()) == record["output_hash"]:
+                    unchanged += 1
+                    continue
+        merged += 1
+        if not dry_run:
+            os.makedirs(items_dir, exist_ok=True)
+            shutil.copyfile(source, target)
+
+    missing_blobs: List[str] = []
+    if not dry_run:
+        revisions = load_manifest(REVISION_MANIFEST_PATH)
+        aliases = _read_json(ALIASES_PATH, {})
+        state = CrawlState(STATE_DB_PATH)
+        for path, shard in shards:
+            def mine(title: str, shard=shard) -> bool:
+                return shard_of(title, shard["count"]) == shard["index"] and title not in blocked_titles
+
+            staged_revisions = {
+                title: entry
+                for title, entry in load_manifest(os.path.join(path, "revisions.json")).items()
+                if mine(title)
+            }
+            missing_blobs += _copy_blobs(path, staged_revisions)
+            revisions.update(staged_revisions)
+            aliases = {alias: canonical for alias, canonical in aliases.items() if not mine(alias)}
+            aliases.update(
+                (alias, canonical)
+                for alias, canonical in _read_json(os.path.join(path, "aliases.json"), {}).items()
+                if mine(alias)
+            )
+            state.import_rows(os.path.join(path, "state.sqlite"), mine)
+        save_manifest(revisions, REVISION_MANIFEST_PATH)
+        write_json_atomic(ALIASES_PATH, aliases)
+
+    report = {
+        "merged_at": utc_now(),
+        "dry_run": dry_run,
+        "shards": {manifest["shard"]: manifest["counts"] for _, manifest in shards},
+        "missing_shards": [f"{index}/{count}" for index, count in sorted(expected - present)],
+        "records": {"staged": len(staged), "merged": merged, "unchanged": unchanged, "blocked": len(blocked)},
+        "collisions": collisions,
+        "missing_blobs": sorted(missing_blobs),
+        "failures": {
+            title: {**failure, "shard": manifest["shard"]}
+            for _, manifest in shards
+            for title, failure in manifest["failures"].items()
+        },
+    }
+    if not dry_run:
+        write_json_atomic(SHARD_REPORT_PATH, report)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge staged shard crawls into data/v1/items")
+    parser.add_argument("--root", default=SHARDS_DIR, help="Directory holding the shard staging directories")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be merged without writing")
+    args = parser.parse_args()
+    report = merge_shards(args.root, dry_run=args.dry_run)
+    if not args.dry_run:
+        # Shards only group duplicates among their own titles.
+        from collector.main import reconcile_aliases
+
+        report["aliases"] = reconcile_aliases()
+        write_json_atomic(SHARD_REPORT_PATH, report)
+    for shard, counts in sorted(report["shards"].items()):
+        print(f"Shard {shard}: " + " ".join(f"{key}={value}" for key, value in counts.items()))
+    if report["missing_shards"]:
+        print(f"Missing shards: {', '.join(report['missing_shards'])}")
+    print("Records: " + " ".join(f"{key}={value}" for key, value in report["records"].items()))
+    print(f"Failures: {len(report['failures'])}")
+    if report["missing_blobs"]:
+        print(f"Missing raw blobs: {len(report['missing_blobs'])} (copy each shard's objects/ before merging)")
+    if "aliases" in report:
+        print(f"Aliases applied after merge: {report['aliases']}")
+    for collision in report["collisions"]:
+        if collision["kind"] == "slug":
+            print(f"  slug collision {collision['file']}: {', '.join(map(str, collision['titles']))} ({', '.join(collision['shards'])})")
+        else:
+            note = " (preexisting)" if collision["preexisting"] else ""
+            print(f"  id collision {collision['id']}: {', '.join(collision['files'])}{note}")
+    if not args.dry_run:
+        print(f"Report: {SHARD_REPORT_PATH}")
+    if report["records"]["blocked"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from collector.config import STATE_DB_PATH
+from collector.utils import batched
+
+TABLE = """
+CREATE TABLE IF NOT EXISTS titles (
+    title TEXT PRIMARY KEY,
+    revid INTEGER,
+    raw_hash TEXT,
+    model TEXT,
+    fingerprint TEXT,
+    output_hash TEXT,
+    last_success TEXT,
+    last_failure TEXT,
+    error_class TEXT,
+    error_kind TEXT,
+    error TEXT,
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_eligible TEXT,
+    updated_at TEXT
+)
+"""
+# Columns added after the table was first released, created on open.
+ADDED_COLUMNS = {"error_kind": "TEXT", "next_eligible": "TEXT"}
+INDEXES = """
+CREATE INDEX IF NOT EXISTS titles_raw_hash ON titles (raw_hash);
+CREATE INDEX IF NOT EXISTS titles_fingerprint ON titles (fingerprint);
+CREATE INDEX IF NOT EXISTS titles_failure ON titles (error_class, last_failure);
+CREATE INDEX IF NOT EXISTS titles_retry ON titles (next_eligible) WHERE error_class IS NOT NULL;
+"""
+# SQLite's default limit on bound parameters is 999 in older builds.
+QUERY_BATCH = 500
+
+
+def _now(delay: float = 0.0) -> str:
+    moment = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+    return moment.replace(microsecond=0).isoformat() + "Z"
+
+
+def output_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class CrawlState:
+    """One SQLite row per title: what was fetched, what produced its record and how it last failed.
+
+    Each thread gets its own connection. The database runs in WAL mode with
+    a busy timeout, and every update is a single short transaction, so the
+    pipeline's worker threads and several crawl processes can write
+    concurrently. The raw store manifest still maps titles to blobs; this
+    table answers the planning questions (is the record current, which
+    titles failed) without touching the filesystem.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ready: set = set()
+
+    def connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or getattr(self._local, "path", None) != self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                if self.path not in self._ready:
+                    connection.executescript(TABLE)
+                    present = {row["name"] for row in connection.execute("PRAGMA table_info(titles)")}
+                    for name, kind in ADDED_COLUMNS.items():
+                        if name not in present:
+                            connection.execute(f"ALTER TABLE titles ADD COLUMN {name} {kind}")
+                    connection.executescript(INDEXES)
+                    self._ready.add(self.path)
+            self._local.connection = connection
+            self._local.path = self.path
+        return connection
+
+    def _upsert(self, title: str, **fields) -> None:
+        fields["updated_at"] = _now()
+        names = ", ".join(fields)
+        marks = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in fields)
+        with self.connect() as connection:
+            connection.execute(
+                f"INSERT INTO titles (title, {names}) VALUES (?, {marks}) "
+                f"ON CONFLICT (title) DO UPDATE SET {updates}",
+                (title, *fields.values()),
+            )
+
+    def rows(self, titles: Iterable[str]) -> Dict[str, Dict]:
+        """``{title: row}`` for the known ``titles``, looked up by primary key."""
+        found: Dict[str, Dict] = {}
+        connection = self.connect()
+        for batch in batched(titles, QUERY_BATCH):
+            marks = ", ".join("?" for _ in batch)
+            for row in connection.execute(f"SELECT * FROM titles WHERE title IN ({marks})", batch):
+                found[row["title"]] = dict(row)
+        return found
+
+    def has_output(self, title: str) -> bool:
+        row = self.connect().execute(
+            "SELECT output_hash FROM titles WHERE title = ?", (title,)
+        ).fetchone()
+        return bool(row and row["output_hash"])
+
+    def record_fetch(self, title: str, revid: Optional[int], raw_hash: Optional[str]) -> None:
+        self._upsert(title, revid=revid, raw_hash=raw_hash)
+
+    def record_success(
+        self, title: str, model: Optional[str], fingerprint: Optional[str], digest: str
+    ) -> None:
+        self._upsert(
+            title,
+            model=model,
+            fingerprint=fingerprint,
+            output_hash=digest,
+            last_success=_now(),
+            error_class=None,
+            error_kind=None,
+            error=None,
+            stage=None,
+            attempts=0,
+            next_eligible=None,
+        )
+
+    def record_output(self, title: str, digest: str) -> None:
+        """Point ``title`` at a rewritten record without touching how it was extracted."""
+        self._upsert(title, output_hash=digest)
+
+    def record_failure(
+        self,
+        title: str,
+        exc: BaseException,
+        stage: Optional[str] = None,
+        kind: Optional[str] = None,
+        backoff: Callable[[int], float] = lambda attempts: 0.0,
+    ) -> Dict:
+        """Count a failed attempt and schedule the next one ``backoff(attempts)`` seconds out.
+
+        Returns the updated row. The increment and the schedule happen in one
+        transaction, so concurrent failures of the same title are all counted.
+        """
+        now = _now()
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT INTO titles (title, last_failure, error_class, error_kind, error, stage, attempts, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (title) DO UPDATE SET last_failure = excluded.last_failure, "
+                "error_class = excluded.error_class, error_kind = excluded.error_kind, "
+                "error = excluded.error, stage = excluded.stage, "
+                "attempts = attempts + 1, updated_at = excluded.updated_at",
+                (title, now, type(exc).__name__, kind, str(exc)[:500], stage, now),
+            )
+            attempts = connection.execute(
+                "SELECT attempts FROM titles WHERE title = ?", (title,)
+            ).fetchone()["attempts"]
+            connection.execute(
+                "UPDATE titles SET next_eligible = ? WHERE title = ?", (_now(backoff(attempts)), title)
+            )
+            return dict(connection.execute("SELECT * FROM titles WHERE title = ?", (title,)).fetchone())
+
+    def retry_queue(self, max_attempts: int) -> Tuple[List[str], int]:
+        """Failed titles whose next attempt is due, oldest first, and how many hit ``max_attempts``."""
+        connection = self.connect()
+        due = [
+            row["title"]
+            for row in connection.execute(
+                "SELECT title FROM titles WHERE error_class IS NOT NULL AND next_eligible <= ? "
+                "AND attempts < ? ORDER BY next_eligible",
+                (_now(), max_attempts),
+            )
+        ]
+        poisoned = connection.execute(
+            "SELECT COUNT(*) FROM titles WHERE error_class IS NOT NULL AND attempts >= ?", (max_attempts,)
+        ).fetchone()[0]
+        return due, poisoned
+
+    def clear_output(self, title: str) -> None:
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE titles SET output_hash = NULL, updated_at = ? WHERE title = ?", (_now(), title)
+            )
+
+    def forget(self, title: str) -> None:
+        with self.connect() as connection:
+            connection.execute("DELETE FROM titles WHERE title = ?", (title,))
+
+    def seed(self, manifest: Dict[str, Dict], output_path: Callable[[str], str]) -> int:
+        """Import revisions and existing records once, when the table is still empty.
+
+        Returns how many titles were imported; later runs keep the table
+        current themselves and return 0.
+        """
+        connection = self.connect()
+        if connection.execute("SELECT 1 FROM titles LIMIT 1").fetchone():
+            return 0
+        listed: Dict[str, set] = {}
+        rows: List[tuple] = []
+        now = _now()
+        for title, entry in manifest.items():
+            path = output_path(title)
+            folder, name = os.path.split(path)
+            if folder not in listed:
+                listed[folder] = set(os.listdir(folder)) if os.path.isdir(folder) else set()
+            digest = None
+            if name in listed[folder]:
+                with open(path, "rb") as handle:
+                    digest = output_hash(handle.read())
+            rows.append((title, entry.get("revid"), entry.get("hash"), digest, now))
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO titles (title, revid, raw_hash, output_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def import_rows(
+        self, source: str, keep: Callable[[str], bool] = lambda title: True, only_if_empty: bool = False
+    ) -> int:
+        """Copy the rows of the database at ``source`` whose title passes ``keep``, replacing ours.
+
+        Returns how many rows were copied. With ``only_if_empty`` nothing is
+        copied into a table that already has rows.
+        """
+        connection = self.connect()
+        if not os.path.exists(source) or os.path.abspath(source) == os.path.abspath(self.path):
+            return 0
+        if only_if_empty and connection.execute("SELECT 1 FROM titles LIMIT 1").fetchone():
+            return 0
+        other = sqlite3.connect(source, timeout=30)
+        other.row_factory = sqlite3.Row
+        try:
+            rows = [dict(row) for row in other.execute("SELECT * FROM titles") if keep(row["title"])]
+        finally:
+            other.close()
+        if rows:
+            names = list(rows[0])
+            with connection:
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO titles ({', '.join(names)}) "
+                    f"VALUES ({', '.join('?' for _ in names)})",
+                    [tuple(row[name] for name in names) for row in rows],
+                )
+        return len(rows)
+
+    def summary(self) -> Dict[str, int]:
+        row = self.connect().execute(
+            "SELECT COUNT(*) AS titles, COUNT(output_hash) AS records, "
+            "COUNT(error_class) AS failing FROM titles"
+        ).fetchone()
+        return dict(row)
+
+
+STATE = CrawlState()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect the crawl state database")
+    parser.add_argument("--failing", action="store_true", help="List titles whose last attempt failed")
+    args = parser.parse_args()
+    totals = STATE.summary()
+    print(" ".join(f"{key}={value}" for key, value in totals.items()))
+    connection = STATE.connect()
+    for row in connection.execute(
+        "SELECT error_kind, error_class, COUNT(*) AS count FROM titles WHERE error_class IS NOT NULL "
+        "GROUP BY error_kind, error_class ORDER BY count DESC"
+    ):
+        print(f"  {row['error_kind'] or '-'} {row['error_class']}: {row['count']}")
+    if args.failing:
+        for row in connection.execute(
+            "SELECT * FROM titles WHERE error_class IS NOT NULL ORDER BY last_failure"
+        ):
+            print(
+                f"{row['title']}\t{row['stage'] or '-'}\t{row['error_kind'] or '-'}\t"
+                f"{row['attempts']}\t{row['next_eligible'] or '-'}\t{row['error']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
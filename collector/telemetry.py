@@ -0,0 +1,178 @@
+import argparse
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import orjson
+
+from collector.config import LLM_PRICES, TELEMETRY_PATH
+
+TIMING_FIELDS = (
+    "wall_seconds",
+    "http_seconds",
+    "http_wait_seconds",
+    "llm_seconds",
+    "llm_wait_seconds",
+    "extract_seconds",
+    "normalize_seconds",
+    "write_seconds",
+)
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+SLOWEST_TITLES = 10
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse ``"model=in/out,..."`` (USD per million tokens) into ``{model: (in, out)}``."""
+    prices = {}
+    for entry in spec.split(","):
+        model, _, price = entry.partition("=")
+        if not price:
+            continue
+        prompt, _, completion = price.partition("/")
+        prices[model.strip()] = (float(prompt), float(completion or prompt))
+    return prices
+
+
+PRICES = parse_prices(LLM_PRICES)
+
+
+def completion_cost(model: str, usage: Dict[str, Any] | None) -> float:
+    prompt_price, completion_price = PRICES.get(model, (0.0, 0.0))
+    usage = usage or {}
+    return (
+        (usage.get("prompt_tokens") or 0) * prompt_price
+        + (usage.get("completion_tokens") or 0) * completion_price
+    ) / 1_000_000
+
+
+class Telemetry:
+    """Per-title counters and timings, appended to ``log_path`` as each title finishes.
+
+    Disabled by default; every method returns immediately until ``enable()``
+    is called. Code that runs on behalf of one title (the extraction worker,
+    the API request it makes) can call ``add`` without a title after the
+    thread has been bound with ``bind(title)``.
+    """
+
+    def __init__(self, log_path: str = TELEMETRY_PATH) -> None:
+        self.enabled = False
+        self.log_path = log_path
+        self.finished: List[Dict[str, Any]] = []
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    @contextmanager
+    def bind(self, title: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        previous = getattr(self._local, "title", None)
+        self._local.title = title
+        try:
+            yield
+        finally:
+            self._local.title = previous
+
+    def add(self, title: str | None = None, **fields: float) -> None:
+        """Add ``fields`` to the counters of ``title`` (or of the title bound to this thread)."""
+        if not self.enabled:
+            return
+        title = title or getattr(self._local, "title", None)
+        if title is None:
+            return
+        with self._lock:
+            entry = self._open.setdefault(title, {"title": title, "started": time.monotonic()})
+            for key, value in fields.items():
+                entry[key] = entry.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, field: str, title: str | None = None) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(title, **{field: time.monotonic() - started})
+
+    def finish(self, title: str, outcome: str) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._open.pop(title, None) or {"title": title, "started": now}
+            entry["wall_seconds"] = now - entry.pop("started")
+            entry["outcome"] = outcome
+            for key, value in entry.items():
+                if isinstance(value, float):
+                    entry[key] = round(value, 6 if key == "cost_usd" else 4)
+            self.finished.append(entry)
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "ab") as handle:
+                handle.write(orjson.dumps(entry) + b"\n")
+
+
+TELEMETRY = Telemetry()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summary_lines(entries: List[Dict[str, Any]]) -> List[str]:
+    """Percentiles per timing field, token and cost totals and the slowest titles."""
+    if not entries:
+        return []
+    outcomes: Dict[str, int] = {}
+    for entry in entries:
+        outcomes[entry.get("outcome", "?")] = outcomes.get(entry.get("outcome", "?"), 0) + 1
+    lines = [
+        f"titles={len(entries)} "
+        + " ".join(f"{key}={value}" for key, value in sorted(outcomes.items()))
+    ]
+    for field in TIMING_FIELDS:
+        values = [entry[field] for entry in entries if entry.get(field)]
+        if not values:
+            continue
+        lines.append(
+            f"  {field:<18} p50={percentile(values, 0.5):.2f}s p90={percentile(values, 0.9):.2f}s "
+            f"p99={percentile(values, 0.99):.2f}s max={max(values):.2f}s total={sum(values):.1f}s"
+        )
+    totals = {field: sum(entry.get(field, 0) for entry in entries) for field in TOKEN_FIELDS}
+    lines.append(
+        "  tokens "
+        + " ".join(f"{field.split('_')[0]}={value}" for field, value in totals.items())
+        + f" llm_calls={sum(entry.get('llm_calls', 0) for entry in entries)}"
+        + f" retries={sum(entry.get('llm_retries', 0) + entry.get('http_retries', 0) for entry in entries):g}"
+        + f" cost=${sum(entry.get('cost_usd', 0.0) for entry in entries):.4f}"
+    )
+    slowest = sorted(entries, key=lambda entry: entry.get("wall_seconds", 0), reverse=True)
+    lines.append("  slowest:")
+    for entry in slowest[:SLOWEST_TITLES]:
+        lines.append(
+            f"    {entry.get('wall_seconds', 0):>7.2f}s  {entry['title']}"
+            f"  (llm={entry.get('llm_seconds', 0):.2f}s http={entry.get('http_seconds', 0):.2f}s)"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize a per-title telemetry log")
+    parser.add_argument("path", nargs="?", default=TELEMETRY_PATH, help="Telemetry JSONL file")
+    args = parser.parse_args()
+    with open(args.path, "rb") as handle:
+        entries = [orjson.loads(line) for line in handle if line.strip()]
+    print("\n".join(summary_lines(entries)))
+
+
+if __name__ == "__main__":
+    main()
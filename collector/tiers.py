@@ -0,0 +1,216 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List
+
+import orjson
+
+from collector.config import (
+    OPENAI_FAST_MODEL,
+    OPENAI_MODEL,
+    TIER_LOG_PATH,
+    TIER_MIN_CONFIDENCE,
+    TRIM_WIKITEXT,
+)
+from collector.extractor_openai import (
+    STAT_ALIASES,
+    build_user_message,
+    cached_completion,
+    extract_effect_details_from_wikitext,
+    extract_stat_bonuses_from_wikitext,
+    extraction_text,
+    finish_record,
+)
+from collector.llmcache import CacheMiss
+from collector.telemetry import completion_cost
+
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_RE.search(value)
+        if match:
+            return float(match.group(0))
+    return None
+
+
+def _stat(label: Any) -> str | None:
+    if not isinstance(label, str):
+        return None
+    token = label.strip().lower()
+    return STAT_ALIASES.get(token) or STAT_ALIASES.get(token.rstrip("s"))
+
+
+def _chance(value: Any) -> float | None:
+    chance = _number(value)
+    if chance is not None and (chance > 1 or (isinstance(value, str) and "%" in value)):
+        chance /= 100.0
+    return chance
+
+
+def cross_check(payload: Dict[str, Any], page_text: str) -> List[str]:
+    """Compare a raw model payload with the deterministic wikitext parsers.
+
+    Returns the names of the checks that disagree: ``stat_bonuses`` when an
+    infobox bonus has no matching ``add`` modifier, ``effect_details`` when a
+    bullet or ``'''Label:'''`` line's chance or modifiers are not in the
+    payload. Runs before normalization, which would otherwise fill the gaps.
+    """
+    modifiers = set()
+    chances = []
+    for effect in payload.get("effects") or []:
+        if not isinstance(effect, dict):
+            continue
+        chance = _chance(effect.get("chance"))
+        if chance is not None:
+            chances.append(chance)
+        for modifier in effect.get("modifiers") or []:
+            if not isinstance(modifier, dict):
+                continue
+            stat = _stat(modifier.get("stat"))
+            value = _number(modifier.get("value"))
+            if stat and value is not None:
+                modifiers.add((stat, modifier.get("op") or "add", round(value, 4)))
+    problems = []
+    for stat, value in extract_stat_bonuses_from_wikitext(page_text).items():
+        if (stat, "add", round(float(value), 4)) not in modifiers:
+            problems.append("stat_bonuses")
+            break
+    for detail in extract_effect_details_from_wikitext(page_text).values():
+        expected = {
+            (mod["stat"], mod["op"], round(float(mod["value"]), 4)) for mod in detail["modifiers"]
+        }
+        chance = detail["chance"]
+        if expected - modifiers or (
+            chance is not None and not any(abs(chance - seen) < 0.005 for seen in chances)
+        ):
+            problems.append("effect_details")
+            break
+    return problems
+
+
+class TierStats:
+    """Per-tier calls, latency, tokens and cost, plus why pages were escalated.
+
+    Every tiered page also gets one line in ``log_path`` for threshold tuning.
+    """
+
+    def __init__(self, log_path: str = TIER_LOG_PATH) -> None:
+        self.log_path = log_path
+        self.tiers = {
+            tier: {"pages": 0, "api_calls": 0, "seconds": 0.0, "tokens": 0, "cost": 0.0}
+            for tier in ("fast", "main")
+        }
+        self.escalations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, tier: str, model: str, completion: Dict[str, Any], seconds: float) -> Dict:
+        cached = bool(completion.get("cached"))
+        usage = completion.get("usage") or {}
+        call = {
+            "model": model,
+            "cached": cached,
+            "seconds": round(seconds, 3),
+            "tokens": usage.get("total_tokens") or 0,
+            "cost": 0.0 if cached else completion_cost(model, usage),
+        }
+        with self._lock:
+            totals = self.tiers[tier]
+            totals["pages"] += 1
+            if not cached:
+                totals["api_calls"] += 1
+                totals["seconds"] += seconds
+                totals["tokens"] += call["tokens"]
+                totals["cost"] += call["cost"]
+        return call
+
+    def record_page(self, title: str, calls: Dict[str, Dict], reasons: List[str], confidence) -> None:
+        entry = {"title": title, "reasons": reasons, "fast_confidence": confidence, **calls}
+        with self._lock:
+            for reason in reasons:
+                self.escalations[reason] = self.escalations.get(reason, 0) + 1
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "ab") as handle:
+                handle.write(orjson.dumps(entry) + b"\n")
+
+    def summary(self) -> str:
+        parts = []
+        for tier, totals in self.tiers.items():
+            calls = totals["api_calls"]
+            latency = totals["seconds"] / calls if calls else 0.0
+            parts.append(
+                f"{tier}: pages={totals['pages']} api={calls} avg={latency:.1f}s "
+                f"tokens={totals['tokens']} cost=${totals['cost']:.4f}"
+            )
+        fast = self.tiers["fast"]["pages"]
+        rate = self.tiers["main"]["pages"] / fast if fast else 0.0
+        reasons = ",".join(f"{key}:{value}" for key, value in sorted(self.escalations.items()))
+        return f"{' | '.join(parts)} | escalated={rate:.0%} ({reasons or '-'})"
+
+
+TIER_STATS = TierStats()
+
+
+def _timed_completion(tier: str, model: str, user_content: str, cache_only: bool):
+    started = time.monotonic()
+    completion = cached_completion(user_content, cache_only, model=model)
+    call = TIER_STATS.record_call(tier, model, completion, time.monotonic() - started)
+    return completion, call
+
+
+def extract_tiered(
+    page_title: str,
+    page_url: str,
+    page_text: str,
+    cache_only: bool = False,
+    trim: bool = TRIM_WIKITEXT,
+) -> Dict[str, Any]:
+    """Extract with ``OPENAI_FAST_MODEL`` first, escalating to ``OPENAI_MODEL`` if needed.
+
+    The fast record is kept unless it fails validation (schema fixes are
+    applied, but no repair request is sent to the fast model), its
+    ``provenance.confidence`` is below ``TIER_MIN_CONFIDENCE`` (a record
+    without one is judged by validation and ``cross_check`` alone), or
+    ``cross_check`` finds it disagreeing with the wikitext parsers. Both
+    tiers share the prompt and the LLM cache.
+    """
+    from jsonschema import ValidationError
+
+    user_content = build_user_message(page_title, page_url, extraction_text(page_title, page_text, trim))
+    calls: Dict[str, Dict] = {}
+    reasons: List[str] = []
+    confidence = None
+    record = None
+    try:
+        completion, calls["fast"] = _timed_completion("fast", OPENAI_FAST_MODEL, user_content, cache_only)
+        payload = json.loads(completion["content"])
+        reasons += cross_check(payload, page_text)
+        # Normalization fills in a default confidence; only the model's own counts.
+        stated = (payload.get("provenance") or {}).get("confidence")
+        record = finish_record(
+            payload, page_title, page_url, page_text, cache_only, OPENAI_FAST_MODEL, repair_attempts=0
+        )
+        if isinstance(stated, (int, float)):
+            confidence = record["provenance"]["confidence"]
+            if confidence < TIER_MIN_CONFIDENCE:
+                reasons.append("low_confidence")
+    except ValidationError:
+        reasons.append("invalid")
+    except json.JSONDecodeError:
+        reasons.append("unparseable")
+    except CacheMiss:
+        reasons.append("cache_miss")
+    if reasons:
+        completion, calls["main"] = _timed_completion("main", OPENAI_MODEL, user_content, cache_only)
+        record = finish_record(
+            json.loads(completion["content"]), page_title, page_url, page_text, cache_only
+        )
+    TIER_STATS.record_page(page_title, calls, reasons, confidence)
+    return record
@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+from typing import Dict, Iterator, Tuple
+
+import orjson
+
+from collector.config import TRIM_LOG_PATH
+from collector.llmlimit import estimate_tokens
+from collector.wikitext import HEADING_RE
+
+# Bump when trim_wikitext (or the fallback in trim_prompt) would send the
+# model different text for the same page, so stored records get re-extracted.
+TRIM_VERSION = "1"
+# Sections that never carry item facts; subsections under them go too.
+DROP_SECTIONS = {
+    "appearances",
+    "citations",
+    "external links",
+    "galleries",
+    "gallery",
+    "images",
+    "navigation",
+    "notes and references",
+    "references",
+    "see also",
+    "sources",
+    "trivia",
+    "video",
+    "videos",
+}
+DROP_TEMPLATE_RE = re.compile(
+    r"navbox|navigation|^nav\b|\bnav$|^reflist$|^references$|^clear|^stub$|^spoiler"
+    r"|^disambig|^displaytitle:|^defaultsort:|^toc\b|^notoc\b",
+    re.I,
+)
+TAG_BLOCK_RE = re.compile(r"<(gallery|ref)\b[^>]*>.*?</\1\s*>", re.S | re.I)
+SELF_CLOSING_RE = re.compile(r"<(?:ref|references)\b[^>]*/>", re.I)
+CATEGORY_RE = re.compile(r"\[\[\s*Category\s*:[^\]]*\]\]", re.I)
+MAGIC_WORD_RE = re.compile(r"__[A-Z]+__")
+
+
+def iter_templates(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` spans of top-level ``{{...}}`` templates, nesting aware."""
+    depth = 0
+    start = 0
+    index = 0
+    while index < len(text) - 1:
+        pair = text[index:index + 2]
+        if pair == "{{":
+            if depth == 0:
+                start = index
+            depth += 1
+            index += 2
+        elif pair == "}}" and depth:
+            depth -= 1
+            index += 2
+            if depth == 0:
+                yield start, index
+        else:
+            index += 1
+
+
+def template_name(template: str) -> str:
+    return re.split(r"[|\n]", template[2:-2], maxsplit=1)[0].strip()
+
+
+def drop_templates(text: str) -> str:
+    pieces = []
+    last = 0
+    for start, end in iter_templates(text):
+        if DROP_TEMPLATE_RE.search(template_name(text[start:end])):
+            pieces.append(text[last:start])
+            last = end
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def drop_sections(text: str) -> str:
+    kept = []
+    dropping_level = 0
+    for line in text.splitlines():
+        heading = HEADING_RE.match(line.strip())
+        if heading:
+            level = len(heading.group(1))
+            if dropping_level and level > dropping_level:
+                continue
+            dropping_level = 0
+            if heading.group(2).strip().lower() in DROP_SECTIONS:
+                dropping_level = level
+                continue
+        elif dropping_level:
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def trim_wikitext(wikitext: str) -> str:
+    """Return ``wikitext`` without the parts that never feed an item record.
+
+    Comments, references, galleries, category links, navbox-style templates
+    and sections such as Trivia or Gallery are removed. Everything else,
+    including the infobox, the description and effect sections, is kept as is.
+    """
+    text = re.sub(r"<!--.*?-->", "", wikitext, flags=re.S)
+    text = TAG_BLOCK_RE.sub("", text)
+    text = SELF_CLOSING_RE.sub("", text)
+    text = drop_templates(text)
+    text = drop_sections(text)
+    text = CATEGORY_RE.sub("", text)
+    text = MAGIC_WORD_RE.sub("", text)
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+class TrimStats:
+    """Running before/after token estimates, with one JSONL line per trimmed page."""
+
+    def __init__(self, log_path: str = TRIM_LOG_PATH) -> None:
+        self.log_path = log_path
+        self.totals = {"pages": 0, "before": 0, "after": 0, "fallbacks": 0}
+        self._lock = threading.Lock()
+
+    def record(self, title: str, before: str, after: str, fallback: bool = False) -> Dict:
+        entry = {
+            "title": title,
+            "before": estimate_tokens(before),
+            "after": estimate_tokens(after),
+            "fallback": fallback,
+        }
+        with self._lock:
+            self.totals["pages"] += 1
+            self.totals["before"] += entry["before"]
+            self.totals["after"] += entry["after"]
+            self.totals["fallbacks"] += int(fallback)
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "ab") as handle:
+                handle.write(orjson.dumps(entry) + b"\n")
+        return entry
+
+    def summary(self) -> str:
+        totals = self.totals
+        saved = 1 - totals["after"] / totals["before"] if totals["before"] else 0.0
+        return (
+            f"pages={totals['pages']} tokens_before={totals['before']} "
+            f"tokens_after={totals['after']} saved={saved:.0%} fallbacks={totals['fallbacks']}"
+        )
+
+
+TRIM_STATS = TrimStats()
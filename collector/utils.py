@@ -1,8 +1,15 @@
+import os
 import re
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+import orjson
 
 
 _ILLEGAL_FS_CHARS = re.compile(r'[<>:"/\\|?*]')
 
+T = TypeVar("T")
+
 
 def sanitize_title_for_fs(title: str) -> str:
     """Return a filesystem-safe representation of a wiki title."""
@@ -15,3 +22,29 @@ def sanitize_title_for_fs(title: str) -> str:
     if not safe:
         return "item"
     return safe
+
+
+def write_json_atomic(path: str, data) -> bytes:
+    """Write JSON to ``path`` via a temporary file so readers never see a partial file.
+
+    Returns the bytes written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(tmp_path, path)
+    return payload
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of up to ``size`` consecutive items without materializing ``items``."""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
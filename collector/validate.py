@@ -2,15 +2,11 @@ import glob
 import json
 import os
 
-from jsonschema import Draft202012Validator
-
-SCHEMA_PATH = os.path.join("schemas", "dcc-record.schema.json")
-with open(SCHEMA_PATH, "r", encoding="utf-8") as schema_file:
-    SCHEMA = json.load(schema_file)
-validator = Draft202012Validator(SCHEMA)
+from collector.schema import schema_validator
 
 
 def validate_dir(path: str) -> int:
+    validator = schema_validator()
     errors = 0
     for fp in glob.glob(os.path.join(path, "*.json")):
         with open(fp, "r", encoding="utf-8") as handle:
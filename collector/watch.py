@@ -0,0 +1,187 @@
+import argparse
+import datetime
+import os
+import time
+from typing import Dict, List, Tuple
+
+import orjson
+
+from collector.categories import crawl_category_tree
+from collector.config import CATEGORY_ROOT, RETIRED_DIR, WATCH_STATE_PATH
+from collector.main import output_path_for_title, process_titles
+from collector.mediawiki import fetch_recent_changes, filter_category_members
+from collector.rawstore import load_manifest, save_manifest
+from collector.state import STATE
+from collector.utils import write_json_atomic
+
+WATCH_INTERVAL_SECONDS = 300
+
+
+def utc_now() -> str:
+    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+
+def load_state(path: str = WATCH_STATE_PATH) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as handle:
+        return orjson.loads(handle.read())
+
+
+def save_state(state: Dict, path: str = WATCH_STATE_PATH) -> None:
+    write_json_atomic(path, state)
+
+
+def classify_changes(changes: List[Dict], last_rcid: int) -> Dict[str, str]:
+    """Collapse a change log into ``{title: "fetch" | "retire"}``.
+
+    Entries at or below ``last_rcid`` were handled by a previous poll. When a
+    title appears several times the latest event wins, so a delete followed by
+    a restore still ends up being fetched.
+    """
+    actions: Dict[str, str] = {}
+    for change in changes:
+        if change.get("rcid", 0) <= last_rcid:
+            continue
+        title = change.get("title")
+        if not title:
+            continue
+        kind = change.get("type")
+        if kind in ("edit", "new"):
+            actions[title] = "fetch"
+        elif kind == "log":
+            logtype = change.get("logtype")
+            logaction = change.get("logaction")
+            if logtype == "delete" and logaction == "delete":
+                actions[title] = "retire"
+            elif logtype == "delete" and logaction == "restore":
+                actions[title] = "fetch"
+            elif logtype == "move":
+                actions[title] = "retire"
+                params = change.get("logparams") or {}
+                target = params.get("target_title")
+                if target and params.get("target_ns", 0) == 0:
+                    actions[target] = "fetch"
+    return actions
+
+
+def retire_record(title: str) -> bool:
+    STATE.forget(title)
+    output_path = output_path_for_title(title)
+    if not os.path.exists(output_path):
+        return False
+    os.makedirs(RETIRED_DIR, exist_ok=True)
+    os.replace(output_path, os.path.join(RETIRED_DIR, os.path.basename(output_path)))
+    return True
+
+
+def sync_once(
+    state: Dict, category: str, recursive: bool = False, max_depth: int = -1
+) -> Tuple[Dict, Dict[str, int]]:
+    """Apply the changes since ``state`` and return the new watermark and counts.
+
+    Edited pages are fetched if they are in ``category`` (or, with
+    ``recursive``, any category of its tree) and retired if they left it.
+    """
+    changes = fetch_recent_changes(state["timestamp"])
+    actions = classify_changes(changes, state.get("rcid", 0))
+    manifest = load_manifest()
+    STATE.seed(manifest, output_path_for_title)
+
+    def is_tracked(title: str) -> bool:
+        return title in manifest or STATE.has_output(title)
+
+    touched = [title for title, action in actions.items() if action == "fetch"]
+    categories = [category]
+    if touched and recursive:
+        # The tree walk reuses the cached listings of unchanged categories.
+        categories = list(crawl_category_tree(category, max_depth)["categories"])
+    members = set(filter_category_members(touched, categories)) if touched else set()
+    queued = [title for title in touched if title in members]
+    retired = [
+        title
+        for title, action in actions.items()
+        if (action == "retire" or title not in members) and is_tracked(title)
+    ]
+
+    for title in retired:
+        retire_record(title)
+        manifest.pop(title, None)
+    if retired:
+        save_manifest(manifest)
+
+    written = skipped = failed = 0
+    if queued:
+        written, skipped, failed = process_titles(queued)
+
+    new_state = dict(state)
+    for change in changes:
+        if change.get("rcid", 0) > new_state.get("rcid", 0):
+            new_state["rcid"] = change["rcid"]
+            new_state["timestamp"] = change.get("timestamp") or new_state["timestamp"]
+    save_state(new_state)
+    stats = {
+        "changes": len(changes),
+        "queued": len(queued),
+        "retired": len(retired),
+        "written": written,
+        "skipped": skipped,
+        "failed": failed,
+    }
+    return new_state, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Follow the wiki's recent changes and keep item records in sync"
+    )
+    parser.add_argument(
+        "--category",
+        default=CATEGORY_ROOT,
+        help="MediaWiki category whose pages are tracked (default: Items)",
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also track pages in subcategories, as crawled with --recursive",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=-1,
+        help="Subcategory depth limit for --recursive (-1 = unlimited)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=WATCH_INTERVAL_SECONDS,
+        help="Seconds to wait between polls",
+    )
+    parser.add_argument(
+        "--since",
+        default="",
+        help="ISO 8601 timestamp to start from when no watermark has been saved yet (default: now)",
+    )
+    parser.add_argument("--once", action="store_true", help="Poll a single time and exit")
+    args = parser.parse_args()
+
+    state = load_state()
+    if not state:
+        state = {"timestamp": args.since or utc_now(), "rcid": 0}
+        save_state(state)
+
+    while True:
+        try:
+            state, stats = sync_once(state, args.category, args.recursive, args.max_depth)
+            summary = " ".join(f"{key}={value}" for key, value in stats.items())
+            print(f"[{utc_now()}] Synced up to {state['timestamp']}. {summary}")
+        except Exception as exc:  # noqa: BLE001
+            # Not a page failure: keep it out of the crawl state and retry queue.
+            print(f"[{utc_now()}] [ERROR] poll failed: {type(exc).__name__}: {exc}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+PARSE_CACHE_SIZE = 256
+HEADING_RE = re.compile(r"^(={2,6})\s*(.*?)\s*\1\s*$")
+# One alternation instead of a pass per construct; the order of the branches
+# is the order the constructs used to be stripped in.
+STRIP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<ref[^>]*>.*?</ref>"
+    r"|<[^>]+>"
+    r"|\{\{[^{}]*\}\}"
+    r"|\[\[(?:[^|\]]*\|)?([^\]]+)\]\]"
+    r"|'{2,}"
+    r"|&nbsp;",
+    re.S,
+)
+TOKEN_RE = re.compile(r"\{\{|\}\}|\[\[|\]\]|\||\n")
+LABEL_RE = re.compile(r"'''([^:]+):'''(.*)")
+IMAGE_PARAM_RE = re.compile(r"image\d*$")
+
+
+def _strip_match(match: re.Match) -> str:
+    label = match.group(1)
+    if label is not None:
+        return strip_wikitext(label)
+    return "" if match.group(0)[0] == "'" else " "
+
+
+def strip_wikitext(text: str) -> str:
+    """Reduce wikitext to plain text: drop markup, keep link labels, collapse whitespace."""
+    return " ".join(STRIP_RE.sub(_strip_match, text).split())
+
+
+class Template:
+    """A ``{{name|...}}`` call; named params are keyed by lower-cased name, positional by index."""
+
+    __slots__ = ("name", "params", "start", "end", "depth")
+
+    def __init__(self, name: str, params: Dict[str, str], start: int, end: int, depth: int) -> None:
+        self.name = name
+        self.params = params
+        self.start = start
+        self.end = end
+        self.depth = depth
+
+
+class Section:
+    """A heading and the lines up to the next heading of any level (level 0 is the intro)."""
+
+    __slots__ = ("title", "level", "lines")
+
+    def __init__(self, title: str, level: int) -> None:
+        self.title = title
+        self.level = level
+        self.lines: List[str] = []
+
+
+class Document:
+    """Wikitext parsed once into the pieces the extractor helpers read.
+
+    ``lines`` are the raw lines and ``prose`` the same lines with template
+    calls removed. ``files`` lists ``[[File:...]]`` targets followed by
+    ``image`` template params, in page order. ``entries`` are bullets and
+    ``'''Label:''' text`` lines as plain-text ``(name, body)`` pairs.
+    Documents are shared through the parse cache and must not be mutated.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.lines: List[str] = []
+        self.prose: List[str] = []
+        self.templates: List[Template] = []
+        self.links: List[Tuple[str, str | None]] = []
+        self.files: List[str] = []
+        self.sections: List[Section] = [Section("", 0)]
+        self.entries: List[Tuple[str, str]] = []
+        self._parse()
+
+    def param(self, name: str) -> str | None:
+        """Value of the first template param called ``name``, in page order."""
+        for template in self.templates:
+            if name in template.params:
+                return template.params[name]
+        return None
+
+    def section(self, title: str) -> Section | None:
+        wanted = title.lower()
+        for section in self.sections:
+            if section.level and section.title.lower() == wanted:
+                return section
+        return None
+
+    def _parse(self) -> None:
+        text = self.text
+        # Open frames: [kind, start, separator positions]; kind is "{{" or "[[".
+        stack: List[list] = []
+        depth = 0
+        line_start = 0
+        prose: List[str] = []
+        prose_from = 0
+        file_links: List[str] = []
+        for match in TOKEN_RE.finditer(text):
+            token = match.group(0)
+            position = match.start()
+            if token == "\n":
+                if not depth:
+                    prose.append(text[prose_from:position])
+                self._add_line(text[line_start:position], "".join(prose))
+                line_start = prose_from = match.end()
+                prose = []
+            elif token == "{{":
+                if not depth:
+                    prose.append(text[prose_from:position])
+                stack.append(["{{", position, []])
+                depth += 1
+            elif token == "[[":
+                stack.append(["[[", position, []])
+            elif token == "|":
+                if stack:
+                    stack[-1][2].append(position)
+            elif token == "]]":
+                if stack and stack[-1][0] == "[[":
+                    _, start, pipes = stack.pop()
+                    self._add_link(text, start, match.end(), pipes, file_links)
+            elif token == "}}":
+                while stack and stack[-1][0] == "[[":
+                    stack.pop()
+                if stack:
+                    _, start, pipes = stack.pop()
+                    depth -= 1
+                    self._add_template(text, start, match.end(), pipes, depth)
+                    if not depth:
+                        prose_from = match.end()
+        if not depth:
+            prose.append(text[prose_from:])
+        self._add_line(text[line_start:], "".join(prose))
+        self.templates.sort(key=lambda template: template.start)
+        self.files = file_links + [
+            value.split("\n", 1)[0].strip()
+            for template in self.templates
+            for key, value in template.params.items()
+            if IMAGE_PARAM_RE.match(key) and value
+        ]
+
+    def _add_line(self, line: str, prose: str) -> None:
+        self.lines.append(line)
+        self.prose.append(prose)
+        stripped = line.strip()
+        heading = HEADING_RE.match(stripped) if stripped.startswith("==") else None
+        if heading:
+            self.sections.append(Section(heading.group(2), len(heading.group(1))))
+            return
+        self.sections[-1].lines.append(line)
+        label = LABEL_RE.match(stripped)
+        if label:
+            self.entries.append((strip_wikitext(label.group(1)), strip_wikitext(label.group(2))))
+        elif stripped.startswith("*"):
+            bullet = strip_wikitext(stripped.lstrip("* ").strip())
+            self.entries.append((bullet, bullet))
+
+    def _add_link(self, text: str, start: int, end: int, pipes: List[int], file_links: List[str]) -> None:
+        target_end = pipes[0] if pipes else end - 2
+        target = text[start + 2:target_end]
+        label = text[pipes[0] + 1:end - 2] if pipes else None
+        self.links.append((target.strip(), label))
+        if target[:5].lower() == "file:":
+            name = target[5:].strip()
+            if name:
+                file_links.append(name)
+
+    def _add_template(self, text: str, start: int, end: int, pipes: List[int], depth: int) -> None:
+        bounds = [start + 2, *pipes, end - 2]
+        parts = [text[bounds[i] + (i > 0):bounds[i + 1]] for i in range(len(bounds) - 1)]
+        params: Dict[str, str] = {}
+        positional = 0
+        for part in parts[1:]:
+            key, sep, value = part.partition("=")
+            if sep and "\n" not in key and "[[" not in key:
+                params[key.strip().lower()] = value.strip()
+            else:
+                positional += 1
+                params[str(positional)] = part
+        self.templates.append(Template(parts[0].strip(), params, start, end, depth))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(text: str) -> Document:
+    """Parse ``text`` once; repeated calls with the same content share one ``Document``."""
+    return Document(text)
@@ -0,0 +1,59 @@
+import threading
+import unittest
+
+from collector.pipeline import Stage, run_pipeline
+
+
+def collect(source, stages, timeout=5.0):
+    """Run the pipeline on a thread; return ``(items, error)`` or fail if it hangs."""
+    result = {"items": [], "error": None}
+
+    def consume():
+        try:
+            for item in run_pipeline(source, stages):
+                result["items"].append(item)
+        except Exception as exc:  # noqa: BLE001
+            result["error"] = exc
+
+    thread = threading.Thread(target=consume, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError("pipeline did not finish")
+    return result["items"], result["error"]
+
+
+def double(item):
+    item["value"] *= 2
+    return item
+
+
+class RunPipelineTest(unittest.TestCase):
+    def test_items_pass_through_every_stage(self):
+        items, error = collect(({"value": n} for n in range(5)), [Stage("double", double, workers=3)])
+        self.assertIsNone(error)
+        self.assertEqual(sorted(item["value"] for item in items), [0, 2, 4, 6, 8])
+
+    def test_stage_errors_are_attached_to_items(self):
+        def fail(item):
+            raise ValueError("bad page")
+
+        items, error = collect(iter([{"value": 1}]), [Stage("fail", fail), Stage("double", double)])
+        self.assertIsNone(error)
+        self.assertEqual(items[0]["stage"], "fail")
+        self.assertIsInstance(items[0]["error"], ValueError)
+        self.assertEqual(items[0]["value"], 1)
+
+    def test_source_that_raises_fails_the_run(self):
+        def source():
+            yield {"value": 1}
+            raise ConnectionError("listing failed")
+
+        stages = [Stage("double", double), Stage("batch", lambda items: iter(items), stream=True)]
+        items, error = collect(source(), stages)
+        self.assertEqual([item["value"] for item in items], [2])
+        self.assertIsInstance(error, ConnectionError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from collector import main
+from collector.config import RETRY_MAX_ATTEMPTS
+from collector.dedupe import DUPLICATES
+from collector.state import STATE
+
+
+class PlanStageTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        state_path, aliases_path = STATE.path, DUPLICATES.path
+        STATE.path = os.path.join(self.tmp.name, "state.sqlite")
+        DUPLICATES.use(os.path.join(self.tmp.name, "aliases.json"))
+        self.addCleanup(setattr, STATE, "path", state_path)
+        self.addCleanup(DUPLICATES.use, aliases_path)
+        revisions = mock.patch.object(main, "fetch_revisions", lambda titles: {})
+        revisions.start()
+        self.addCleanup(revisions.stop)
+
+    def record_failures(self, title, attempts, backoff=3600.0):
+        for _ in range(attempts):
+            STATE.record_failure(title, ValueError("bad record"), "validate", "deterministic", lambda n: backoff)
+
+    def plan(self, title, **kwargs):
+        revisions = {title: {"revid": 7}}
+        (item,) = main.plan_stage(revisions, **kwargs)(iter([{"title": title}]))
+        return item
+
+    def test_failed_title_without_record_waits_for_its_retry(self):
+        self.record_failures("Broken", 1)
+        self.assertTrue(self.plan("Broken", force=False)["skip"])
+        self.assertFalse(self.plan("Broken", force=False, explicit=True)["skip"])
+        self.assertFalse(self.plan("Broken", force=True).get("skip"))
+
+    def test_due_failure_without_record_is_retried(self):
+        self.record_failures("Broken", 1, backoff=0.0)
+        self.assertFalse(self.plan("Broken", force=False)["skip"])
+
+    def test_poisoned_title_without_record_is_left_out(self):
+        self.record_failures("Broken", RETRY_MAX_ATTEMPTS, backoff=0.0)
+        self.assertTrue(self.plan("Broken", force=False)["skip"])
+        self.assertFalse(self.plan("Broken", force=False, explicit=True)["skip"])
+
+    def test_current_record_is_skipped_and_new_title_is_not(self):
+        STATE.record_fetch("Stored", 7, "hash")
+        STATE.record_success("Stored", "rules", "fingerprint", "digest")
+        self.assertTrue(self.plan("Stored", force=False)["skip"])
+        self.assertFalse(self.plan("New", force=False).get("skip"))
+
+
+if __name__ == "__main__":
+    unittest.main()
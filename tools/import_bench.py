@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Measure how long the collector's entry points take to import.
+
+Each module is imported in a fresh interpreter ``--runs`` times and the
+median wall time is reported, along with whether the import pulled in the
+heavy ``openai`` and ``jsonschema`` packages. Commands such as
+``--count-only``, ``--report`` or ``collector.validate`` should not pay for
+a client they never use. No API key is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+MODULES = [
+    "collector.main",
+    "collector.extractor_openai",
+    "collector.rules",
+    "collector.validate",
+    "collector.batch",
+]
+HEAVY = ["openai", "jsonschema"]
+PROBE = (
+    "import importlib, json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(json.dumps({'seconds': elapsed, 'loaded': [m for m in sys.argv[2:] if m in sys.modules]}))\n"
+)
+
+
+def measure(module: str, runs: int) -> dict:
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    timings = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, module, *HEAVY],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            return {"error": (result.stderr.strip().splitlines() or ["?"])[-1]}
+        sample = json.loads(result.stdout)
+        timings.append(sample["seconds"])
+        loaded = sample["loaded"]
+    return {"median": statistics.median(timings), "loaded": loaded}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args()
+    for module in args.modules:
+        row = measure(module, args.runs)
+        if "error" in row:
+            print(f"{module:<28} failed: {row['error']}")
+            continue
+        loaded = ", ".join(row["loaded"]) or "-"
+        print(f"{module:<28} {row['median'] * 1000:>7.1f} ms  heavy: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
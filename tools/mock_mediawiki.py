@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Local stand-in for the MediaWiki API that replays a canned change log.
+
+The fixture is a JSON file of the form::
+
+    {
+      "pages": {"Blitz Sticks": {"content": "...", "revid": 1, "categories": ["Items"]}},
+      "recentchanges": [
+        {"rcid": 10, "type": "edit", "title": "Blitz Sticks", "timestamp": "2025-01-02T00:00:00Z",
+         "page": {"content": "...", "revid": 2}},
+        {"rcid": 11, "type": "log", "logtype": "delete", "logaction": "delete",
+         "title": "Old Item", "timestamp": "2025-01-03T00:00:00Z"}
+      ],
+      "files": {"Blitz.png": {"url": "https://static.wikia.nocookie.net/.../Blitz.png/revision/latest", "sha1": "..."}},
+      "subcategories": {"Items": ["Potions"], "Potions": ["Items"]}
+    }
+
+Change log entries are applied to ``pages`` in order at startup (``page``
+updates the page, delete logs remove it, move logs rename it), so the pages
+served always reflect the end of the log. Point the collector at it with
+``WIKI_API=http://127.0.0.1:8765/api.php``.
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_TIMESTAMP = "2025-01-01T00:00:00Z"
+
+
+def load_fixture(path: str) -> tuple[dict, list, dict, dict]:
+    with open(path, encoding="utf-8") as handle:
+        fixture = json.load(handle)
+    pages = {}
+    for title, page in fixture.get("pages", {}).items():
+        pages[title] = {"timestamp": DEFAULT_TIMESTAMP, "categories": [], **page}
+    changes = []
+    for change in sorted(fixture.get("recentchanges", []), key=lambda entry: entry["rcid"]):
+        change = dict(change)
+        update = change.pop("page", None)
+        title = change["title"]
+        if change.get("type") == "log" and change.get("logtype") == "delete":
+            if change.get("logaction") == "delete":
+                pages.pop(title, None)
+        elif change.get("type") == "log" and change.get("logtype") == "move":
+            target = (change.get("logparams") or {}).get("target_title")
+            if target and title in pages:
+                pages[target] = pages.pop(title)
+        if update:
+            base = pages.get(title, {"categories": []})
+            pages[title] = {**base, "timestamp": change["timestamp"], **update}
+        change.setdefault("ns", 0)
+        changes.append(change)
+    for index, page in enumerate(pages.values(), start=1):
+        page.setdefault("pageid", index)
+        page.setdefault("revid", 1)
+    files = {name.replace("_", " "): info for name, info in fixture.get("files", {}).items()}
+    return pages, changes, files, fixture.get("subcategories", {})
+
+
+class MockWiki:
+    def __init__(
+        self,
+        pages: dict,
+        changes: list,
+        files: dict | None = None,
+        subcategories: dict | None = None,
+    ) -> None:
+        self.pages = pages
+        self.changes = changes
+        self.files = files or {}
+        self.subcategories = subcategories or {}
+
+    def category_info(self, title: str) -> dict:
+        name = title.split(":", 1)[-1]
+        pages = len(self.category_titles(name))
+        subcats = len(self.subcategories.get(name, []))
+        if not pages and not subcats:
+            return {"ns": 14, "title": title, "missing": ""}
+        info = {"size": pages + subcats, "pages": pages, "files": 0, "subcats": subcats}
+        return {"ns": 14, "title": title, "categoryinfo": info}
+
+    def file_entry(self, title: str) -> dict:
+        info = self.files.get(title.split(":", 1)[-1].replace("_", " "))
+        if info is None:
+            return {"ns": 6, "title": title, "missing": ""}
+        return {"ns": 6, "title": title, "imageinfo": [info]}
+
+    def page_entry(self, title: str, params: dict) -> dict:
+        if "imageinfo" in params.get("prop", ""):
+            return self.file_entry(title)
+        if "categoryinfo" in params.get("prop", ""):
+            return self.category_info(title)
+        page = self.pages.get(title)
+        if page is None:
+            return {"ns": 0, "title": title, "missing": ""}
+        entry = {"pageid": page["pageid"], "ns": 0, "title": title}
+        prop = params.get("prop", "")
+        if "revisions" in prop:
+            rvprop = params.get("rvprop", "ids|timestamp")
+            revision = {}
+            if "ids" in rvprop:
+                revision["revid"] = page["revid"]
+            if "timestamp" in rvprop:
+                revision["timestamp"] = page["timestamp"]
+            if "content" in rvprop:
+                revision["slots"] = {"main": {"*": page.get("content", "")}}
+            entry["revisions"] = [revision]
+        if "categories" in prop:
+            wanted = {
+                name.split(":", 1)[-1]
+                for name in params.get("clcategories", "").split("|")
+                if name
+            }
+            matched = [
+                {"ns": 14, "title": f"Category:{name}"}
+                for name in page.get("categories", [])
+                if not wanted or name in wanted
+            ]
+            if matched:
+                entry["categories"] = matched
+        return entry
+
+    def category_titles(self, category: str) -> list[str]:
+        name = category.split(":", 1)[-1]
+        return [title for title, page in self.pages.items() if name in page.get("categories", [])]
+
+    def query(self, params: dict) -> dict:
+        if params.get("list") == "categorymembers":
+            cmtype = params.get("cmtype", "page|subcat|file")
+            members = []
+            if "page" in cmtype:
+                members += [
+                    {"ns": 0, "title": title} for title in self.category_titles(params["cmtitle"])
+                ]
+            if "subcat" in cmtype:
+                name = params["cmtitle"].split(":", 1)[-1]
+                members += [
+                    {"ns": 14, "title": f"Category:{sub}"}
+                    for sub in self.subcategories.get(name, [])
+                ]
+            return {"query": {"categorymembers": members}}
+        if params.get("list") == "recentchanges":
+            start = params.get("rcstart", "")
+            namespace = params.get("rcnamespace")
+            changes = [
+                change
+                for change in self.changes
+                if change["timestamp"] >= start
+                and (namespace is None or str(change.get("ns", 0)) == namespace)
+            ]
+            return {"query": {"recentchanges": changes}}
+        if params.get("generator") == "categorymembers":
+            titles = self.category_titles(params["gcmtitle"])
+        else:
+            titles = [title for title in params.get("titles", "").split("|") if title]
+        return {
+            "query": {
+                "pages": {
+                    str(index): self.page_entry(title, params)
+                    for index, title in enumerate(titles)
+                }
+            }
+        }
+
+
+def make_handler(wiki: MockWiki):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            parsed = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            body = json.dumps(wiki.query(params)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture", help="JSON file with pages and a recentchanges log")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    pages, changes, files, subcategories = load_fixture(args.fixture)
+    server = ThreadingHTTPServer(
+        (args.host, args.port), make_handler(MockWiki(pages, changes, files, subcategories))
+    )
+    print(f"Mock MediaWiki API on http://{args.host}:{args.port}/api.php")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
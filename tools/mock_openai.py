@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI chat completions and Batch APIs.
+
+Every request is answered with a minimal schema-valid record for the page
+named on the ``TITLE:`` line of the user message, or with the record stored
+for that title in an optional fixture file (``{"Blitz Sticks": {...}}``).
+Requests beyond ``--max-concurrent`` get a ``429`` with ``Retry-After``, and
+``--fail-rate`` rejects a random share of the rest with ``503``, which makes
+the collector's adaptive limiter observable.
+
+The Batch API is covered too: ``POST /files`` stores an uploaded JSONL file,
+``POST /batches`` runs its lines through the same completion handler after
+``--batch-delay`` seconds, and output/error files are served from
+``GET /files/{id}/content``. Point the collector at it with
+``OPENAI_BASE_URL=http://127.0.0.1:8766/v1``.
+"""
+import argparse
+import email.parser
+import email.policy
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_record(title: str, url: str) -> dict:
+    return {
+        "id": title,
+        "name": title,
+        "kind": "Item",
+        "effects": [],
+        "provenance": {
+            "source_type": "wiki",
+            "source_ref": url,
+            "extraction_method": "llm",
+            "confidence": 0.8,
+        },
+        "metadata": {
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+            "version": "1.0.0",
+            "license": "TBD",
+        },
+    }
+
+
+class MockOpenAI:
+    def __init__(
+        self,
+        records: dict | None = None,
+        latency: float = 0.0,
+        max_concurrent: int = 0,
+        fail_rate: float = 0.0,
+        retry_after: float = 1.0,
+        batch_delay: float = 1.0,
+    ) -> None:
+        self.records = records or {}
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.batch_delay = batch_delay
+        self.active = 0
+        self.stats = {"requests": 0, "rejected": 0, "peak_concurrent": 0}
+        self.files: dict = {}
+        self.batches: dict = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def completion(self, body: dict) -> dict:
+        user = next(
+            (message["content"] for message in body.get("messages", []) if message.get("role") == "user"),
+            "",
+        )
+        title = (re.search(r"^TITLE: (.*)$", user, re.M) or [None, ""])[1]
+        url = (re.search(r"^URL: (.*)$", user, re.M) or [None, ""])[1]
+        record = self.records.get(title) or default_record(title, url)
+        content = json.dumps(record)
+        prompt_tokens = sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-mock-{abs(hash(user))}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def handle(self, body: dict) -> tuple[int, dict]:
+        with self.lock:
+            self.stats["requests"] += 1
+            if self.max_concurrent and self.active >= self.max_concurrent:
+                self.stats["rejected"] += 1
+                return 429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}
+            self.active += 1
+            self.stats["peak_concurrent"] = max(self.stats["peak_concurrent"], self.active)
+        try:
+            time.sleep(self.latency)
+            if self.fail_rate and random.random() < self.fail_rate:
+                with self.lock:
+                    self.stats["rejected"] += 1
+                return 503, {"error": {"message": "Overloaded", "type": "server_error"}}
+            return 200, self.completion(body)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        file_id = f"file-mock-{next(self.ids)}"
+        self.files[file_id] = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+            "content": content,
+        }
+        return self.file_object(file_id)
+
+    def file_object(self, file_id: str) -> dict:
+        return {key: value for key, value in self.files[file_id].items() if key != "content"}
+
+    def create_batch(self, body: dict) -> dict:
+        batch_id = f"batch-mock-{next(self.ids)}"
+        lines = [
+            json.loads(line)
+            for line in self.files[body["input_file_id"]]["content"].decode("utf-8").splitlines()
+            if line.strip()
+        ]
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        self.batches[batch_id] = batch
+        threading.Thread(target=self.run_batch, args=(batch, lines), daemon=True).start()
+        return batch
+
+    def run_batch(self, batch: dict, lines: list) -> None:
+        time.sleep(self.batch_delay)
+        output, errors = [], []
+        for line in lines:
+            status = 200
+            if self.fail_rate and random.random() < self.fail_rate:
+                status, body = 500, {"error": {"message": "Overloaded", "type": "server_error"}}
+            else:
+                body = self.completion(line["body"])
+            result = {
+                "id": f"batch-req-{next(self.ids)}",
+                "custom_id": line["custom_id"],
+                "response": {"status_code": status, "body": body},
+                "error": None,
+            }
+            (output if status == 200 else errors).append(json.dumps(result))
+        with self.lock:
+            if output:
+                batch["output_file_id"] = self.add_file(
+                    "\n".join(output).encode("utf-8"), "output.jsonl", "batch_output"
+                )["id"]
+            if errors:
+                batch["error_file_id"] = self.add_file(
+                    "\n".join(errors).encode("utf-8"), "errors.jsonl", "batch_output"
+                )["id"]
+            batch["request_counts"].update({"completed": len(output), "failed": len(errors)})
+            batch["status"] = "completed"
+
+
+def parse_upload(content_type: str, body: bytes) -> tuple[bytes, str, str]:
+    message = email.parser.BytesParser(policy=email.policy.default).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+    )
+    content, filename, purpose = b"", "upload.jsonl", ""
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name == "file":
+            content = part.get_payload(decode=True)
+            filename = part.get_filename() or filename
+        elif name == "purpose":
+            purpose = part.get_content().strip()
+    return content, filename, purpose
+
+
+def make_handler(api: MockOpenAI):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", str(api.retry_after))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def not_found(self) -> None:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def do_POST(self) -> None:  # noqa: N802
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path.endswith("/files"):
+                content, filename, purpose = parse_upload(self.headers.get("Content-Type", ""), raw)
+                with api.lock:
+                    self.send_json(200, api.add_file(content, filename, purpose))
+                return
+            body = json.loads(raw or b"{}")
+            if path.endswith("/chat/completions"):
+                self.send_json(*api.handle(body))
+            elif path.endswith("/batches"):
+                with api.lock:
+                    batch = api.create_batch(body)
+                self.send_json(200, batch)
+            elif re.search(r"/batches/[^/]+/cancel$", path):
+                batch = api.batches.get(path.split("/")[-2])
+                if batch is None:
+                    return self.not_found()
+                batch["status"] = "cancelled"
+                self.send_json(200, batch)
+            else:
+                self.not_found()
+
+        def do_GET(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0].rstrip("/")
+            parts = path.split("/")
+            if path.endswith("/stats"):
+                self.send_json(200, api.stats)
+            elif len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in api.batches:
+                with api.lock:
+                    self.send_json(200, api.batches[parts[-1]])
+            elif len(parts) >= 3 and parts[-1] == "content" and parts[-2] in api.files:
+                content = api.files[parts[-2]]["content"]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            elif len(parts) >= 2 and parts[-2] == "files" and parts[-1] in api.files:
+                self.send_json(200, api.file_object(parts[-1]))
+            else:
+                self.not_found()
+
+        def log_message(self, format, *args) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", help="JSON file mapping page titles to records")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=0,
+        help="Answer 429 above this many concurrent requests (0 = unlimited)",
+    )
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered 503")
+    parser.add_argument(
+        "--batch-delay", type=float, default=1.0, help="Seconds before a submitted batch completes"
+    )
+    args = parser.parse_args()
+    records = {}
+    if args.fixture:
+        with open(args.fixture, encoding="utf-8") as handle:
+            records = json.load(handle)
+    api = MockOpenAI(
+        records,
+        args.latency,
+        args.max_concurrent,
+        args.fail_rate,
+        batch_delay=args.batch_delay,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(api))
+    print(f"Mock OpenAI API on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(api.stats))
+
+
+if __name__ == "__main__":
+    main()
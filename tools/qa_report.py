@@ -3,16 +3,17 @@ import glob
 import json
 import os
 import re
+import sys
 from collections import Counter, defaultdict
 
-from jsonschema import Draft202012Validator
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
-with open(os.path.join(ROOT, "schemas", "dcc-record.schema.json"), encoding="utf-8") as schema_file:
-    SCHEMA = json.load(schema_file)
-ITEMS_DIR = os.path.join(ROOT, "data", "v1", "items")
+from collector.schema import schema_validator
 
-validator = Draft202012Validator(SCHEMA)
+SCHEMA_PATH = os.path.join(ROOT, "schemas", "dcc-record.schema.json")
+ITEMS_DIR = os.path.join(ROOT, "data", "v1", "items")
 
 dice_re = re.compile(r"^\s*\d+d\d+([+\-]\d+)?\s*$", re.I)
 
@@ -67,6 +68,7 @@ def main():
     hard_errs = 0
 
     per_file = defaultdict(list)
+    validator = schema_validator(SCHEMA_PATH)
 
     for fp in files:
         with open(fp, encoding="utf-8") as handle:
@@ -7,9 +7,10 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from collector.config import DATA_DIR, RAW_DIR
-from collector.utils import sanitize_title_for_fs
-from collector.extractor_openai import resolve_image_entry, extract_file_titles
+from collector.config import DATA_DIR
+from collector.rawstore import read_raw
+from collector.extractor_openai import extract_file_titles, image_file_name, resolve_image_entry
+from collector.imagecache import IMAGE_INFO_CACHE
 
 def load_fallback_files(provenance_ref: str, item_name: str) -> list[str]:
     title = None
@@ -20,10 +21,10 @@ def load_fallback_files(provenance_ref: str, item_name: str) -> list[str]:
         title = title.replace("_", " ")
     if not title:
         title = item_name
-    raw_path = Path(RAW_DIR) / f"{sanitize_title_for_fs(title)}.wikitext.txt"
-    if not raw_path.exists():
+    wikitext = read_raw(title)
+    if wikitext is None:
         return []
-    return extract_file_titles(raw_path.read_text(encoding="utf-8"))
+    return extract_file_titles(wikitext)
 
 def needs_refresh(src: str) -> bool:
     if not src:
@@ -33,10 +34,28 @@ def needs_refresh(src: str) -> bool:
         return False
     return True
 
+def prefetch_image_info(paths: list[Path]) -> None:
+    """Warm the image-info cache for every file the refresh may look up, in bulk."""
+    names: list[str] = []
+    for path in paths:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        images = [image for image in data.get("images") or [] if needs_refresh(image.get("src") or "")]
+        if not images:
+            continue
+        for image in images:
+            name = image_file_name(image.get("src") or "")
+            if name:
+                names.append(name)
+        provenance = data.get("provenance", {})
+        names.extend(load_fallback_files(provenance.get("source_ref", ""), data.get("name") or ""))
+    IMAGE_INFO_CACHE.lookup(names)
+
 def main() -> None:
     items_dir = Path(DATA_DIR)
     changed_files = 0
-    for path in sorted(items_dir.glob("*.json")):
+    paths = sorted(items_dir.glob("*.json"))
+    prefetch_image_info(paths)
+    for path in paths:
         data = json.loads(path.read_text(encoding="utf-8"))
         images = data.get("images") or []
         if not images:
@@ -62,7 +81,8 @@ def main() -> None:
         if updated:
             path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
             changed_files += 1
-    print(f"Updated images in {changed_files} item(s)")
+    IMAGE_INFO_CACHE.save()
+    print(f"Updated images in {changed_files} item(s) ({IMAGE_INFO_CACHE.changed} re-uploaded file(s))")
 
 if __name__ == "__main__":
     main()
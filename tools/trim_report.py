@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Report how much wikitext trimming saves per page, and check that it is lossless.
+
+Without ``--qa`` this only reads the raw store: for every stored page it
+prints the estimated prompt tokens before and after trimming and flags pages
+where a deterministic parser would see different input (those are sent
+untrimmed). With ``--qa`` a random sample is extracted twice, from the full
+and the trimmed text, and the fields that differ are listed. QA calls the
+model (responses are cached like any other extraction).
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from collector.extractor_openai import extract_record, trim_changes
+from collector.imagecache import IMAGE_INFO_CACHE
+from collector.llmlimit import estimate_tokens
+from collector.main import page_url_for_title
+from collector.rawstore import load_manifest, read_raw
+from collector.trim import trim_wikitext
+
+IGNORED_FIELDS = {"metadata"}
+
+
+def account(titles: list[str], manifest: dict) -> list[dict]:
+    rows = []
+    for title in titles:
+        wikitext = read_raw(title, manifest)
+        if wikitext is None:
+            continue
+        trimmed = trim_wikitext(wikitext)
+        rows.append(
+            {
+                "title": title,
+                "before": estimate_tokens(wikitext),
+                "after": estimate_tokens(trimmed),
+                "changed": trim_changes(wikitext, trimmed),
+            }
+        )
+    return rows
+
+
+def record_diff(full: dict, trimmed: dict) -> list[str]:
+    keys = (set(full) | set(trimmed)) - IGNORED_FIELDS
+    return sorted(key for key in keys if full.get(key) != trimmed.get(key))
+
+
+def run_qa(titles: list[str], manifest: dict, sample: int, seed: int) -> None:
+    chosen = random.Random(seed).sample(titles, min(sample, len(titles)))
+    identical = 0
+    for title in chosen:
+        wikitext = read_raw(title, manifest)
+        if wikitext is None:
+            continue
+        url = page_url_for_title(title)
+        try:
+            full = extract_record(title, url, wikitext, trim=False)
+            trimmed = extract_record(title, url, wikitext, trim=True)
+        except Exception as exc:  # noqa: BLE001
+            print(f"  ! {title}: {type(exc).__name__}: {exc}")
+            continue
+        diff = record_diff(full, trimmed)
+        if diff:
+            print(f"  * {title}: {', '.join(diff)}")
+        else:
+            identical += 1
+    print(f"QA: {identical}/{len(chosen)} sampled pages extracted identically")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--title", dest="titles", action="append", help="Page title (repeatable)")
+    parser.add_argument("--top", type=int, default=20, help="Pages to list, largest savings first")
+    parser.add_argument("--qa", action="store_true", help="Extract a sample with and without trimming")
+    parser.add_argument("--sample", type=int, default=10, help="Pages to extract in --qa mode")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the --qa sample")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    titles = args.titles or sorted(manifest)
+    rows = account(titles, manifest)
+    rows.sort(key=lambda row: row["before"] - row["after"], reverse=True)
+    for row in rows[: args.top]:
+        flag = f"  (sent untrimmed: {', '.join(row['changed'])})" if row["changed"] else ""
+        print(f"{row['before']:>7} -> {row['after']:>7}  {row['title']}{flag}")
+    before = sum(row["before"] for row in rows)
+    after = sum(row["after"] if not row["changed"] else row["before"] for row in rows)
+    saved = 1 - after / before if before else 0.0
+    untrimmed = sum(1 for row in rows if row["changed"])
+    print(
+        f"Total: pages={len(rows)} tokens_before={before} tokens_after={after} "
+        f"saved={saved:.0%} untrimmed={untrimmed}"
+    )
+    if args.qa:
+        run_qa([row["title"] for row in rows], manifest, args.sample, args.seed)
+        IMAGE_INFO_CACHE.save()
+
+
+if __name__ == "__main__":
+    main()